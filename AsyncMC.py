@@ -0,0 +1,198 @@
+# AsyncMC.py
+import time
+import asyncio
+from collections import deque
+
+import pymcprotocol
+from pymcprotocol import mcprotocolerror
+
+# Binary 3E answer: subheader(2) network(1) pc(1) module io(2) station(1)
+# data length(2), then end code(2) and the answer data
+ANSWER_HEADER = 9
+ANSWER_DATA = 2
+
+# Round-trip times kept for latency percentiles
+LATENCY_WINDOW = 1000
+
+
+class AsyncType3E:
+    """MC protocol 3E (binary) client for asyncio.
+
+    Method names and arguments match pymcprotocol.Type3E, whose frame
+    encoding is reused so device codes are identical; only await is added.
+
+    Requests are pipelined: a 3E connection answers in request order, so
+    every request is written at once and its future is resolved by the
+    reader task in FIFO order. A request that times out leaves the stream
+    position unknown, so the connection is dropped and every pending
+    request fails with ConnectionError; the next request reconnects.
+    """
+
+    def __init__(self, ip, port, plctype="Q", timeout=2.0, connect_timeout=5.0, reconnect=True):
+        self.ip = ip
+        self.port = port
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.reconnect = reconnect
+        # Frame builder only, never connected
+        self.codec = pymcprotocol.Type3E(plctype=plctype)
+        self.reader = None
+        self.writer = None
+        self.reader_task = None
+        self.pending = deque()
+        self.connect_lock = None
+        self.requests = 0
+        self.connections = 0
+        # Connections lost to a timeout or a socket error (not close())
+        self.drops = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.last_answer = 0.0
+
+    @property
+    def connected(self):
+        return self.writer is not None
+
+    # =========================================================
+    # CONNECTION
+    # =========================================================
+
+    async def connect(self, ip=None, port=None):
+        if ip is not None:
+            self.ip, self.port = ip, port
+        if self.connect_lock is None:
+            self.connect_lock = asyncio.Lock()
+        async with self.connect_lock:
+            if self.connected:
+                return
+            self.reader, self.writer = await asyncio.wait_for(
+                asyncio.open_connection(self.ip, self.port), self.connect_timeout)
+            self.reader_task = asyncio.get_running_loop().create_task(self._read_answers())
+            self.connections += 1
+
+    async def close(self):
+        writer = self.writer
+        self._drop(ConnectionError("PLC connection closed"))
+        if writer is not None:
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    def _drop(self, error):
+        """Close the socket and fail every request still waiting for an answer."""
+        if self.writer is not None:
+            self.writer.close()
+        if self.reader_task is not None and self.reader_task is not asyncio.current_task():
+            self.reader_task.cancel()
+        self.reader = self.writer = self.reader_task = None
+        while self.pending:
+            future = self.pending.popleft()
+            if not future.done():
+                future.set_exception(error)
+
+    async def _read_answers(self):
+        reader = self.reader
+        try:
+            while True:
+                header = await reader.readexactly(ANSWER_HEADER)
+                length = int.from_bytes(header[7:9], "little")
+                body = await reader.readexactly(length)
+                if not self.pending:
+                    raise ConnectionError("unexpected answer from PLC")
+                future = self.pending.popleft()
+                if not future.done():
+                    future.set_result(body)
+        except asyncio.CancelledError:
+            raise
+        except (OSError, EOFError, ConnectionError) as e:
+            if reader is self.reader:
+                self.drops += 1
+                self._drop(ConnectionError(f"PLC connection lost: {e}"))
+
+    async def _request(self, request_data):
+        if not self.connected:
+            if self.connections and not self.reconnect:
+                raise ConnectionError("PLC is not connected")
+            await self.connect()
+        future = asyncio.get_running_loop().create_future()
+        # Queued and written without an await in between, so answers match
+        self.pending.append(future)
+        self.writer.write(self.codec._make_senddata(request_data))
+        self.requests += 1
+        sent = time.monotonic()
+        try:
+            body = await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            self.drops += 1
+            self._drop(ConnectionError("PLC request timed out"))
+            raise
+        self.last_answer = time.monotonic()
+        self.latencies.append(self.last_answer - sent)
+        mcprotocolerror.check_mcprotocol_error(int.from_bytes(body[:ANSWER_DATA], "little"))
+        return body[ANSWER_DATA:]
+
+    def _command(self, command, subcommand):
+        return self.codec._make_commanddata(command, subcommand)
+
+    def _device(self, device):
+        return self.codec._make_devicedata(device)
+
+    # =========================================================
+    # DEVICE ACCESS
+    # =========================================================
+
+    async def batchread_wordunits(self, headdevice, readsize):
+        data = await self._request(self._command(0x0401, 0x0000) + self._device(headdevice)
+                                   + readsize.to_bytes(2, "little"))
+        return [int.from_bytes(data[i * 2:i * 2 + 2], "little", signed=True) for i in range(readsize)]
+
+    async def batchread_bitunits(self, headdevice, readsize):
+        data = await self._request(self._command(0x0401, 0x0001) + self._device(headdevice)
+                                   + readsize.to_bytes(2, "little"))
+        # Two points per byte, the first one in the high nibble
+        return [(data[i // 2] >> (4 if i % 2 == 0 else 0)) & 1 for i in range(readsize)]
+
+    async def batchwrite_wordunits(self, headdevice, values):
+        data = b"".join(int(v).to_bytes(2, "little", signed=True) for v in values)
+        await self._request(self._command(0x1401, 0x0000) + self._device(headdevice)
+                            + len(values).to_bytes(2, "little") + data)
+
+    async def batchwrite_bitunits(self, headdevice, values):
+        packed = bytearray((len(values) + 1) // 2)
+        for i, value in enumerate(values):
+            if value not in (0, 1):
+                raise ValueError("Each value must be 0 or 1. 0 is OFF, 1 is ON.")
+            packed[i // 2] |= value << (4 if i % 2 == 0 else 0)
+        await self._request(self._command(0x1401, 0x0001) + self._device(headdevice)
+                            + len(values).to_bytes(2, "little") + bytes(packed))
+
+    async def randomread(self, word_devices, dword_devices):
+        request = self._command(0x0403, 0x0000) + bytes([len(word_devices), len(dword_devices)])
+        request += b"".join(self._device(d) for d in word_devices)
+        request += b"".join(self._device(d) for d in dword_devices)
+        data = await self._request(request)
+        words = [int.from_bytes(data[i * 2:i * 2 + 2], "little", signed=True) for i in range(len(word_devices))]
+        offset = len(word_devices) * 2
+        dwords = [int.from_bytes(data[offset + i * 4:offset + i * 4 + 4], "little", signed=True)
+                  for i in range(len(dword_devices))]
+        return words, dwords
+
+    async def randomwrite(self, word_devices, word_values, dword_devices, dword_values):
+        if len(word_devices) != len(word_values) or len(dword_devices) != len(dword_values):
+            raise ValueError("devices and values must be same length")
+        request = self._command(0x1402, 0x0000) + bytes([len(word_devices), len(dword_devices)])
+        for device, value in zip(word_devices, word_values):
+            request += self._device(device) + int(value).to_bytes(2, "little", signed=True)
+        for device, value in zip(dword_devices, dword_values):
+            request += self._device(device) + int(value).to_bytes(4, "little", signed=True)
+        await self._request(request)
+
+    async def randomwrite_bitunits(self, bit_devices, values):
+        if len(bit_devices) != len(values):
+            raise ValueError("bit_devices and values must be same length")
+        request = self._command(0x1402, 0x0001) + bytes([len(bit_devices)])
+        for device, value in zip(bit_devices, values):
+            if value not in (0, 1):
+                raise ValueError("Each value must be 0 or 1. 0 is OFF, 1 is ON.")
+            request += self._device(device) + bytes([value])
+        await self._request(request)
@@ -1,8 +1,20 @@
 import time
 import socket
+import asyncio
+import contextlib
 import threading
-import pymcprotocol
+from concurrent.futures import ThreadPoolExecutor
 import DobotDllType as dType
+from AsyncMC import AsyncType3E
+from PlcLink import PlcLink
+from WaypointRunner import stream_commands
+from WaypointProgram import Program
+from TrajectoryPlanner import TrajectoryPlanner
+from MotionEstimator import MotionEstimator
+from Kinematics import check_program, WorkspaceError
+from PlcIO import AsyncPlcIO
+from PlcScanner import AsyncPlcScanner
+from CycleProfiler import Profiler
 
 # =========================================================
 # CONFIGURATION
@@ -13,6 +25,15 @@ PLC_IP = "192.168.3.39"
 PLC_PORT = 5051
 PLC_TIMEOUT = 5.0  # Timeout in seconds for connection and data transfer
 
+# PLC handshake bits: start (from PLC), busy and job complete (to PLC)
+START_BIT = "M100"
+BUSY_BIT = "M101"
+DONE_BIT = "M102"
+DONE_PULSE_TIME = 0.2  # seconds the job complete bit stays ON
+SCAN_INTERVAL = 0.2    # seconds between PLC scans (scanner period)
+# Time every Dobot and PLC call and print a per-phase breakdown per cycle
+PROFILE = False
+
 # Dobot Config
 DOBOT_PORT = "COM4"
 BAUDRATE = 115200
@@ -22,6 +43,9 @@ BAUDRATE = 115200
 DOBOT_VELOCITY = 50.0 
 DOBOT_ACCELERATION = 50.0
 # For reference: Maximum values are typically around 200/200
+# Send suction changes with the move (SetPTPPOCmd on the pump I/O, see
+# WaypointProgram.TOOL_OUTPUTS) instead of as a separate command after it
+PARALLEL_OUTPUTS = False
 
 # =========================================================
 # DATA FROM CSV
@@ -34,108 +58,89 @@ WAYPOINTS = [
     (101.311,-114.5566,12.1601,-48.5113,0.0,0.0,0,0.0)
 ]
 
+# Dwell is in seconds
+PROGRAM = Program.from_tuples(WAYPOINTS, dwell_scale=1000.0)
+# Duplicate points and repeated suction commands are dropped before queuing;
+# the first move is skipped when the arm is still at the last point of the
+# previous cycle
+PLANNER = TrajectoryPlanner(dType.PTPMode.PTPMOVLXYZMode, parallel_outputs=PARALLEL_OUTPUTS)
+# Cycle time prediction with the PTP parameters main() sets; the final
+# completion wait polls fast only near the predicted end
+ESTIMATOR = MotionEstimator(coordinate_params=dType.PTPCoordinateParams(DOBOT_VELOCITY, DOBOT_VELOCITY,
+                                                                          DOBOT_ACCELERATION, DOBOT_ACCELERATION),
+                            velocity_ratio=DOBOT_VELOCITY, acceleration_ratio=DOBOT_ACCELERATION)
+
 # =========================================================
 # PLC FUNCTIONS
 # =========================================================
 
-def connect_plc():
-    # Uses the simple constructor for robustness across pymcprotocol versions.
-    mc = pymcprotocol.Type3E()
-    while True:
-        try:
-            print(f"[PLC] Attempting connection to {PLC_IP}:{PLC_PORT}...")
-            mc.connect(PLC_IP, PLC_PORT)
-            print(f"[PLC] Connected successfully to {PLC_IP}:{PLC_PORT}")
-            return mc
-        except Exception as e:
-            print(f"[PLC] Connection Error: {e}")
-            print("[PLC] Retrying in 2 seconds...")
-            time.sleep(2)
-
-def set_plc_bit(mc, address, value):
-    """Sets a PLC bit address to a specific value (1 for ON, 0 for OFF)."""
-    try:
-        mc.batchwrite_bitunits(headdevice=address, values=[value])
-        print(f"[PLC] Set {address} to {'ON' if value else 'OFF'}")
-    except Exception as e:
-        print(f"[PLC] Error setting {address} to {value}: {e}")
+async def connect_plc(io):
+    """Connect with exponential backoff; the link then keeps itself up.
 
-def pulse_bit_plc(mc, address, on_time=0.2, off_time=0.2):
-    """Turns a PLC bit ON, waits, then turns it OFF."""
-    try:
-        mc.batchwrite_bitunits(headdevice=address, values=[1])
-        print(f"[PLC] Pulse {address} → ON {on_time}s")
-        time.sleep(on_time)
-        mc.batchwrite_bitunits(headdevice=address, values=[0])
-        print(f"[PLC] Pulse {address} → OFF {off_time}s")
-        # Wait the off time to allow PLC to process the pulse cycle
-        time.sleep(off_time) 
-    except Exception as e:
-        print(f"[PLC] Error pulsing {address}: {e}")
+    After a reconnect the busy/complete bits are written again, so the PLC
+    does not lose the state of a cycle that was running during the drop.
+    """
+    link = PlcLink(io.mc, io, replay=[BUSY_BIT, DONE_BIT])
+    print(f"[PLC] Attempting connection to {PLC_IP}:{PLC_PORT}...")
+    await link.connect()
+    print(f"[PLC] Connected successfully to {PLC_IP}:{PLC_PORT}")
+    return link
 
-def read_plc_bit(mc, address):
-    """Reads the state of a single PLC bit address."""
-    try:
-        val = mc.batchread_bitunits(headdevice=address, readsize=1)[0]
-        return int(val)
-    except Exception as e:
-        print(f"[PLC] Error reading {address}: {e}")
-        return 0
+def connect_plc_io(mc):
+    """Handshake bits are read in one frame per scan and written in one frame per flush."""
+    return AsyncPlcIO(mc, bits=[START_BIT, BUSY_BIT, DONE_BIT])
+
+def start_scanner(io, triggers):
+    """Rising edges of the start bit are put on triggers, one per PLC pulse."""
+    scanner = AsyncPlcScanner(io, period=SCAN_INTERVAL)
+    scanner.subscribe(START_BIT, queue=triggers)
+    return scanner, asyncio.create_task(scanner.run())
 
 # =========================================================
 # DOBOT FUNCTIONS
 # =========================================================
 
-def run_dobot_sequence(api):
+def queue_dobot_sequence(api):
     print("[DOBOT] Starting sequence based on CSV data...")
     
     # Clean queue before starting
     dType.SetQueuedCmdClear(api)
     
-    lastIndex = 0
-    
-    # Iterate through the CSV points
-    for i, (x, y, z, r, vel, accel, suction, dwell) in enumerate(WAYPOINTS):
-        
-        # 1. Handle Velocity/Acceleration (Optional) - using global V/A
-        
-        # 2. Queue the Movement
-        # Reverted to the correct enum structure and keyword argument syntax
-        # confirmed by the user's working script. Using PTPMOVLXYZMode.
-        
-        lastIndex = dType.SetPTPCmd(api, 
-                                    dType.PTPMode.PTPMOVLXYZMode, # Mode 3: Linear move in Cartesian space
-                                    x, y, z, r, 
-                                    isQueued=1)[0]
-        
-        # 3. Handle Suction
-        # EnableCtrl=1, Suction=suction_val, isQueued=1
-        dType.SetEndEffectorSuctionCup(api, 1, int(suction), 1)
-
-        # 4. Handle Dwell Time (Delay)
-        # Note: This executes the sleep on the host PC, not inside the Dobot queue.
-        if dwell > 0.0:
-            print(f"[DOBOT] Dwell time: {dwell}s")
-            time.sleep(dwell)
-
-        print(f"[DOBOT] Queued Point {i+1}: X={x}, Y={y}, Z={z}, R={r}, Suc={suction}, Dwell={dwell}")
-
-    # Execute the queue
-    dType.SetQueuedCmdStartExec(api)
-
-    # Wait for completion of the last queued command
-    while lastIndex > dType.GetQueuedCmdCurrentIndex(api)[0]:
-        dType.dSleep(100)
-
-    # Stop execution loop
-    dType.SetQueuedCmdStopExec(api)
-    print("[DOBOT] Sequence Finished.")
+    # Queue the whole program, dwells included; run_dobot_sequence waits for the last command
+    # PLANNER picks JUMP/MOVJ/MOVL per move from the waypoint annotations
+    # (unannotated moves stay PTPMOVLXYZMode). Suction changes are queued
+    # after their point, or ride on the move as SetPTPPOCmd outputs with
+    # PARALLEL_OUTPUTS; dwells are queued as SetWAITCmd
+    start_pose = dType.GetPose(api)[:4]
+    program = PLANNER(PROGRAM, start_pose=start_pose)
+    expected_ms = ESTIMATOR.total_ms(program, start_pose, dType.PTPMode.PTPMOVLXYZMode, api=api)
+    started = time.monotonic()
+    last_index = stream_commands(api, program.commands(dType.PTPMode.PTPMOVLXYZMode), wait=False)
+    return last_index, expected_ms, started
+
+async def run_dobot_sequence(api, dobot_worker):
+    """Queue on the worker thread, then wait for the last command on the
+    event loop, so polling the arm never stalls the PLC scan."""
+    loop = asyncio.get_running_loop()
+    last_index, expected_ms, started = await loop.run_in_executor(dobot_worker, queue_dobot_sequence, api)
+    remaining_ms = max(expected_ms - (time.monotonic() - started) * 1000, 0)
+    await dType.AwaitQueuedCmd(api, last_index, remaining_ms, executor=dobot_worker)
+    await loop.run_in_executor(dobot_worker, dType.SetQueuedCmdStopExec, api)
+    print(f"[DOBOT] Sequence Finished ({len(PROGRAM)} points, {time.monotonic() - started:.2f} s, "
+          f"est. {expected_ms / 1000:.2f} s).")
 
 # =========================================================
 # MAIN LOOP
 # =========================================================
 
 def main():
+    # 0. Reject waypoints the arm cannot reach before anything is queued
+    try:
+        check_program(PROGRAM, DOBOT_PORT)
+    except WorkspaceError as e:
+        print(f"[ERROR] {e}")
+        return
+
     # 1. Connect to Dobot
     api = dType.load()
     state = dType.ConnectDobot(api, DOBOT_PORT, BAUDRATE)[0]
@@ -154,46 +159,14 @@ def main():
     # The function requires four speed/acceleration values (XYZ V/A and R V/A).
     dType.SetPTPCoordinateParams(api, DOBOT_VELOCITY, DOBOT_ACCELERATION, DOBOT_VELOCITY, DOBOT_ACCELERATION, isQueued=0)
     print(f"[DOBOT] Set global V/A (Joint & Cartesian) to: {DOBOT_VELOCITY} / {DOBOT_ACCELERATION}")
+    last = PROGRAM[len(PROGRAM) - 1]
+    PLANNER.print_report(PROGRAM, DOBOT_PORT, start_pose=(last.x, last.y, last.z, last.r), estimator=ESTIMATOR)
     
     # Optional: Home the robot if needed
     # dType.SetHOMECmd(api, temp=0, isQueued=1)
 
-    # 3. Connect to PLC
-    mc = connect_plc()
-
-    print("System Ready. Waiting for M100 pulse to start the job...")
-
     try:
-        while True:
-            # Check M100 (Start Signal) to start the cycle
-            m100_val = read_plc_bit(mc, "M100")
-
-            if m100_val == 1:
-                print("\n[EVENT] M100 Detected ON! Starting Dobot sequence.")
-                
-                # NEW Step 1: Set M101 ON (Dobot Busy)
-                set_plc_bit(mc, "M101", 1)
-                
-                # Step 2: Run Dobot Sequence (synchronous)
-                run_dobot_sequence(api)
-
-                # NEW Step 3: Set M101 OFF (Dobot Ready)
-                set_plc_bit(mc, "M101", 0)
-
-                # NEW Step 4: Pulse M102 ON (Job Complete Signal)
-                print("[SYSTEM] Dobot work complete. Pulsing M102 ON.")
-                pulse_bit_plc(mc, "M102") 
-
-                print("[SYSTEM] Waiting for M100 to reset...")
-                
-                # Debounce: Wait until PLC turns M100 OFF before allowing the next trigger
-                while read_plc_bit(mc, "M100") == 1:
-                    time.sleep(0.5)
-                
-                print("[SYSTEM] Ready for next cycle.")
-
-            time.sleep(0.2) # Polling interval
-
+        asyncio.run(plc_main(api))
     except KeyboardInterrupt:
         print("\nStopping...")
     except Exception as e:
@@ -201,13 +174,77 @@ def main():
     finally:
         # Cleanup
         dType.DisconnectDobot(api)
-        # Attempt to close the PLC connection if it was successfully opened
-        if 'mc' in locals():
-            try:
-                mc.close()
-            except:
-                pass 
         print("Connections closed.")
 
+async def plc_main(api):
+    # 3. Connect to PLC
+    # Requests time out after PLC_TIMEOUT
+    mc = AsyncType3E(PLC_IP, PLC_PORT, timeout=PLC_TIMEOUT)
+    profiler = None
+    if PROFILE:
+        profiler = Profiler()
+        profiler.instrument_dobot()
+        profiler.instrument_plc(mc)
+    io = connect_plc_io(mc)
+    link = await connect_plc(io)
+    link_task = asyncio.create_task(link.run())
+
+    triggers = asyncio.Queue()
+    scanner, scan_task = start_scanner(io, triggers)
+    # Dobot calls block, so the sequence runs on its own worker thread
+    # while the PLC scan keeps running on the event loop
+    dobot_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dobot")
+
+    print(f"System Ready. Waiting for {START_BIT} pulse to start the job...")
+
+    try:
+        await handshake_loop(api, io, link, scanner, triggers, dobot_worker, profiler)
+    finally:
+        scanner.stop()
+        link.stop()
+        link_task.cancel()
+        await scan_task
+        link.print_metrics()
+        if profiler is not None:
+            profiler.print_report()
+            profiler.uninstrument()
+        dobot_worker.shutdown()
+        await mc.close()
+
+async def run_cycle(api, io, link, dobot_worker):
+    # Step 1: Set M101 ON (Dobot Busy)
+    io.set_bit(BUSY_BIT, 1)
+    await link.flush()
+
+    # Step 2: Run Dobot Sequence; Dobot calls go to the worker thread
+    await run_dobot_sequence(api, dobot_worker)
+
+    # Step 3 + 4: M101 OFF (Dobot Ready) and M102 ON (Job Complete) in one write
+    print(f"[SYSTEM] Dobot work complete. Pulsing {DONE_BIT} ON.")
+    io.set_bit(BUSY_BIT, 0)
+    io.set_bit(DONE_BIT, 1)
+    await link.flush()
+    await asyncio.sleep(DONE_PULSE_TIME)
+    io.set_bit(DONE_BIT, 0)
+    await link.flush()
+
+async def handshake_loop(api, io, link, scanner, triggers, dobot_worker, profiler=None):
+    while True:
+        await triggers.get()
+        print(f"\n[EVENT] {START_BIT} Detected ON! Starting Dobot sequence.")
+        with profiler.cycle() if profiler else contextlib.nullcontext():
+            await run_cycle(api, io, link, dobot_worker)
+        if profiler:
+            profiler.print_cycle()
+
+        # Debounce: the next trigger is only accepted once the PLC turned M100 OFF
+        print(f"[SYSTEM] Waiting for {START_BIT} to reset...")
+        await scanner.wait_for(START_BIT, 0)
+        # Edges seen while the job was running belong to this cycle
+        while not triggers.empty():
+            triggers.get_nowait()
+        print("[SYSTEM] Ready for next cycle.")
+        link.print_metrics()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
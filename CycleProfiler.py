@@ -0,0 +1,238 @@
+# CycleProfiler.py
+import time
+import inspect
+import functools
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+
+import DobotDllType as dType
+from PlcLink import percentile
+
+# DobotDllType wrapper -> phase; other wrappers taking api are "dobot"
+DOBOT_PHASES = {
+    "SetPTPCmd": "enqueue", "SetPTPWithLCmd": "enqueue", "SetPTPPOCmd": "enqueue",
+    "SetPTPPOWithLCmd": "enqueue", "SetCPCmd": "enqueue", "SetCP2Cmd": "enqueue", "SetCPParams": "enqueue",
+    "SetCPLECmd": "enqueue", "SetARCCmd": "enqueue", "SetCircleCmd": "enqueue",
+    "SetWAITCmd": "enqueue", "SetTRIGCmd": "enqueue",
+    "SetQueuedCmdStartExec": "start-exec", "SetQueuedCmdStopExec": "start-exec",
+    "WaitQueuedCmd": "wait-complete", "GetQueuedCmdCurrentIndex": "wait-complete",
+    "SetEndEffectorGripper": "gripper", "SetEndEffectorSuctionCup": "gripper",
+    "SetQueuedCmdClear": "queue",
+}
+# MC protocol client method -> phase (pymcprotocol.Type3E or AsyncType3E)
+PLC_PHASES = {
+    "batchread_bitunits": "plc-read", "batchread_wordunits": "plc-read", "randomread": "plc-read",
+    "batchwrite_bitunits": "plc-write", "batchwrite_wordunits": "plc-write",
+    "randomwrite": "plc-write", "randomwrite_bitunits": "plc-write",
+}
+# Records kept for percentiles and the flame summary
+RECORD_WINDOW = 100000
+
+# Open spans of the current thread or asyncio task
+_open_spans = contextvars.ContextVar("open_spans", default=())
+
+
+class Span:
+    __slots__ = ("id", "parent", "name", "phase", "path", "start", "duration")
+
+    def __init__(self, id, parent, name, phase, path, start):
+        self.id = id
+        self.parent = parent
+        self.name = name
+        self.phase = phase
+        self.path = path
+        self.start = start
+        self.duration = 0.0
+
+
+class Profiler:
+    """Per-call latency of Dobot wrappers and PLC requests, grouped by phase.
+
+    Every instrumented call becomes a span with monotonic start time and
+    duration; calls made inside another span (GetQueuedCmdCurrentIndex
+    inside WaitQueuedCmd) are nested under it, per thread and per asyncio
+    task. cycle() brackets one job and stores its per-phase breakdown.
+    Phases of concurrent threads and tasks can overlap, so their sum may
+    exceed the cycle's wall time.
+    """
+
+    def __init__(self, window=RECORD_WINDOW):
+        self.lock = threading.Lock()
+        self.spans = deque(maxlen=window)
+        self.cycles = []
+        self.patched = []
+        self.next_id = 0
+
+    # =========================================================
+    # RECORDING
+    # =========================================================
+
+    def _open(self, name, phase):
+        stack = _open_spans.get()
+        parent = stack[-1] if stack else None
+        with self.lock:
+            self.next_id += 1
+            span = Span(self.next_id, parent.id if parent else None, name, phase,
+                        (parent.path if parent else (phase,)) + (name,), time.monotonic())
+        return span, _open_spans.set(stack + (span,))
+
+    def _close(self, span, token):
+        span.duration = time.monotonic() - span.start
+        _open_spans.reset(token)
+        with self.lock:
+            self.spans.append(span)
+
+    @contextmanager
+    def span(self, name, phase=None):
+        span, token = self._open(name, phase or name)
+        try:
+            yield span
+        finally:
+            self._close(span, token)
+
+    def wrap(self, func, name, phase):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def timed(*args, **kwargs):
+                span, token = self._open(name, phase)
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    self._close(span, token)
+        else:
+            @functools.wraps(func)
+            def timed(*args, **kwargs):
+                span, token = self._open(name, phase)
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self._close(span, token)
+        timed.__wrapped_by_profiler__ = func
+        return timed
+
+    def _patch(self, owner, name, phase):
+        func = getattr(owner, name)
+        self.patched.append((owner, name, func))
+        setattr(owner, name, self.wrap(func, name, phase))
+
+    def instrument_dobot(self, module=dType, phases=DOBOT_PHASES):
+        """Time every DobotDllType wrapper taking api, module level and on DobotSession."""
+        for name, func in list(vars(module).items()):
+            if not inspect.isfunction(func) or func.__code__.co_varnames[:1] != ("api",):
+                continue
+            phase = phases.get(name, "dobot")
+            self._patch(module, name, phase)
+            if name in vars(module.DobotSession):
+                self._patch(module.DobotSession, name, phase)
+
+    def instrument_plc(self, client, phases=PLC_PHASES):
+        """Time the read/write requests of one MC protocol client."""
+        for name, phase in phases.items():
+            if hasattr(client, name):
+                self._patch(client, name, phase)
+
+    def uninstrument(self):
+        for owner, name, func in reversed(self.patched):
+            if isinstance(owner, type) or inspect.ismodule(owner):
+                setattr(owner, name, func)
+            else:
+                # Instance attribute shadowing the class method
+                delattr(owner, name)
+        self.patched = []
+
+    # =========================================================
+    # CYCLES
+    # =========================================================
+
+    @contextmanager
+    def cycle(self, label=None):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            end = time.monotonic()
+            with self.lock:
+                spans = [s for s in self.spans if s.parent is None and start <= s.start < end]
+            phases = {}
+            for s in spans:
+                total, count = phases.get(s.phase, (0.0, 0))
+                phases[s.phase] = (total + s.duration, count + 1)
+            self.cycles.append({"label": label or f"cycle {len(self.cycles) + 1}",
+                                "wall": end - start, "phases": phases})
+
+    def print_cycle(self, cycle=None):
+        cycle = cycle or self.cycles[-1]
+        parts = sorted(cycle["phases"].items(), key=lambda item: -item[1][0])
+        breakdown = " | ".join(f"{phase} {total:.2f} s ({count})" for phase, (total, count) in parts)
+        print(f"[PROFILE] {cycle['label']}: {cycle['wall']:.2f} s | {breakdown}")
+
+    # =========================================================
+    # REPORTS
+    # =========================================================
+
+    def phase_stats(self):
+        """Per phase: calls, total and latency percentiles of top-level calls."""
+        by_phase = {}
+        with self.lock:
+            for s in self.spans:
+                if s.parent is None:
+                    by_phase.setdefault(s.phase, []).append(s.duration)
+        stats = {}
+        for phase, durations in by_phase.items():
+            durations.sort()
+            stats[phase] = {
+                "calls": len(durations),
+                "total_s": sum(durations),
+                "p50_ms": percentile(durations, 50) * 1000,
+                "p95_ms": percentile(durations, 95) * 1000,
+                "p99_ms": percentile(durations, 99) * 1000,
+                "max_ms": durations[-1] * 1000,
+            }
+        return stats
+
+    def folded(self):
+        """Self time per call stack, "phase;outer;inner" -> seconds.
+
+        The same format as flamegraph.pl's folded stacks input.
+        """
+        with self.lock:
+            spans = list(self.spans)
+        self_time = {s.id: s.duration for s in spans}
+        for s in spans:
+            if s.parent in self_time:
+                self_time[s.parent] -= s.duration
+        stacks = {}
+        for s in spans:
+            key = ";".join(s.path)
+            stacks[key] = stacks.get(key, 0.0) + max(0.0, self_time[s.id])
+        return stacks
+
+    def print_report(self, width=40, min_share=0.005):
+        for phase, m in sorted(self.phase_stats().items(), key=lambda item: -item[1]["total_s"]):
+            print(f"[PROFILE] {phase:<14} calls={m['calls']:<6} total={m['total_s']:.2f} s "
+                  f"p50={m['p50_ms']:.1f} p95={m['p95_ms']:.1f} p99={m['p99_ms']:.1f} max={m['max_ms']:.1f} ms")
+
+        # Flame-style summary: inclusive time per stack, children indented
+        inclusive = {}
+        for key, seconds in self.folded().items():
+            frames = key.split(";")
+            for depth in range(1, len(frames) + 1):
+                prefix = tuple(frames[:depth])
+                inclusive[prefix] = inclusive.get(prefix, 0.0) + seconds
+        total = sum(seconds for path, seconds in inclusive.items() if len(path) == 1) or 1.0
+
+        def show(parent):
+            children = [p for p in inclusive if len(p) == len(parent) + 1 and p[:-1] == parent]
+            for path in sorted(children, key=lambda p: -inclusive[p]):
+                share = inclusive[path] / total
+                if share < min_share:
+                    continue
+                indent = "  " * (len(path) - 1)
+                bar = "#" * max(1, int(round(share * width)))
+                print(f"[FLAME] {indent}{path[-1]:<{30 - len(indent)}} "
+                      f"{inclusive[path]:8.2f} s {share * 100:5.1f}% {bar}")
+                show(path)
+
+        show(())
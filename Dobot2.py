@@ -1,4 +1,9 @@
 import DobotDllType as dType
+from WaypointRunner import stream_commands
+from WaypointProgram import Program, EFFECTOR_GRIPPER
+from TrajectoryPlanner import TrajectoryPlanner
+from MotionEstimator import MotionEstimator
+from Kinematics import check_program
 
 # Load Dobot API
 api = dType.load()
@@ -10,52 +15,41 @@ print("Connection state:", state)
 if state == dType.DobotConnect.DobotConnect_NoError:
     dType.SetQueuedCmdClear(api)
 
-    # Define waypoints: (X, Y, Z, R, vel, accel, gripper, dwell)
+    # Define waypoints: (X, Y, Z, R, vel, accel, gripper, dwell, note)
     waypoints = [
-        (166.5096, -8.6768, -50.3821, 37.917, 15, 15, 0, 300),   # Point1 - start
-        (166.5088, -8.6768, 45.8103, 37.917, 35, 35, 0, 200),    # Point2 - transfer
-        (136.5861, 95.6279, 45.8103, 75.897, 35, 35, 0, 200),    # Point3 - transfer
-        (140.8202, 99.1645, 11.3106, 76.0529, 12, 12, 0, 300),   # Point4 - APPROACH
-        (140.8202, 99.1645, 11.3106, 76.0529, 9, 9, 1, 500),     # Point5 - ACTION (gripper close)
-        (140.8202, 99.1645, 11.3106, 76.0529, 22, 22, 2, 300),   # Point6 - RETREAT start
-        (140.8202, 99.1644, 35.4546, 76.0529, 22, 22, 2, 300),   # Point7 - RETREAT move
-        (172.1055, -6.6028, 35.4546, 38.7029, 40, 40, 2, 200),   # Point8 - transfer
-        (172.1055, -6.6028, 35.4546, -146.4771, 40, 40, 2, 200), # Point9 - transfer
-        (158.0942, -68.3383, 35.4546, -167.6571, 40, 40, 2, 200),# Point10 - transfer
-        (179.6473, -77.6549, 32.6332, -167.6571, 40, 40, 2, 200),# Point11 - transfer
-        (181.9947, -81.3655, 7.1658, -168.3683, 12, 12, 2, 300), # Point12 - APPROACH
-        (181.9947, -81.3655, 7.1658, -168.3683, 9, 9, 1, 500),   # Point13 - ACTION (gripper open/close)
-        (167.7602, -75.0016, 12.511, -168.3683, 22, 22, 1, 300), # Point14 - RETREAT move 1
-        (167.7605, -75.0017, 35.359, -168.3683, 22, 22, 1, 300), # Point15 - RETREAT move 2
-        (183.3615, -12.1413, 35.359, -148.0683, 35, 35, 1, 200), # Point16 - transfer
-        (166.5096, -8.6768, -50.3821, 37.917, 15, 15, 0, 300)    # Point17 - return to start
+        (166.5096, -8.6768, -50.3821, 37.917, 15, 15, 0, 300, "start"),   # Point1
+        (166.5088, -8.6768, 45.8103, 37.917, 35, 35, 0, 200, "transfer"),    # Point2
+        (136.5861, 95.6279, 45.8103, 75.897, 35, 35, 0, 200, "transfer"),    # Point3
+        (140.8202, 99.1645, 11.3106, 76.0529, 12, 12, 0, 300, "APPROACH"),   # Point4
+        (140.8202, 99.1645, 11.3106, 76.0529, 9, 9, 1, 500, "ACTION (gripper close)"),     # Point5
+        (140.8202, 99.1645, 11.3106, 76.0529, 22, 22, 2, 300, "RETREAT start"),   # Point6
+        (140.8202, 99.1644, 35.4546, 76.0529, 22, 22, 2, 300, "RETREAT move"),   # Point7
+        (172.1055, -6.6028, 35.4546, 38.7029, 40, 40, 2, 200, "transfer"),   # Point8
+        (172.1055, -6.6028, 35.4546, -146.4771, 40, 40, 2, 200, "transfer"), # Point9
+        (158.0942, -68.3383, 35.4546, -167.6571, 40, 40, 2, 200, "transfer"),# Point10
+        (179.6473, -77.6549, 32.6332, -167.6571, 40, 40, 2, 200, "transfer"),# Point11
+        (181.9947, -81.3655, 7.1658, -168.3683, 12, 12, 2, 300, "APPROACH"), # Point12
+        (181.9947, -81.3655, 7.1658, -168.3683, 9, 9, 1, 500, "ACTION (gripper open/close)"),   # Point13
+        (167.7602, -75.0016, 12.511, -168.3683, 22, 22, 1, 300, "RETREAT move 1"), # Point14
+        (167.7605, -75.0017, 35.359, -168.3683, 22, 22, 1, 300, "RETREAT move 2"), # Point15
+        (183.3615, -12.1413, 35.359, -148.0683, 35, 35, 1, 200, "transfer"), # Point16
+        (166.5096, -8.6768, -50.3821, 37.917, 15, 15, 0, 300, "return to start")    # Point17
     ]
 
-    # Queue moves through all waypoints
-    for i, (x, y, z, r, vel, accel, gripper, dwell) in enumerate(waypoints):
-        lastIndex = dType.SetPTPCmd(api,
-                                    dType.PTPMode.PTPMOVLXYZMode,
-                                    x, y, z, r,
-                                    isQueued=1)[0]
-
-        # Gripper control
-        if gripper == 1:  # close
-            dType.SetEndEffectorGripper(api, 1, 1, isQueued=1)
-        elif gripper == 0:  # open
-            dType.SetEndEffectorGripper(api, 1, 0, isQueued=1)
-        # gripper == 2 means hold, no change
-
-        # Dwell (pause) after each point
-        dType.dSleep(dwell)
-
-    # Start execution
-    dType.SetQueuedCmdStartExec(api)
-
-    # Wait until the last move is done
-    while lastIndex > dType.GetQueuedCmdCurrentIndex(api)[0]:
-        dType.dSleep(100)
-
-    dType.SetQueuedCmdStopExec(api)
+    # gripper 1 = close, 0 = open, 2 = hold; dwell in ms, executed in the Dobot queue
+    program = Program.from_tuples(waypoints, effector=EFFECTOR_GRIPPER, dwell_scale=1.0)
+    # Raises WorkspaceError before anything is queued if a point is out of reach
+    check_program(program, "COM4")
+    # Notes pick MOVL near the part and MOVJ/JUMP for transfers
+    planner = TrajectoryPlanner(dType.PTPMode.PTPMOVLXYZMode)
+    start_pose = dType.GetPose(api)[:4]
+    estimator = MotionEstimator.from_api(api)
+    program = planner.print_report(program, "COM4", start_pose=start_pose, estimator=estimator)
+    # Per-point prediction; the first move is timed by the controller (GetPTPTime)
+    expected_ms = estimator.print_estimate(program, "COM4", start_pose, planner.default_mode, api=api)
+
+    # Queue, execute and wait until the last command is done
+    stream_commands(api, program.commands(planner.default_mode), expected_ms=expected_ms)
 
     # Print final pose
     pose = dType.GetPose(api)
@@ -37,8 +37,7 @@ if state == dType.DobotConnect.DobotConnect_NoError:
     dType.SetQueuedCmdStartExec(api)
 
     # Wait until the last move is done
-    while lastIndex > dType.GetQueuedCmdCurrentIndex(api)[0]:
-        dType.dSleep(100)
+    dType.WaitQueuedCmd(api, lastIndex)
 
     dType.SetQueuedCmdStopExec(api)
 
@@ -1,38 +1,34 @@
 import os
-import xml.etree.ElementTree as ET
 import DobotDllType as dType
+from WaypointProgram import load_program, default_cache, EFFECTOR_GRIPPER, CP_ACCELERATION
+from WaypointRunner import gripper_command, stream_commands
+from TrajectoryPlanner import TrajectoryPlanner, CP_VELOCITY
+
+# Gripper stabilization delay queued after every gripper change
+GRIPPER_SETTLE_MS = 300
+
+# Run stretches of plain moves as blended continuous-path (CP) segments that
+# keep speed through the waypoints; points with gripper changes or pauses
+# stay PTP moves
+BLEND_PATHS = False
+PLANNER = TrajectoryPlanner(blend=True)
 
 # === XML Playback Parser ===
 def load_playback_file(filename):
     script_dir = os.path.dirname(os.path.abspath(__file__))
     file_path = os.path.join(script_dir, filename)
 
-    tree = ET.parse(file_path)
-    root = tree.getroot()
-
-    points = []
-    for i in range(13):  # Adjust if you have more or fewer rows
-        row = root.find(f".//row{i}")
-        if row is None:
-            continue
-        try:
-            x = float(row.find("item_2").text)
-            y = float(row.find("item_3").text)
-            z = float(row.find("item_4").text)
-            r = float(row.find("item_5").text)
-            pause_time = float(row.find("item_10").text)
-            gripper_code = int(row.find("item_11").text)
-
-            gripper = "enable" if gripper_code == 2 else "disable"
-            points.append((x, y, z, r, pause_time, gripper))
-        except Exception as e:
-            print(f"Skipping row{i} due to error:", e)
-
-    return points
+    # Parsed programs are cached by file hash, so repeat runs skip the XML
+    if BLEND_PATHS:
+        program = load_program(file_path, plan=PLANNER, plan_settings=PLANNER.settings(), effector=EFFECTOR_GRIPPER)
+    else:
+        program = load_program(file_path, effector=EFFECTOR_GRIPPER)
+    print("Program cache:", default_cache.stats())
+    return program
 
 # === Main Dobot Control ===
-def run_dobot_sequence(playback_points):
-    if not playback_points:
+def run_dobot_sequence(program):
+    if not len(program):
         print("No valid playback points found. Aborting.")
         return
 
@@ -42,39 +38,19 @@ def run_dobot_sequence(playback_points):
 
     if state == dType.DobotConnect.DobotConnect_NoError:
         dType.SetQueuedCmdClear(api)
+        if BLEND_PATHS:
+            # Cruise junction speed; blended corners lower it with queued SetCPParams
+            dType.SetCPParams(api, CP_ACCELERATION, CP_VELOCITY, CP_ACCELERATION, isQueued=0)
 
-        # Start execution early for faster response
-        dType.SetQueuedCmdStartExec(api)
-
-        lastIndex = 0
-
-        for i, (x, y, z, r, pause_time, gripper) in enumerate(playback_points):
-            # Move to position
-            lastIndex = dType.SetPTPCmd(api,
-                                        dType.PTPMode.PTPMOVLXYZMode,
-                                        x, y, z, r,
-                                        isQueued=1)[0]
-
-            # Gripper control with stabilization delay
-            if gripper == "enable":
-                dType.SetEndEffectorGripper(api, 1, 1, isQueued=1)
-                dType.dSleep(300)  # Wait 300 ms for grip to stabilize
-            elif gripper == "disable":
-                dType.SetEndEffectorGripper(api, 1, 0, isQueued=1)
-                dType.dSleep(300)  # Wait 300 ms for release to complete
-
-            # Optional pause
-            if pause_time > 0:
-                dType.dSleep(int(pause_time * 1000))
-
-        # Final gripper release (fully disable to stop noise)
-        dType.SetEndEffectorGripper(api, 0, 0, isQueued=1)
+        def sequence_commands():
+            # Move, gripper enable/disable + stabilization wait, optional pause
+            yield from program.commands(tool_settle_ms=GRIPPER_SETTLE_MS)
 
-        # Wait until last command is done
-        while lastIndex > dType.GetQueuedCmdCurrentIndex(api)[0]:
-            dType.dSleep(100)
+            # Final gripper release (fully disable to stop noise)
+            yield gripper_command(0, enable=0)
 
-        dType.SetQueuedCmdStopExec(api)
+        # Execution starts after the first few commands for faster response
+        stream_commands(api, sequence_commands())
 
         # Final pose
         pose = dType.GetPose(api)
@@ -87,5 +63,5 @@ def run_dobot_sequence(playback_points):
 
 # === Run it ===
 if __name__ == "__main__":
-    playback_points = load_playback_file("project_1111.playback")
-    run_dobot_sequence(playback_points)
+    program = load_playback_file("project_1111.playback")
+    run_dobot_sequence(program)
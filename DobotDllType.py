@@ -1,5 +1,8 @@
 from ctypes import *
 import time,  platform
+import random
+from types import FunctionType
+import asyncio
 import os
 
 def enum(**enums):
@@ -56,9 +59,6 @@ class DeviceID(Structure):
         ("deviceID3", c_uint32)
     ]
 
-masterId = 0
-slaveId = 0
-
 class DeviceVersion(Structure):
     _pack_ = 1
     _fields_ = [
@@ -324,6 +324,16 @@ class PTPWithLCmd(Structure):
         ("l", c_float)
         ]
 
+#运动完成ratio%时将address输出level，随PTP指令一起下发
+#Output level on address once ratio % of the move is done, sent with a PTP command
+class ParallelOutputCmd(Structure):
+    _pack_ = 1
+    _fields_ = [
+        ("ratio", c_ubyte),
+        ("address", c_ushort),
+        ("level", c_ubyte)
+        ]
+
 ##################  Continuous path   ##################
 
 class CPParams(Structure):
@@ -584,15 +594,147 @@ isUsingLinearRail = False
 #parker add 2018 8 29 添加Wifi设置模块退出标志位
 QuitDobotApiFlag = True
 
-def load():
-    if platform.system() == "Windows":
+class DobotCommunicateError(Exception):
+    """Raised when a wrapper gives up retrying a DLL call."""
+
+    def __init__(self, function, result, attempts, elapsedMs):
+        self.function = function
+        self.result = result
+        self.attempts = attempts
+        self.elapsedMs = elapsedMs
+        Exception.__init__(self, "%s failed with result %d after %d attempts in %.0f ms" % (function, result, attempts, elapsedMs))
+
+
+class RetryPolicy(object):
+    """
+    Bounds the retry loop of every wrapper.
+
+    Timeout/InvalidDevice results are retried with exponential backoff and
+    jitter until maxAttempts or deadlineMs is reached. BufferFull only means
+    the command queue is busy, so it does not count as a failed attempt and
+    is bounded by bufferFullTimeoutMs instead, long enough for the queue to
+    drain one long move (HOME takes about 15 s); None waits as long as
+    needed. Both limits are measured from the start of the call.
+    InvalidParams is never retried.
+    """
+
+    def __init__(self, maxAttempts=20, deadlineMs=5000, baseDelayMs=2, maxDelayMs=200, jitter=0.5, bufferFullTimeoutMs=30000):
+        self.maxAttempts = maxAttempts
+        self.deadlineMs = deadlineMs
+        self.baseDelayMs = baseDelayMs
+        self.maxDelayMs = maxDelayMs
+        self.jitter = jitter
+        self.bufferFullTimeoutMs = bufferFullTimeoutMs
+
+    def delayMs(self, attempt):
+        delay = min(self.baseDelayMs * (2 ** min(attempt, 16)), self.maxDelayMs)
+        return delay * (1 - self.jitter * random.random())
+
+
+defaultRetryPolicy = RetryPolicy()
+
+
+class RetryState(object):
+    __slots__ = ("policy", "function", "attempts", "bufferFullWaits", "start")
+
+    def __init__(self, api, function):
+        self.policy = api.retryPolicy
+        self.function = function
+        self.attempts = 0
+        self.bufferFullWaits = 0
+        self.start = time.monotonic()
+
+    def reset(self):
+        #轮询循环中每次成功查询后重新计时
+        #Polling loops restart the limits after every successful poll
+        self.attempts = 0
+        self.bufferFullWaits = 0
+        self.start = time.monotonic()
+
+    def backoff(self, result):
+        now = time.monotonic()
+        elapsedMs = (now - self.start) * 1000
+        policy = self.policy
+        if result == DobotCommunicate.DobotCommunicate_BufferFull:
+            if policy.bufferFullTimeoutMs is not None and elapsedMs >= policy.bufferFullTimeoutMs:
+                raise DobotCommunicateError(self.function, result, self.attempts + self.bufferFullWaits + 1, elapsedMs)
+            delay = policy.delayMs(self.bufferFullWaits)
+            self.bufferFullWaits += 1
+        else:
+            self.attempts += 1
+            if result == DobotCommunicate.DobotCommunicate_InvalidParams or self.attempts >= policy.maxAttempts \
+                    or (policy.deadlineMs is not None and elapsedMs >= policy.deadlineMs):
+                raise DobotCommunicateError(self.function, result, self.attempts + self.bufferFullWaits, elapsedMs)
+            delay = policy.delayMs(self.attempts - 1)
+            if policy.deadlineMs is not None:
+                delay = min(delay, policy.deadlineMs - elapsedMs)
+        dSleep(delay)
+
+
+#DobotDll实例，整个进程只加载一次
+#The DLL is loaded once per process and shared by every DobotSession
+dobotDll = None
+
+def loadLibrary():
+    global dobotDll
+    if dobotDll is not None:
+        return dobotDll
+    #设置环境变量DOBOT_SIMULATOR=1时使用纯Python模拟器，无需DLL和机械臂
+    #DOBOT_SIMULATOR=1 selects the pure-Python simulator, no DLL or arm needed
+    if os.environ.get("DOBOT_SIMULATOR", "0") not in ("", "0"):
+        from DobotSim import SimulatedDll
+        dobotDll = SimulatedDll(speed=float(os.environ.get("DOBOT_SIMULATOR_SPEED", "1")))
+    elif platform.system() == "Windows":
         print("您用的dll是64位，为了顺利运行，请保证您的python环境也是64位")
         print("python环境是：",platform.architecture())
-        return CDLL("./DobotDll.dll",  RTLD_GLOBAL)
+        dobotDll = CDLL("./DobotDll.dll",  RTLD_GLOBAL)
     elif platform.system() == "Darwin":
-        return CDLL("./libDobotDll.dylib",  RTLD_GLOBAL)
+        dobotDll = CDLL("./libDobotDll.dylib",  RTLD_GLOBAL)
     elif platform.system() == "Linux":
-        return cdll.loadLibrary("libDobotDll.so")
+        dobotDll = CDLL("libDobotDll.so",  RTLD_GLOBAL)
+    return dobotDll
+
+
+class DobotSession(object):
+    """
+    One connection to one Dobot.
+
+    The session owns the ids and device types returned by ConnectDobot, so
+    several arms can stay connected in the same process. Every Set*/Get*
+    wrapper of this module accepts a session as its api argument and is
+    also available as a method, e.g. session.SetPTPCmd(mode, x, y, z, r, isQueued=1).
+    """
+
+    def __init__(self, dll):
+        self.dll = dll
+        self.portName = ""
+        self.masterId = 0
+        self.slaveId = 0
+        self.masterDevType = 0
+        self.slaveDevType = 0
+        self.retryPolicy = defaultRetryPolicy
+        # 高频指令复用的结构体，避免每次调用都重新分配
+        # Preallocated structs reused by the hot-path wrappers
+        self.ptpCmd = PTPCmd()
+        self.pose = Pose()
+        self.waitCmd = WAITCmd()
+        self.queuedCmdIndex = c_uint64(0)
+
+    def connect(self, portName, baudrate=115200):
+        return ConnectDobot(self, portName, baudrate)
+
+    def disconnect(self):
+        DisconnectDobot(self)
+
+    def setRetryPolicy(self, policy):
+        self.retryPolicy = policy
+
+    def __repr__(self):
+        return "DobotSession(portName=%r, masterId=%d, slaveId=%d)" % (self.portName, self.masterId, self.slaveId)
+
+
+def load():
+    return DobotSession(loadLibrary())
 
 
 def dSleep(ms):
@@ -603,12 +745,12 @@ def gettime():
 
 
 def SetDebugEnable(api, flag=False):
-    result = api.SetDebugEnable(flag)
+    result = api.dll.SetDebugEnable(flag)
 
 
 def SearchDobot(api,  maxLen=1000):
     szPara = create_string_buffer(1000) #((len(str(maxLen)) + 4) * maxLen + 10)
-    l = api.SearchDobot(szPara,  maxLen)
+    l = api.dll.SearchDobot(szPara,  maxLen)
     if l == 0:
         return []
     ret = szPara.value.decode("utf-8") 
@@ -625,102 +767,100 @@ def SearchDobot(api,  maxLen=1000):
         
     return list(fix(ret.split(" ")))
     
-masterId = 0
-slaveId = 0
-masterDevType = 0
-slaveDevType = 0
-
 
 def ConnectDobot(api, portName, baudrate):
-    global masterId, slaveId, masterDevType, slaveDevType
-
     szPara = create_string_buffer(100)
     szPara.raw = portName.encode("utf-8") 
     connectInfo = ConnectInfo()
 
-    result = api.ConnectDobot(szPara, baudrate, byref(connectInfo))
+    result = api.dll.ConnectDobot(szPara, baudrate, byref(connectInfo))
     if result != DobotConnect.DobotConnect_NoError:
         return [result, 0, 0, 0, 0, 0, 0, 0]
-    masterId = connectInfo.masterDevInfo.devId
-    masterDevType = connectInfo.masterDevInfo.type
+    api.portName = portName
+    api.masterId = connectInfo.masterDevInfo.devId
+    api.masterDevType = connectInfo.masterDevInfo.type
     try:
-        if masterDevType == DevType.Conntroller:
+        if api.masterDevType == DevType.Conntroller:
             if connectInfo.slaveDevInfo1.type == 0 and connectInfo.slaveDevInfo2.type == 0:
-                slaveId = -1
-                slaveDevType = 0
+                api.slaveId = -1
+                api.slaveDevType = 0
                 try:
                     fwName = str(connectInfo.masterDevInfo.firmwareName, encoding="utf-8").strip(b'\x00'.decode())
                     fwVer = str(connectInfo.masterDevInfo.firwareVersion, encoding="utf-8").strip(b'\x00'.decode())
-                    # print("masterId: ", masterId, connectInfo.slaveDevInfo1.devId, connectInfo.slaveDevInfo2.devId, fwName, fwVer)
+                    # print("masterId: ", api.masterId, connectInfo.slaveDevInfo1.devId, connectInfo.slaveDevInfo2.devId, fwName, fwVer)
                 except Exception as e:
                     print(e)
             else:
-                slaveId = connectInfo.slaveDevInfo1.devId if connectInfo.slaveDevInfo1.type != DevType.Idle else connectInfo.slaveDevInfo2.devId
+                api.slaveId = connectInfo.slaveDevInfo1.devId if connectInfo.slaveDevInfo1.type != DevType.Idle else connectInfo.slaveDevInfo2.devId
                 fwName = str(connectInfo.slaveDevInfo1.firmwareName, encoding="utf-8").strip(b'\x00'.decode()) if connectInfo.slaveDevInfo1.type != DevType.Idle else str(connectInfo.slaveDevInfo2.firmwareName, encoding="utf-8").strip(b'\x00'.decode())
                 fwVer = str(connectInfo.slaveDevInfo1.firwareVersion, encoding="utf-8").strip(b'\x00'.decode()) if connectInfo.slaveDevInfo1.type != DevType.Idle else str(connectInfo.slaveDevInfo2.firwareVersion, encoding="utf-8").strip(b'\x00'.decode())
-                slaveDevType = connectInfo.slaveDevInfo1.type if connectInfo.slaveDevInfo1.type != DevType.Idle else connectInfo.slaveDevInfo2.type
-                # slaveDevType = dType.DevType.MagicianLite  # for test
+                api.slaveDevType = connectInfo.slaveDevInfo1.type if connectInfo.slaveDevInfo1.type != DevType.Idle else connectInfo.slaveDevInfo2.type
+                # api.slaveDevType = dType.DevType.MagicianLite  # for test
         else:
-            slaveId = 0
-            slaveDevType = 0
+            api.slaveId = 0
+            api.slaveDevType = 0
             fwName = str(connectInfo.masterDevInfo.firmwareName, encoding="utf-8").strip(b'\x00'.decode())
             fwVer = str(connectInfo.masterDevInfo.firwareVersion, encoding="utf-8").strip(b'\x00'.decode())
 
     except Exception as e:
         print(e)
-    return [result, masterDevType, slaveDevType, fwName, fwVer, masterId, slaveId, connectInfo.masterDevInfo.runTime]
+    return [result, api.masterDevType, api.slaveDevType, fwName, fwVer, api.masterId, api.slaveId, connectInfo.masterDevInfo.runTime]
 
 
 def DisconnectDobot(api):
-    api.DisconnectDobot(c_int(masterId))
+    api.dll.DisconnectDobot(c_int(api.masterId))
 
 
 def GetMarlinVersion(api):
-    api.GetMarlinVersion(c_int(masterId), c_int(slaveId))
+    api.dll.GetMarlinVersion(c_int(api.masterId), c_int(api.slaveId))
 
 
 def PeriodicTask(api):
-    api.PeriodicTask()
+    api.dll.PeriodicTask()
 
 
 def SetCmdTimeout(api, times):
-    api.SetCmdTimeout(c_int(masterId), times)
+    api.dll.SetCmdTimeout(c_int(api.masterId), times)
 
 
 
 def DobotExec(api):
-    return [api.DobotExec()]
+    return [api.dll.DobotExec()]
 
 
 def GetQueuedCmdCurrentIndex(api):
     queuedCmdIndex = c_uint64(0)
     queuedCmdIndex1 = c_uint64(0)
-    if masterDevType == DevType.Conntroller and slaveDevType == DevType.MagicianLite:
+    if api.masterDevType == DevType.Conntroller and api.slaveDevType == DevType.MagicianLite:
         # if isUsingLinearRail:
+        retry = RetryState(api, "GetQueuedCmdCurrentIndex")
         while(True):
-            result = api.GetQueuedCmdCurrentIndex(c_int(masterId), c_int(-1), byref(queuedCmdIndex1))
+            result = api.dll.GetQueuedCmdCurrentIndex(c_int(api.masterId), c_int(-1), byref(queuedCmdIndex1))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(2)
+                retry.backoff(result)
                 continue
             break
+        retry = RetryState(api, "GetQueuedCmdCurrentIndex")
         while(True):
-            result = api.GetQueuedCmdCurrentIndex(c_int(masterId), c_int(slaveId), byref(queuedCmdIndex))
+            result = api.dll.GetQueuedCmdCurrentIndex(c_int(api.masterId), c_int(api.slaveId), byref(queuedCmdIndex))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(2)
+                retry.backoff(result)
                 continue
             break
-    elif masterDevType == DevType.Conntroller and slaveDevType == DevType.Idle: 
+    elif api.masterDevType == DevType.Conntroller and api.slaveDevType == DevType.Idle: 
+        retry = RetryState(api, "GetQueuedCmdCurrentIndex")
         while(True):
-            result = api.GetQueuedCmdCurrentIndex(c_int(masterId), c_int(-1), byref(queuedCmdIndex1))
+            result = api.dll.GetQueuedCmdCurrentIndex(c_int(api.masterId), c_int(-1), byref(queuedCmdIndex1))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(2)
+                retry.backoff(result)
                 continue
             break
     else:
+        retry = RetryState(api, "GetQueuedCmdCurrentIndex")
         while(True):
-            result = api.GetQueuedCmdCurrentIndex(c_int(masterId), c_int(slaveId), byref(queuedCmdIndex))
+            result = api.dll.GetQueuedCmdCurrentIndex(c_int(api.masterId), c_int(api.slaveId), byref(queuedCmdIndex))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(2)
+                retry.backoff(result)
                 continue
             break
     return [queuedCmdIndex.value, queuedCmdIndex1.value]
@@ -728,10 +868,11 @@ def GetQueuedCmdCurrentIndex(api):
 
 def GetQueuedCmdMotionFinish(api):
     isFinish = c_bool(False)
+    retry = RetryState(api, "GetQueuedCmdMotionFinish")
     while(True):
-        result = api.GetQueuedCmdMotionFinish(c_int(masterId), c_int(slaveId),byref(isFinish))
+        result = api.dll.GetQueuedCmdMotionFinish(c_int(api.masterId), c_int(api.slaveId),byref(isFinish))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(2)
+            retry.backoff(result)
             continue
         break
 
@@ -741,40 +882,90 @@ def GetQueuedCmdMotionFinish(api):
         return [False]
 
 
+#等待指定的队列指令执行完成
+#Completion waiter: polls fast near the expected finish time (or when the
+#target index is next in line) and slowly otherwise.
+def _waitPollDelay(elapsedMs, expectedMs, remaining, fastPollMs, slowPollMs):
+    if expectedMs is not None:
+        if expectedMs - elapsedMs > 2 * slowPollMs:
+            return slowPollMs
+        return fastPollMs
+    return fastPollMs if remaining <= 1 else slowPollMs
+
+
+def WaitQueuedCmd(api, index, expectedMs=None, timeoutMs=None, fastPollMs=10, slowPollMs=100):
+    start = time.monotonic()
+    while(True):
+        currentIndex = GetQueuedCmdCurrentIndex(api)[0]
+        if currentIndex >= index:
+            return [currentIndex]
+        elapsedMs = (time.monotonic() - start) * 1000
+        if timeoutMs is not None and elapsedMs >= timeoutMs:
+            raise TimeoutError("queued command %d not finished after %d ms (current %d)" % (index, timeoutMs, currentIndex))
+        delay = _waitPollDelay(elapsedMs, expectedMs, index - currentIndex, fastPollMs, slowPollMs)
+        if timeoutMs is not None:
+            delay = min(delay, timeoutMs - elapsedMs)
+        dSleep(max(delay, 0))
+
+
+async def AwaitQueuedCmd(api, index, expectedMs=None, timeoutMs=None, fastPollMs=10, slowPollMs=100, executor=None):
+    #协程版本：查询在executor线程中执行，两次查询之间用asyncio.sleep，不阻塞事件循环
+    #Coroutine version: each poll (and its retry backoff) runs on executor
+    #(the loop's default one if None) and the loop sleeps with asyncio between polls
+    loop = asyncio.get_running_loop()
+    start = time.monotonic()
+    while(True):
+        currentIndex = (await loop.run_in_executor(executor, GetQueuedCmdCurrentIndex, api))[0]
+        if currentIndex >= index:
+            return [currentIndex]
+        elapsedMs = (time.monotonic() - start) * 1000
+        if timeoutMs is not None and elapsedMs >= timeoutMs:
+            raise TimeoutError("queued command %d not finished after %d ms (current %d)" % (index, timeoutMs, currentIndex))
+        delay = _waitPollDelay(elapsedMs, expectedMs, index - currentIndex, fastPollMs, slowPollMs)
+        if timeoutMs is not None:
+            delay = min(delay, timeoutMs - elapsedMs)
+        await asyncio.sleep(max(delay, 0) / 1000)
+
+
 def SetQueuedCmdStartExec(api):
     # 特殊处理
-    if slaveDevType == DevType.Magician:
+    if api.slaveDevType == DevType.Magician:
+        retry = RetryState(api, "SetQueuedCmdStartExec")
         while (True):
-            result = api.SetQueuedCmdStartExec(c_int(masterId), c_int(slaveId))
+            result = api.dll.SetQueuedCmdStartExec(c_int(api.masterId), c_int(api.slaveId))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(5)
+                retry.backoff(result)
                 continue
             break
-    elif masterDevType == DevType.Conntroller and slaveDevType == DevType.MagicianLite:
+    elif api.masterDevType == DevType.Conntroller and api.slaveDevType == DevType.MagicianLite:
+        retry = RetryState(api, "SetQueuedCmdStartExec")
         while (True):
-            result = api.SetQueuedCmdStartExec(c_int(masterId), c_int(-1))
+            result = api.dll.SetQueuedCmdStartExec(c_int(api.masterId), c_int(-1))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(5)
+                retry.backoff(result)
                 continue
             break
+        retry = RetryState(api, "SetQueuedCmdStartExec")
         while (True):
-            result = api.SetQueuedCmdStartExec(c_int(masterId), c_int(slaveId))
+            result = api.dll.SetQueuedCmdStartExec(c_int(api.masterId), c_int(api.slaveId))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(5)
+                retry.backoff(result)
                 continue
             break
-    elif masterDevType == DevType.Conntroller and slaveDevType == DevType.Idle:
+    elif api.masterDevType == DevType.Conntroller and api.slaveDevType == DevType.Idle:
+        retry = RetryState(api, "SetQueuedCmdStartExec")
         while(True):
-            result = api.SetQueuedCmdStartExec(c_int(masterId), c_int(-1))
+            result = api.dll.SetQueuedCmdStartExec(c_int(api.masterId), c_int(-1))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(5)
+                retry.backoff(result)
                 continue
             break
     else:
+        retry = RetryState(api, "SetQueuedCmdStartExec")
         while (True):
-            result = api.SetQueuedCmdStartExec(c_int(masterId), c_int(slaveId))
+            result = api.dll.SetQueuedCmdStartExec(c_int(api.masterId), c_int(api.slaveId))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(5)
+                retry.backoff(result)
                 continue
             break
 
@@ -782,38 +973,43 @@ def SetQueuedCmdStartExec(api):
 
 def SetQueuedCmdStopExec(api):
     # 滑轨特殊处理
-    if slaveDevType == DevType.Magician:
+    if api.slaveDevType == DevType.Magician:
+        retry = RetryState(api, "SetQueuedCmdStopExec")
         while (True):
-            result = api.SetQueuedCmdStopExec(c_int(masterId), c_int(slaveId))
+            result = api.dll.SetQueuedCmdStopExec(c_int(api.masterId), c_int(api.slaveId))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(5)
+                retry.backoff(result)
                 continue
             break
-    elif masterDevType == DevType.Conntroller and slaveDevType == DevType.MagicianLite:
+    elif api.masterDevType == DevType.Conntroller and api.slaveDevType == DevType.MagicianLite:
+        retry = RetryState(api, "SetQueuedCmdStopExec")
         while (True):
-            result = api.SetQueuedCmdStopExec(c_int(masterId), c_int(-1))
+            result = api.dll.SetQueuedCmdStopExec(c_int(api.masterId), c_int(-1))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(5)
+                retry.backoff(result)
                 continue
             break
+        retry = RetryState(api, "SetQueuedCmdStopExec")
         while (True):
-            result = api.SetQueuedCmdStopExec(c_int(masterId), c_int(slaveId))
+            result = api.dll.SetQueuedCmdStopExec(c_int(api.masterId), c_int(api.slaveId))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(5)
+                retry.backoff(result)
                 continue
             break
-    elif masterDevType == DevType.Conntroller and slaveDevType == DevType.Idle:
+    elif api.masterDevType == DevType.Conntroller and api.slaveDevType == DevType.Idle:
+        retry = RetryState(api, "SetQueuedCmdStartExec")
         while(True):
-            result = api.SetQueuedCmdStartExec(c_int(masterId), c_int(-1))
+            result = api.dll.SetQueuedCmdStartExec(c_int(api.masterId), c_int(-1))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(5)
+                retry.backoff(result)
                 continue
             break
     else:
+        retry = RetryState(api, "SetQueuedCmdStopExec")
         while (True):
-            result = api.SetQueuedCmdStopExec(c_int(masterId), c_int(slaveId))
+            result = api.dll.SetQueuedCmdStopExec(c_int(api.masterId), c_int(api.slaveId))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(5)
+                retry.backoff(result)
                 continue
             break
 
@@ -821,96 +1017,108 @@ def SetQueuedCmdStopExec(api):
  
 def SetQueuedCmdForceStopExec(api):
     # 滑轨特殊处理
-    if slaveDevType == DevType.Magician:
+    if api.slaveDevType == DevType.Magician:
+        retry = RetryState(api, "SetQueuedCmdForceStopExec")
         while (True):
-            result = api.SetQueuedCmdForceStopExec(c_int(masterId), c_int(slaveId))
+            result = api.dll.SetQueuedCmdForceStopExec(c_int(api.masterId), c_int(api.slaveId))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(5)
+                retry.backoff(result)
                 continue
             break
-    elif masterDevType == DevType.Conntroller and slaveDevType == DevType.MagicianLite:
+    elif api.masterDevType == DevType.Conntroller and api.slaveDevType == DevType.MagicianLite:
+        retry = RetryState(api, "SetQueuedCmdForceStopExec")
         while (True):
-            result = api.SetQueuedCmdForceStopExec(c_int(masterId), c_int(-1))
+            result = api.dll.SetQueuedCmdForceStopExec(c_int(api.masterId), c_int(-1))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(5)
+                retry.backoff(result)
                 continue
             break
+        retry = RetryState(api, "SetQueuedCmdForceStopExec")
         while (True):
-            result = api.SetQueuedCmdForceStopExec(c_int(masterId), c_int(slaveId))
+            result = api.dll.SetQueuedCmdForceStopExec(c_int(api.masterId), c_int(api.slaveId))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(5)
+                retry.backoff(result)
                 continue
             break
-    elif masterDevType == DevType.Conntroller and slaveDevType == DevType.Idle:
+    elif api.masterDevType == DevType.Conntroller and api.slaveDevType == DevType.Idle:
+        retry = RetryState(api, "SetQueuedCmdForceStopExec")
         while(True):
-            result = api.SetQueuedCmdForceStopExec(c_int(masterId), c_int(-1))
+            result = api.dll.SetQueuedCmdForceStopExec(c_int(api.masterId), c_int(-1))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(5)
+                retry.backoff(result)
                 continue
             break
     else:
+        retry = RetryState(api, "SetQueuedCmdForceStopExec")
         while (True):
-            result = api.SetQueuedCmdForceStopExec(c_int(masterId), c_int(slaveId))
+            result = api.dll.SetQueuedCmdForceStopExec(c_int(api.masterId), c_int(api.slaveId))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(5)
+                retry.backoff(result)
                 continue
             break
 
     
 
 def SetQueuedCmdStartDownload(api,  totalLoop, linePerLoop):
+    retry = RetryState(api, "SetQueuedCmdStartDownload")
     while(True):
-        result = api.SetQueuedCmdStartDownload(c_int(masterId), c_int(slaveId), totalLoop, linePerLoop)
+        result = api.dll.SetQueuedCmdStartDownload(c_int(api.masterId), c_int(api.slaveId), totalLoop, linePerLoop)
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
         
 
 def SetQueuedCmdStopDownload(api):
+    retry = RetryState(api, "SetQueuedCmdStopDownload")
     while(True):
-        result = api.SetQueuedCmdStopDownload(c_int(masterId), c_int(slaveId))
+        result = api.dll.SetQueuedCmdStopDownload(c_int(api.masterId), c_int(api.slaveId))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     
 
 def SetQueuedCmdClear(api):
     # 滑轨特殊处理
-    # return [api.SetQueuedCmdClear(c_int(masterId), c_int(slaveId))]
-    if slaveDevType == DevType.Magician:
+    # return [api.dll.SetQueuedCmdClear(c_int(api.masterId), c_int(api.slaveId))]
+    if api.slaveDevType == DevType.Magician:
+        retry = RetryState(api, "SetQueuedCmdClear")
         while(True):
-            result = api.SetQueuedCmdClear(c_int(masterId), c_int(slaveId))
+            result = api.dll.SetQueuedCmdClear(c_int(api.masterId), c_int(api.slaveId))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(5)
+                retry.backoff(result)
                 continue
             break
-    elif masterDevType == DevType.Conntroller and slaveDevType == DevType.MagicianLite:
+    elif api.masterDevType == DevType.Conntroller and api.slaveDevType == DevType.MagicianLite:
+        retry = RetryState(api, "SetQueuedCmdClear")
         while (True):
-            result = api.SetQueuedCmdClear(c_int(masterId), c_int(-1))
+            result = api.dll.SetQueuedCmdClear(c_int(api.masterId), c_int(-1))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(5)
+                retry.backoff(result)
                 continue
             break
+        retry = RetryState(api, "SetQueuedCmdClear")
         while (True):
-            result = api.SetQueuedCmdClear(c_int(masterId), c_int(slaveId))
+            result = api.dll.SetQueuedCmdClear(c_int(api.masterId), c_int(api.slaveId))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(5)
+                retry.backoff(result)
                 continue
             break
-    elif masterDevType == DevType.Conntroller and slaveDevType == DevType.Idle:
+    elif api.masterDevType == DevType.Conntroller and api.slaveDevType == DevType.Idle:
+        retry = RetryState(api, "SetQueuedCmdClear")
         while(True):
-            result = api.SetQueuedCmdClear(c_int(masterId), c_int(-1))
+            result = api.dll.SetQueuedCmdClear(c_int(api.masterId), c_int(-1))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(5)
+                retry.backoff(result)
                 continue
             break
     else:
+        retry = RetryState(api, "SetQueuedCmdClear")
         while (True):
-            result = api.SetQueuedCmdClear(c_int(masterId), c_int(slaveId))
+            result = api.dll.SetQueuedCmdClear(c_int(api.masterId), c_int(api.slaveId))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(5)
+                retry.backoff(result)
                 continue
             break
     return [result]
@@ -919,20 +1127,22 @@ def SetQueuedCmdClear(api):
 def SetDeviceSN(api, str): 
     szPara = create_string_buffer(25)
     szPara.raw = str.encode("utf-8")
+    retry = RetryState(api, "SetDeviceSN")
     while(True):
-        result = api.SetDeviceSN(c_int(masterId), c_int(slaveId), szPara)
+        result = api.dll.SetDeviceSN(c_int(api.masterId), c_int(api.slaveId), szPara)
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
 
 
 def GetDeviceSN(api): 
     szPara = create_string_buffer(25)
+    retry = RetryState(api, "GetDeviceSN")
     while(True):
-        result = api.GetDeviceSN(c_int(masterId), c_int(slaveId), szPara,  25)
+        result = api.dll.GetDeviceSN(c_int(api.masterId), c_int(api.slaveId), szPara,  25)
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     ret = szPara.value.decode("utf-8") 
@@ -942,30 +1152,33 @@ def GetDeviceSN(api):
 def SetDeviceName(api, str):
     szPara = create_string_buffer(len(str) * 4)
     szPara.raw = str.encode("utf-8")
+    retry = RetryState(api, "SetDeviceName")
     while(True):
-        result = api.SetDeviceName(c_int(masterId), c_int(slaveId), szPara)
+        result = api.dll.SetDeviceName(c_int(api.masterId), c_int(api.slaveId), szPara)
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
         
 
 def SetDeviceNumName(api, num): 
     cNum = c_int(num)
+    retry = RetryState(api, "SetDeviceName")
     while(True):
-        result = api.SetDeviceName(c_int(masterId), c_int(slaveId), cNum)
+        result = api.dll.SetDeviceName(c_int(api.masterId), c_int(api.slaveId), cNum)
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
 
 
 def GetDeviceName(api): 
     szPara = create_string_buffer(66)
+    retry = RetryState(api, "GetDeviceName")
     while(True):
-        result = api.GetDeviceName(c_int(masterId), c_int(slaveId), szPara,  100)
+        result = api.dll.GetDeviceName(c_int(api.masterId), c_int(api.slaveId), szPara,  100)
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     ret = szPara.value.decode("utf-8")
@@ -974,30 +1187,33 @@ def GetDeviceName(api):
 
 def GetDeviceVersion(api):
     deviceVersion = DeviceVersion()
-    if (masterDevType == DevType.Conntroller and (slaveDevType == DevType.MagicianLite or slaveDevType == DevType.Idle)):
+    if (api.masterDevType == DevType.Conntroller and (api.slaveDevType == DevType.MagicianLite or api.slaveDevType == DevType.Idle)):
+        retry = RetryState(api, "GetDeviceVersion")
         while(True):
-            result = api.GetDeviceVersion(c_int(masterId), c_int(-1), byref(deviceVersion))
+            result = api.dll.GetDeviceVersion(c_int(api.masterId), c_int(-1), byref(deviceVersion))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(5)
+                retry.backoff(result)
                 continue
             break
         return [deviceVersion.fw_majorVersion, deviceVersion.fw_minorVersion, deviceVersion.fw_revision, deviceVersion.fw_alphaVersion,
             deviceVersion.hw_majorVersion, deviceVersion.hw_minorVersion, deviceVersion.hw_revision, deviceVersion.hw_alphaVersion]
-    elif masterDevType == DevType.MagicianLite:
+    elif api.masterDevType == DevType.MagicianLite:
+        retry = RetryState(api, "GetDeviceVersion")
         while(True):
-            result = api.GetDeviceVersion(c_int(masterId), c_int(slaveId), byref(deviceVersion))
+            result = api.dll.GetDeviceVersion(c_int(api.masterId), c_int(api.slaveId), byref(deviceVersion))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(5)
+                retry.backoff(result)
                 continue
             break
         return [deviceVersion.fw_majorVersion, deviceVersion.fw_minorVersion, deviceVersion.fw_revision, deviceVersion.fw_alphaVersion,
             deviceVersion.hw_majorVersion, deviceVersion.hw_minorVersion, deviceVersion.hw_revision, deviceVersion.hw_alphaVersion]
 
-    elif masterDevType == DevType.Magician:
+    elif api.masterDevType == DevType.Magician:
+        retry = RetryState(api, "GetDeviceVersion")
         while(True):
-            result = api.GetDeviceVersion(c_int(masterId), c_int(slaveId), byref(deviceVersion))
+            result = api.dll.GetDeviceVersion(c_int(api.masterId), c_int(api.slaveId), byref(deviceVersion))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(5)
+                retry.backoff(result)
                 continue
             break
         return [deviceVersion.fw_majorVersion, deviceVersion.fw_minorVersion, deviceVersion.fw_revision, deviceVersion.fw_alphaVersion]
@@ -1005,19 +1221,20 @@ def GetDeviceVersion(api):
 
 def SetDeviceWithL(api, isWithL, version=0, isQueued=0):
     # 滑轨的特殊处理
-    if slaveDevType == DevType.Magician:
-        tempSlaveId = slaveId
-    elif masterDevType == DevType.Conntroller and (slaveDevType == DevType.MagicianLite or slaveDevType == DevType.Idle):
+    if api.slaveDevType == DevType.Magician:
+        tempSlaveId = api.slaveId
+    elif api.masterDevType == DevType.Conntroller and (api.slaveDevType == DevType.MagicianLite or api.slaveDevType == DevType.Idle):
         tempSlaveId = -1
     else:
-        tempSlaveId = slaveId
+        tempSlaveId = api.slaveId
 
     queuedCmdIndex = c_uint64(0)
+    retry = RetryState(api, "SetDeviceWithL")
     while(True):
         print(tempSlaveId)
-        result = api.SetDeviceWithL(c_int(masterId), c_int(tempSlaveId), c_bool(isWithL), c_uint8(version), c_bool(isQueued), byref(queuedCmdIndex))
+        result = api.dll.SetDeviceWithL(c_int(api.masterId), c_int(tempSlaveId), c_bool(isWithL), c_uint8(version), c_bool(isQueued), byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -1025,18 +1242,19 @@ def SetDeviceWithL(api, isWithL, version=0, isQueued=0):
 
 def GetDeviceWithL(api):
     # 滑轨的特殊处理
-    if slaveDevType == DevType.Magician:
-        tempSlaveId = slaveId
-    elif masterDevType == DevType.Conntroller and (slaveDevType == DevType.MagicianLite or slaveDevType == DevType.Idle):
+    if api.slaveDevType == DevType.Magician:
+        tempSlaveId = api.slaveId
+    elif api.masterDevType == DevType.Conntroller and (api.slaveDevType == DevType.MagicianLite or api.slaveDevType == DevType.Idle):
         tempSlaveId = -1
     else:
-        tempSlaveId = slaveId
+        tempSlaveId = api.slaveId
 
     isWithL = c_bool(False)
+    retry = RetryState(api, "GetDeviceWithL")
     while(True):
-        result = api.GetDeviceWithL(c_int(masterId), c_int(tempSlaveId), byref(isWithL))
+        result = api.dll.GetDeviceWithL(c_int(api.masterId), c_int(tempSlaveId), byref(isWithL))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [isWithL.value]
@@ -1044,10 +1262,11 @@ def GetDeviceWithL(api):
 
 def GetDeviceTime(api):
     time = c_uint32(0)
+    retry = RetryState(api, "GetDeviceTime")
     while(True):
-        result = api.GetDeviceTime(c_int(masterId), c_int(slaveId), byref(time))
+        result = api.dll.GetDeviceTime(c_int(api.masterId), c_int(api.slaveId), byref(time))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [time.value]
@@ -1058,7 +1277,7 @@ def GetDeviceID(api):
     CommunicateCount = 0
     timeout = False
     while(True):
-        result = api.GetDeviceID(c_int(masterId), c_int(-1), byref(deviceID))
+        result = api.dll.GetDeviceID(c_int(api.masterId), c_int(-1), byref(deviceID))
         if result != DobotCommunicate.DobotCommunicate_NoError:
             if CommunicateCount > 3:
                 timeout = True
@@ -1077,10 +1296,11 @@ def GetDeviceID(api):
 
 def GetDeviceInfo(api):
     info = DeviceCountInfo()
+    retry = RetryState(api, "GetDeviceInfo")
     while(True):
-        result = api.GetDeviceInfo(c_int(masterId), c_int(slaveId), byref(info))
+        result = api.dll.GetDeviceInfo(c_int(api.masterId), c_int(api.slaveId), byref(info))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [info.deviceRunTime, info.devicePowerOn, info.devicePowerOff]
@@ -1089,20 +1309,22 @@ def GetDeviceInfo(api):
 def ResetPose(api, manual, rearArmAngle, frontArmAngle):
     c_rearArmAngle = c_float(rearArmAngle)
     c_frontArmAngle = c_float(frontArmAngle)
+    retry = RetryState(api, "ResetPose")
     while(True):
-        result = api.ResetPose(c_int(masterId), c_int(slaveId), manual, c_rearArmAngle, c_frontArmAngle)
+        result = api.dll.ResetPose(c_int(api.masterId), c_int(api.slaveId), manual, c_rearArmAngle, c_frontArmAngle)
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
 
 
 def GetPose(api):
-    pose = Pose()
+    pose = api.pose
+    retry = RetryState(api, "GetPose")
     while(True):
-        result = api.GetPose(c_int(masterId), c_int(slaveId), byref(pose))
+        result = api.dll.GetPose(c_int(api.masterId), c_int(api.slaveId), byref(pose))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [pose.x, pose.y, pose.z,pose.rHead, pose.joint1Angle, pose.joint2Angle, pose.joint3Angle, pose.joint4Angle]
@@ -1110,18 +1332,19 @@ def GetPose(api):
 
 def GetPoseL(api):
     # 滑轨的特殊处理
-    if slaveDevType == DevType.Magician:
-        tempSlaveId = slaveId
-    elif masterDevType == DevType.Conntroller and (slaveDevType == DevType.MagicianLite or slaveDevType == DevType.Idle):
+    if api.slaveDevType == DevType.Magician:
+        tempSlaveId = api.slaveId
+    elif api.masterDevType == DevType.Conntroller and (api.slaveDevType == DevType.MagicianLite or api.slaveDevType == DevType.Idle):
         tempSlaveId = -1
     else:
-        tempSlaveId = slaveId
+        tempSlaveId = api.slaveId
 
     l = c_float(0)
+    retry = RetryState(api, "GetPoseL")
     while(True):
-        result = api.GetPoseL(c_int(masterId), c_int(tempSlaveId), byref(l))
+        result = api.dll.GetPoseL(c_int(api.masterId), c_int(tempSlaveId), byref(l))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     #parker add 20190524  判断返回的值是否为空
@@ -1133,10 +1356,11 @@ def GetPoseL(api):
 
 def GetKinematics(api):
     kinematics = Kinematics()
+    retry = RetryState(api, "GetKinematics")
     while(True):
-        result = api.GetKinematics(c_int(masterId), c_int(slaveId), byref(kinematics))
+        result = api.dll.GetKinematics(c_int(api.masterId), c_int(api.slaveId), byref(kinematics))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [kinematics.velocity, kinematics.acceleration]
@@ -1146,35 +1370,58 @@ def GetAlarmsState(api,  maxLen=1000):
     alarmsState = create_string_buffer(maxLen) 
     #alarmsState = c_byte(0)
     len = c_int(0)
+    retry = RetryState(api, "GetAlarmsState")
     while(True):
-        result = api.GetAlarmsState(c_int(masterId), c_int(slaveId), alarmsState, byref(len),  maxLen)
+        result = api.dll.GetAlarmsState(c_int(api.masterId), c_int(api.slaveId), alarmsState, byref(len),  maxLen)
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [alarmsState.raw, len.value]
     
 
 def ClearAllAlarmsState(api):
+    retry = RetryState(api, "ClearAllAlarmsState")
     while(True):
-        result = api.ClearAllAlarmsState(c_int(masterId), c_int(slaveId))
+        result = api.dll.ClearAllAlarmsState(c_int(api.masterId), c_int(api.slaveId))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
 
 
 def GetUserParams(api):
     param = UserParams()
+    retry = RetryState(api, "GetUserParams")
     while(True):
-        result = api.GetUserParams(c_int(masterId), c_int(slaveId), byref(param))
+        result = api.dll.GetUserParams(c_int(api.masterId), c_int(api.slaveId), byref(param))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [param.params1,param.params2,param.params3,param.params4,param.params5,param.params6,param.params7,param.params8]
 
 
+#控制器按当前PTP参数计算从当前位置运动到目标点所需时间（毫秒），不执行运动
+#Time in ms the controller plans for a PTP move from the current pose, without moving
+def GetPTPTime(api, ptpMode, x, y, z, rHead):
+    cmd = PTPCmd()
+    cmd.ptpMode = ptpMode
+    cmd.x = x
+    cmd.y = y
+    cmd.z = z
+    cmd.rHead = rHead
+    ptpTime = c_uint32(0)
+    retry = RetryState(api, "GetPTPTime")
+    while(True):
+        result = api.dll.GetPTPTime(c_int(api.masterId), c_int(api.slaveId), byref(cmd), byref(ptpTime))
+        if result != DobotCommunicate.DobotCommunicate_NoError:
+            retry.backoff(result)
+            continue
+        break
+    return [ptpTime.value]
+
+
 def SetHOMEParams(api,  x,  y,  z,  r,  isQueued=0):
     param = HOMEParams()
     param.x = x
@@ -1182,10 +1429,11 @@ def SetHOMEParams(api,  x,  y,  z,  r,  isQueued=0):
     param.z = z
     param.r = r
     queuedCmdIndex = c_uint64(0)
+    retry = RetryState(api, "SetHOMEParams")
     while(True):
-        result = api.SetHOMEParams(c_int(masterId), c_int(slaveId), byref(param),  isQueued, byref(queuedCmdIndex))
+        result = api.dll.SetHOMEParams(c_int(api.masterId), c_int(api.slaveId), byref(param),  isQueued, byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -1193,10 +1441,11 @@ def SetHOMEParams(api,  x,  y,  z,  r,  isQueued=0):
 
 def GetHOMEParams(api):
     param = HOMEParams()
+    retry = RetryState(api, "GetHOMEParams")
     while(True):
-        result = api.GetHOMEParams(c_int(masterId), c_int(slaveId), byref(param))
+        result = api.dll.GetHOMEParams(c_int(api.masterId), c_int(api.slaveId), byref(param))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [param.x, param.y, param.z, param.r]
@@ -1208,44 +1457,49 @@ def SetHOMECmd(api, temp, isQueued=0):
     queuedCmdIndex = c_uint64(0)
     queuedCmdIndex1 = c_uint64(0)
     # 滑轨的特殊处理
-    if masterDevType == DevType.Magician:
+    if api.masterDevType == DevType.Magician:
         # 只有Magician
+        retry = RetryState(api, "SetHOMECmd")
         while(True):
-            result = api.SetHOMECmd(c_int(masterId), c_int(slaveId), byref(cmd), isQueued, byref(queuedCmdIndex))
+            result = api.dll.SetHOMECmd(c_int(api.masterId), c_int(api.slaveId), byref(cmd), isQueued, byref(queuedCmdIndex))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(5)
+                retry.backoff(result)
                 continue
             break
-    elif masterDevType == DevType.Conntroller and slaveDevType == DevType.MagicianLite:
+    elif api.masterDevType == DevType.Conntroller and api.slaveDevType == DevType.MagicianLite:
         # 外部控制器加MagicianLite
         # if isUsingLinearRail:#如果使用了滑轨，发给控制盒
+        retry = RetryState(api, "SetHOMECmd")
         while(True):
-            result = api.SetHOMECmd(c_int(masterId), c_int(-1), byref(cmd), isQueued, byref(queuedCmdIndex1))
+            result = api.dll.SetHOMECmd(c_int(api.masterId), c_int(-1), byref(cmd), isQueued, byref(queuedCmdIndex1))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(5)
+                retry.backoff(result)
                 continue
             break
+        retry = RetryState(api, "SetHOMECmd")
         while(True):
-            result = api.SetHOMECmd(c_int(masterId), c_int(slaveId), byref(cmd), isQueued, byref(queuedCmdIndex))
+            result = api.dll.SetHOMECmd(c_int(api.masterId), c_int(api.slaveId), byref(cmd), isQueued, byref(queuedCmdIndex))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(5)
+                retry.backoff(result)
                 continue
             break
-    elif masterDevType == DevType.Conntroller and slaveDevType == DevType.Idle:
+    elif api.masterDevType == DevType.Conntroller and api.slaveDevType == DevType.Idle:
         # 外部控制器
         # if isUsingLinearRail:
+        retry = RetryState(api, "SetHOMECmd")
         while(True):
-            result = api.SetHOMECmd(c_int(masterId), c_int(-1), byref(cmd), isQueued, byref(queuedCmdIndex1))
+            result = api.dll.SetHOMECmd(c_int(api.masterId), c_int(-1), byref(cmd), isQueued, byref(queuedCmdIndex1))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(5)
+                retry.backoff(result)
                 continue
             break
     else:
         # 其他情况
+        retry = RetryState(api, "SetHOMECmd")
         while(True):
-            result = api.SetHOMECmd(c_int(masterId), c_int(slaveDevType), byref(cmd), isQueued, byref(queuedCmdIndex))
+            result = api.dll.SetHOMECmd(c_int(api.masterId), c_int(api.slaveDevType), byref(cmd), isQueued, byref(queuedCmdIndex))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(5)
+                retry.backoff(result)
                 continue
             break
 
@@ -1257,10 +1511,11 @@ def SetAutoLevelingCmd(api, controlFlag, precision, isQueued=0):
     cmd.controlFlag = controlFlag
     cmd.precision = precision
     queuedCmdIndex = c_uint64(0)
+    retry = RetryState(api, "SetAutoLevelingCmd")
     while(True):
-        result = api.SetAutoLevelingCmd(c_int(masterId), c_int(slaveId), byref(cmd), isQueued, byref(queuedCmdIndex))
+        result = api.dll.SetAutoLevelingCmd(c_int(api.masterId), c_int(api.slaveId), byref(cmd), isQueued, byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -1268,10 +1523,11 @@ def SetAutoLevelingCmd(api, controlFlag, precision, isQueued=0):
 
 def GetAutoLevelingResult(api):
     precision = c_float(0)
+    retry = RetryState(api, "GetAutoLevelingResult")
     while(True):
-        result = api.GetAutoLevelingResult(c_int(masterId), c_int(slaveId), byref(precision))
+        result = api.dll.GetAutoLevelingResult(c_int(api.masterId), c_int(api.slaveId), byref(precision))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [precision.value]
@@ -1279,10 +1535,11 @@ def GetAutoLevelingResult(api):
 
 def SetArmOrientation(api,  armOrientation, isQueued=0):
     queuedCmdIndex = c_uint64(0)
+    retry = RetryState(api, "SetArmOrientation")
     while(True):
-        result = api.SetArmOrientation(c_int(masterId), c_int(slaveId), armOrientation, isQueued, byref(queuedCmdIndex))
+        result = api.dll.SetArmOrientation(c_int(api.masterId), c_int(api.slaveId), armOrientation, isQueued, byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -1290,50 +1547,55 @@ def SetArmOrientation(api,  armOrientation, isQueued=0):
 
 def GetArmOrientation(api):
     armOrientation = c_int32(0)
+    retry = RetryState(api, "GetArmOrientation")
     while(True):
-        result = api.GetArmOrientation(c_int(masterId), c_int(slaveId), byref(armOrientation))
+        result = api.dll.GetArmOrientation(c_int(api.masterId), c_int(api.slaveId), byref(armOrientation))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [armOrientation.value]
     
 
 def SetHHTTrigMode(api, hhtTrigMode):
+    retry = RetryState(api, "SetHHTTrigMode")
     while(True):
-        result = api.SetHHTTrigMode(c_int(masterId), c_int(slaveId), hhtTrigMode)
+        result = api.dll.SetHHTTrigMode(c_int(api.masterId), c_int(api.slaveId), hhtTrigMode)
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
         
 
 def GetHHTTrigMode(api):
     hhtTrigMode = c_int(0)
+    retry = RetryState(api, "GetHHTTrigMode")
     while(True):
-        result = api.GetHHTTrigMode(c_int(masterId), c_int(slaveId), byref(hhtTrigMode))
+        result = api.dll.GetHHTTrigMode(c_int(api.masterId), c_int(api.slaveId), byref(hhtTrigMode))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [hhtTrigMode.value]
 
 
 def SetHHTTrigOutputEnabled(api, isEnabled):
+    retry = RetryState(api, "SetHHTTrigOutputEnabled")
     while(True):
-        result = api.SetHHTTrigOutputEnabled(c_int(masterId), c_int(slaveId), isEnabled)
+        result = api.dll.SetHHTTrigOutputEnabled(c_int(api.masterId), c_int(api.slaveId), isEnabled)
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
 
 
 def GetHHTTrigOutputEnabled(api):
     isEnabled = c_int32(0)
+    retry = RetryState(api, "GetHHTTrigOutputEnabled")
     while(True):
-        result = api.GetHHTTrigOutputEnabled(c_int(masterId), c_int(slaveId), byref(isEnabled))
+        result = api.dll.GetHHTTrigOutputEnabled(c_int(api.masterId), c_int(api.slaveId), byref(isEnabled))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [isEnabled.value]
@@ -1341,7 +1603,7 @@ def GetHHTTrigOutputEnabled(api):
 
 def GetHHTTrigOutput(api):
     isAvailable = c_int32(0)
-    result = api.GetHHTTrigOutput(c_int(masterId), c_int(slaveId), byref(isAvailable))
+    result = api.dll.GetHHTTrigOutput(c_int(api.masterId), c_int(api.slaveId), byref(isAvailable))
     if result != DobotCommunicate.DobotCommunicate_NoError or isAvailable.value == 0:
         return [False]
     return [True]
@@ -1354,10 +1616,11 @@ def SetEndEffectorParams(api, xBias, yBias, zBias, isQueued=0):
     param.yBias = yBias
     param.zBias = zBias
     queuedCmdIndex = c_uint64(0)
+    retry = RetryState(api, "SetEndEffectorParams")
     while(True):
-        result = api.SetEndEffectorParams(c_int(masterId), c_int(slaveId), byref(param),  isQueued,  byref(queuedCmdIndex))
+        result = api.dll.SetEndEffectorParams(c_int(api.masterId), c_int(api.slaveId), byref(param),  isQueued,  byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -1365,10 +1628,11 @@ def SetEndEffectorParams(api, xBias, yBias, zBias, isQueued=0):
 
 def GetEndEffectorParams(api):
     param = EndTypeParams()
+    retry = RetryState(api, "GetEndEffectorParams")
     while(True):
-        result = api.GetEndEffectorParams(c_int(masterId), c_int(slaveId), byref(param))
+        result = api.dll.GetEndEffectorParams(c_int(api.masterId), c_int(api.slaveId), byref(param))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [param.xBias, param.yBias, param.zBias]
@@ -1376,10 +1640,11 @@ def GetEndEffectorParams(api):
 
 def SetEndEffectorLaser(api, enableCtrl,  on, isQueued=0):
     queuedCmdIndex = c_uint64(0)
+    retry = RetryState(api, "SetEndEffectorLaser")
     while(True):
-        result = api.SetEndEffectorLaser(c_int(masterId), c_int(slaveId), enableCtrl,  on,  isQueued,  byref(queuedCmdIndex))
+        result = api.dll.SetEndEffectorLaser(c_int(api.masterId), c_int(api.slaveId), enableCtrl,  on,  isQueued,  byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -1388,21 +1653,23 @@ def SetEndEffectorLaser(api, enableCtrl,  on, isQueued=0):
 def GetEndEffectorLaser(api):
     isCtrlEnabled = c_int(0)
     isOn = c_int(0)
+    retry = RetryState(api, "GetEndEffectorLaser")
     while(True):
-        result = api.GetEndEffectorLaser(c_int(masterId), c_int(slaveId), byref(isCtrlEnabled),  byref(isOn))
+        result = api.dll.GetEndEffectorLaser(c_int(api.masterId), c_int(api.slaveId), byref(isCtrlEnabled),  byref(isOn))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [isCtrlEnabled.value, isOn.value]
     
 
 def SetEndEffectorSuctionCup(api, enableCtrl,  on, isQueued=0):
-    queuedCmdIndex = c_uint64(0)
+    queuedCmdIndex = api.queuedCmdIndex
+    retry = RetryState(api, "SetEndEffectorSuctionCup")
     while(True):
-        result = api.SetEndEffectorSuctionCup(c_int(masterId), c_int(slaveId), enableCtrl,  on,  isQueued,  byref(queuedCmdIndex))
+        result = api.dll.SetEndEffectorSuctionCup(c_int(api.masterId), c_int(api.slaveId), enableCtrl,  on,  isQueued,  byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -1411,21 +1678,23 @@ def SetEndEffectorSuctionCup(api, enableCtrl,  on, isQueued=0):
 def GetEndEffectorSuctionCup(api):
     enableCtrl = c_int(0)
     isOn = c_int(0)
+    retry = RetryState(api, "GetEndEffectorSuctionCup")
     while(True):
-        result = api.GetEndEffectorSuctionCup(c_int(masterId), c_int(slaveId), byref(enableCtrl),  byref(isOn))
+        result = api.dll.GetEndEffectorSuctionCup(c_int(api.masterId), c_int(api.slaveId), byref(enableCtrl),  byref(isOn))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [isOn.value]
     
 
 def SetEndEffectorGripper(api, enableCtrl,  on, isQueued=0):
-    queuedCmdIndex = c_uint64(0)
+    queuedCmdIndex = api.queuedCmdIndex
+    retry = RetryState(api, "SetEndEffectorGripper")
     while(True):
-        result = api.SetEndEffectorGripper(c_int(masterId), c_int(slaveId), enableCtrl,  on,  isQueued,  byref(queuedCmdIndex))
+        result = api.dll.SetEndEffectorGripper(c_int(api.masterId), c_int(api.slaveId), enableCtrl,  on,  isQueued,  byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -1434,10 +1703,11 @@ def SetEndEffectorGripper(api, enableCtrl,  on, isQueued=0):
 def GetEndEffectorGripper(api):
     enableCtrl = c_int(0)
     isOn = c_int(0)
+    retry = RetryState(api, "GetEndEffectorGripper")
     while(True):
-        result = api.GetEndEffectorGripper(c_int(masterId), c_int(slaveId), byref(enableCtrl),  byref(isOn))
+        result = api.dll.GetEndEffectorGripper(c_int(api.masterId), c_int(api.slaveId), byref(enableCtrl),  byref(isOn))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [isOn.value]
@@ -1454,10 +1724,11 @@ def SetJOGJointParams(api, j1Velocity, j1Acceleration, j2Velocity, j2Acceleratio
     jogParam.joint4Velocity = j4Velocity
     jogParam.joint4Acceleration = j4Acceleration
     queuedCmdIndex = c_uint64(0)
+    retry = RetryState(api, "SetJOGJointParams")
     while(True):
-        result = api.SetJOGJointParams(c_int(masterId), c_int(slaveId), byref(jogParam), isQueued, byref(queuedCmdIndex))
+        result = api.dll.SetJOGJointParams(c_int(api.masterId), c_int(api.slaveId), byref(jogParam), isQueued, byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -1465,10 +1736,11 @@ def SetJOGJointParams(api, j1Velocity, j1Acceleration, j2Velocity, j2Acceleratio
 
 def GetJOGJointParams(api):
     param = JOGJointParams()
+    retry = RetryState(api, "GetJOGJointParams")
     while(True):
-        result = api.GetJOGJointParams(c_int(masterId), c_int(slaveId), byref(param))
+        result = api.dll.GetJOGJointParams(c_int(api.masterId), c_int(api.slaveId), byref(param))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [param.joint1Velocity, param.joint1Acceleration, param.joint2Velocity, param.joint2Acceleration, param.joint3Velocity, param.joint3Acceleration, param.joint4Velocity, param.joint4Acceleration]
@@ -1485,10 +1757,11 @@ def SetJOGCoordinateParams(api, xVelocity, xAcceleration, yVelocity, yAccelerati
     param.rVelocity = rVelocity
     param.rAcceleration = rAcceleration
     queuedCmdIndex = c_uint64(0)
+    retry = RetryState(api, "SetJOGCoordinateParams")
     while(True):
-        result = api.SetJOGCoordinateParams(c_int(masterId), c_int(slaveId), byref(param), isQueued, byref(queuedCmdIndex))
+        result = api.dll.SetJOGCoordinateParams(c_int(api.masterId), c_int(api.slaveId), byref(param), isQueued, byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -1496,10 +1769,11 @@ def SetJOGCoordinateParams(api, xVelocity, xAcceleration, yVelocity, yAccelerati
 
 def GetJOGCoordinateParams(api):
     param = JOGCoordinateParams()
+    retry = RetryState(api, "GetJOGCoordinateParams")
     while(True):
-        result = api.GetJOGCoordinateParams(c_int(masterId), c_int(slaveId), byref(param))
+        result = api.dll.GetJOGCoordinateParams(c_int(api.masterId), c_int(api.slaveId), byref(param))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [param.xVelocity, param.xAcceleration, param.yVelocity, param.yVelocity, param.zVelocity, param.zAcceleration, param.rVelocity, param.rAcceleration]
@@ -1507,21 +1781,22 @@ def GetJOGCoordinateParams(api):
 
 def SetJOGLParams(api, velocity, acceleration, isQueued=0):
     # 滑轨的特殊处理
-    if slaveDevType == DevType.Magician:
-        tempSlaveId = slaveId
-    elif masterDevType == DevType.Conntroller and (slaveDevType == DevType.MagicianLite or slaveDevType == DevType.Idle):
+    if api.slaveDevType == DevType.Magician:
+        tempSlaveId = api.slaveId
+    elif api.masterDevType == DevType.Conntroller and (api.slaveDevType == DevType.MagicianLite or api.slaveDevType == DevType.Idle):
         tempSlaveId = -1
     else:
-        tempSlaveId = slaveId
+        tempSlaveId = api.slaveId
 
     param = JOGLParams()
     param.velocity = velocity
     param.acceleration = acceleration
     queuedCmdIndex = c_uint64(0)
+    retry = RetryState(api, "SetJOGLParams")
     while(True):
-        result = api.SetJOGLParams(c_int(masterId), c_int(tempSlaveId), byref(param), isQueued, byref(queuedCmdIndex))
+        result = api.dll.SetJOGLParams(c_int(api.masterId), c_int(tempSlaveId), byref(param), isQueued, byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -1529,18 +1804,19 @@ def SetJOGLParams(api, velocity, acceleration, isQueued=0):
 
 def GetJOGLParams(api):
     # 滑轨的特殊处理
-    if slaveDevType == DevType.Magician:
-        tempSlaveId = slaveId
-    elif masterDevType == DevType.Conntroller and (slaveDevType == DevType.MagicianLite or slaveDevType == DevType.Idle):
+    if api.slaveDevType == DevType.Magician:
+        tempSlaveId = api.slaveId
+    elif api.masterDevType == DevType.Conntroller and (api.slaveDevType == DevType.MagicianLite or api.slaveDevType == DevType.Idle):
         tempSlaveId = -1
     else:
-        tempSlaveId = slaveId
+        tempSlaveId = api.slaveId
 
     param = JOGLParams()
+    retry = RetryState(api, "GetJOGLParams")
     while(True):
-        result = api.GetJOGLParams(c_int(masterId), c_int(tempSlaveId), byref(param))
+        result = api.dll.GetJOGLParams(c_int(api.masterId), c_int(tempSlaveId), byref(param))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [param.velocity,  param.acceleration]
@@ -1553,38 +1829,43 @@ def SetJOGCommonParams(api, value_velocityratio, value_accelerationratio, isQueu
     queuedCmdIndex = c_uint64(0)
 
     # 滑轨的特殊处理
-    if slaveDevType == DevType.Magician:
+    if api.slaveDevType == DevType.Magician:
+        retry = RetryState(api, "SetJOGCommonParams")
         while(True):
-            result = api.SetJOGCommonParams(c_int(masterId), c_int(slaveId), byref(param), isQueued, byref(queuedCmdIndex))
+            result = api.dll.SetJOGCommonParams(c_int(api.masterId), c_int(api.slaveId), byref(param), isQueued, byref(queuedCmdIndex))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(5)
+                retry.backoff(result)
                 continue
             break
-    elif masterDevType == DevType.Conntroller and slaveDevType == DevType.MagicianLite:
+    elif api.masterDevType == DevType.Conntroller and api.slaveDevType == DevType.MagicianLite:
+        retry = RetryState(api, "SetJOGCommonParams")
         while(True):
-            result = api.SetJOGCommonParams(c_int(masterId), c_int(-1), byref(param), isQueued, byref(queuedCmdIndex))
+            result = api.dll.SetJOGCommonParams(c_int(api.masterId), c_int(-1), byref(param), isQueued, byref(queuedCmdIndex))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(5)
+                retry.backoff(result)
                 continue
             break
+        retry = RetryState(api, "SetJOGCommonParams")
         while(True):
-            result = api.SetJOGCommonParams(c_int(masterId), c_int(slaveId), byref(param), isQueued, byref(queuedCmdIndex))
+            result = api.dll.SetJOGCommonParams(c_int(api.masterId), c_int(api.slaveId), byref(param), isQueued, byref(queuedCmdIndex))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(5)
+                retry.backoff(result)
                 continue
             break
-    elif masterDevType == DevType.Conntroller and slaveDevType == DevType.Idle:
+    elif api.masterDevType == DevType.Conntroller and api.slaveDevType == DevType.Idle:
+        retry = RetryState(api, "SetJOGCommonParams")
         while(True):
-            result = api.SetJOGCommonParams(c_int(masterId), c_int(-1), byref(param), isQueued, byref(queuedCmdIndex))
+            result = api.dll.SetJOGCommonParams(c_int(api.masterId), c_int(-1), byref(param), isQueued, byref(queuedCmdIndex))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(5)
+                retry.backoff(result)
                 continue
             break
     else:
+        retry = RetryState(api, "SetJOGCommonParams")
         while(True):
-            result = api.SetJOGCommonParams(c_int(masterId), c_int(slaveId), byref(param), isQueued, byref(queuedCmdIndex))
+            result = api.dll.SetJOGCommonParams(c_int(api.masterId), c_int(api.slaveId), byref(param), isQueued, byref(queuedCmdIndex))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(5)
+                retry.backoff(result)
                 continue
             break
 
@@ -1593,10 +1874,11 @@ def SetJOGCommonParams(api, value_velocityratio, value_accelerationratio, isQueu
 
 def GetJOGCommonParams(api):
     param = JOGCommonParams()
+    retry = RetryState(api, "GetJOGCommonParams")
     while(True):
-        result = api.GetJOGCommonParams(c_int(masterId), c_int(slaveId), byref(param))
+        result = api.dll.GetJOGCommonParams(c_int(api.masterId), c_int(api.slaveId), byref(param))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [param.velocityRatio, param.accelerationRatio]
@@ -1604,15 +1886,15 @@ def GetJOGCommonParams(api):
 
 def SetJOGCmd(api, isJoint, cmd, isQueued=0):
     # 滑轨的特殊处理
-    if slaveDevType == DevType.Magician:
-        tempSlaveId = slaveId
-    elif masterDevType == DevType.Conntroller and slaveDevType == DevType.MagicianLite:
+    if api.slaveDevType == DevType.Magician:
+        tempSlaveId = api.slaveId
+    elif api.masterDevType == DevType.Conntroller and api.slaveDevType == DevType.MagicianLite:
         if cmd == 9 or cmd == 10:
             tempSlaveId = -1
         else:
-            tempSlaveId = slaveId
+            tempSlaveId = api.slaveId
     else:
-        tempSlaveId = slaveId
+        tempSlaveId = api.slaveId
 
     cmdParam = JOGCmd()
     cmdParam.isJoint = isJoint
@@ -1620,23 +1902,26 @@ def SetJOGCmd(api, isJoint, cmd, isQueued=0):
     queuedCmdIndex = c_uint64(0)
 
     if cmd == 0:
+        retry = RetryState(api, "SetJOGCmd")
         while(True):
-            result = api.SetJOGCmd(c_int(masterId), c_int(-1), byref(cmdParam), isQueued, byref(queuedCmdIndex))
+            result = api.dll.SetJOGCmd(c_int(api.masterId), c_int(-1), byref(cmdParam), isQueued, byref(queuedCmdIndex))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(5)
+                retry.backoff(result)
                 continue
             break
+        retry = RetryState(api, "SetJOGCmd")
         while(True):
-            result = api.SetJOGCmd(c_int(masterId), c_int(slaveId), byref(cmdParam), isQueued, byref(queuedCmdIndex))
+            result = api.dll.SetJOGCmd(c_int(api.masterId), c_int(api.slaveId), byref(cmdParam), isQueued, byref(queuedCmdIndex))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(5)
+                retry.backoff(result)
                 continue
             break
     else:
+        retry = RetryState(api, "SetJOGCmd")
         while(True):
-            result = api.SetJOGCmd(c_int(masterId), c_int(tempSlaveId), byref(cmdParam), isQueued, byref(queuedCmdIndex))
+            result = api.dll.SetJOGCmd(c_int(api.masterId), c_int(tempSlaveId), byref(cmdParam), isQueued, byref(queuedCmdIndex))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(5)
+                retry.backoff(result)
                 continue
             break
     return [queuedCmdIndex.value]
@@ -1653,10 +1938,11 @@ def SetPTPJointParams(api, j1Velocity, j1Acceleration, j2Velocity, j2Acceleratio
     pbParam.joint4Velocity = j4Velocity
     pbParam.joint4Acceleration = j4Acceleration
     queuedCmdIndex = c_uint64(0)
+    retry = RetryState(api, "SetPTPJointParams")
     while(True):
-        result = api.SetPTPJointParams(c_int(masterId), c_int(slaveId), byref(pbParam), isQueued, byref(queuedCmdIndex))
+        result = api.dll.SetPTPJointParams(c_int(api.masterId), c_int(api.slaveId), byref(pbParam), isQueued, byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -1664,10 +1950,11 @@ def SetPTPJointParams(api, j1Velocity, j1Acceleration, j2Velocity, j2Acceleratio
 
 def GetPTPJointParams(api):
     pbParam = PTPJointParams()
+    retry = RetryState(api, "GetPTPJointParams")
     while(True):
-        result = api.GetPTPJointParams(c_int(masterId), c_int(slaveId), byref(pbParam))
+        result = api.dll.GetPTPJointParams(c_int(api.masterId), c_int(api.slaveId), byref(pbParam))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [pbParam.joint1Velocity,pbParam.joint1Acceleration,pbParam.joint2Velocity,pbParam.joint2Acceleration,pbParam.joint3Velocity,pbParam.joint3Acceleration,pbParam.joint4Velocity,pbParam.joint4Acceleration]
@@ -1680,10 +1967,11 @@ def SetPTPCoordinateParams(api, xyzVelocity, xyzAcceleration, rVelocity,  rAccel
     pbParam.xyzAcceleration = xyzAcceleration
     pbParam.rAcceleration = rAcceleration
     queuedCmdIndex = c_uint64(0)
+    retry = RetryState(api, "SetPTPCoordinateParams")
     while(True):
-        result = api.SetPTPCoordinateParams(c_int(masterId), c_int(slaveId), byref(pbParam), isQueued, byref(queuedCmdIndex))
+        result = api.dll.SetPTPCoordinateParams(c_int(api.masterId), c_int(api.slaveId), byref(pbParam), isQueued, byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -1691,10 +1979,11 @@ def SetPTPCoordinateParams(api, xyzVelocity, xyzAcceleration, rVelocity,  rAccel
 
 def GetPTPCoordinateParams(api):
     pbParam = PTPCoordinateParams()
+    retry = RetryState(api, "GetPTPCoordinateParams")
     while(True):
-        result = api.GetPTPCoordinateParams(c_int(masterId), c_int(slaveId), byref(pbParam))
+        result = api.dll.GetPTPCoordinateParams(c_int(api.masterId), c_int(api.slaveId), byref(pbParam))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [pbParam.xyzVelocity, pbParam.rVelocity, pbParam.xyzAcceleration, pbParam.rAcceleration]
@@ -1702,21 +1991,22 @@ def GetPTPCoordinateParams(api):
 
 def SetPTPLParams(api, velocity, acceleration, isQueued=0):
     # 滑轨的特殊处理
-    if slaveDevType == DevType.Magician:
-        tempSlaveId = slaveId
-    elif masterDevType == DevType.Conntroller and (slaveDevType == DevType.MagicianLite or slaveDevType == DevType.Idle):
+    if api.slaveDevType == DevType.Magician:
+        tempSlaveId = api.slaveId
+    elif api.masterDevType == DevType.Conntroller and (api.slaveDevType == DevType.MagicianLite or api.slaveDevType == DevType.Idle):
         tempSlaveId = -1
     else:
-        tempSlaveId = slaveId
+        tempSlaveId = api.slaveId
 
     param = PTPLParams()
     param.velocity = velocity
     param.acceleration = acceleration
     queuedCmdIndex = c_uint64(0)
+    retry = RetryState(api, "SetPTPLParams")
     while(True):
-        result = api.SetPTPLParams(c_int(masterId), c_int(tempSlaveId), byref(param), isQueued, byref(queuedCmdIndex))
+        result = api.dll.SetPTPLParams(c_int(api.masterId), c_int(tempSlaveId), byref(param), isQueued, byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -1724,17 +2014,18 @@ def SetPTPLParams(api, velocity, acceleration, isQueued=0):
 
 def GetPTPLParams(api):
     # 滑轨的特殊处理
-    if slaveDevType == DevType.Magician:
-        tempSlaveId = slaveId
-    elif masterDevType == DevType.Conntroller and (slaveDevType == DevType.MagicianLite or slaveDevType == DevType.Idle):
+    if api.slaveDevType == DevType.Magician:
+        tempSlaveId = api.slaveId
+    elif api.masterDevType == DevType.Conntroller and (api.slaveDevType == DevType.MagicianLite or api.slaveDevType == DevType.Idle):
         tempSlaveId = -1
     else:
-        tempSlaveId = slaveId
+        tempSlaveId = api.slaveId
     param = PTPLParams()
+    retry = RetryState(api, "GetPTPLParams")
     while(True):
-        result = api.GetPTPLParams(c_int(masterId), c_int(tempSlaveId), byref(param))
+        result = api.dll.GetPTPLParams(c_int(api.masterId), c_int(tempSlaveId), byref(param))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [param.velocity,  param.acceleration]
@@ -1746,10 +2037,11 @@ def SetPTPJumpParams(api, jumpHeight, zLimit, isQueued=0):
     pbParam.zLimit = zLimit
     queuedCmdIndex = c_uint64(0)
         
+    retry = RetryState(api, "SetPTPJumpParams")
     while(True):
-        result = api.SetPTPJumpParams(c_int(masterId), c_int(slaveId), byref(pbParam), isQueued, byref(queuedCmdIndex))
+        result = api.dll.SetPTPJumpParams(c_int(api.masterId), c_int(api.slaveId), byref(pbParam), isQueued, byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -1757,10 +2049,11 @@ def SetPTPJumpParams(api, jumpHeight, zLimit, isQueued=0):
 
 def GetPTPJumpParams(api):
     pbParam = PTPJumpParams()
+    retry = RetryState(api, "GetPTPJumpParams")
     while(True):
-        result = api.GetPTPJumpParams(c_int(masterId), c_int(slaveId), byref(pbParam))
+        result = api.dll.GetPTPJumpParams(c_int(api.masterId), c_int(api.slaveId), byref(pbParam))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [pbParam.jumpHeight, pbParam.zLimit]
@@ -1773,31 +2066,35 @@ def SetPTPCommonParams(api, velocityRatio, accelerationRatio, isQueued=0):
     queuedCmdIndex = c_uint64(0)
     
     # 滑轨的特殊处理
-    if slaveDevType == DevType.Magician:
+    if api.slaveDevType == DevType.Magician:
+        retry = RetryState(api, "SetPTPCommonParams")
         while(True):
-            result = api.SetPTPCommonParams(c_int(masterId), c_int(slaveId), byref(pbParam), isQueued, byref(queuedCmdIndex))
+            result = api.dll.SetPTPCommonParams(c_int(api.masterId), c_int(api.slaveId), byref(pbParam), isQueued, byref(queuedCmdIndex))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(5)
+                retry.backoff(result)
                 continue
             break
-    elif masterDevType == DevType.Conntroller and slaveDevType == DevType.MagicianLite:
+    elif api.masterDevType == DevType.Conntroller and api.slaveDevType == DevType.MagicianLite:
+        retry = RetryState(api, "SetPTPCommonParams")
         while(True):
-            result = api.SetPTPCommonParams(c_int(masterId), c_int(-1), byref(pbParam), isQueued, byref(queuedCmdIndex))
+            result = api.dll.SetPTPCommonParams(c_int(api.masterId), c_int(-1), byref(pbParam), isQueued, byref(queuedCmdIndex))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(5)
+                retry.backoff(result)
                 continue
             break
+        retry = RetryState(api, "SetPTPCommonParams")
         while(True):
-            result = api.SetPTPCommonParams(c_int(masterId), c_int(slaveId), byref(pbParam), isQueued, byref(queuedCmdIndex))
+            result = api.dll.SetPTPCommonParams(c_int(api.masterId), c_int(api.slaveId), byref(pbParam), isQueued, byref(queuedCmdIndex))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(5)
+                retry.backoff(result)
                 continue
             break
     else:
+        retry = RetryState(api, "SetPTPCommonParams")
         while(True):
-            result = api.SetPTPCommonParams(c_int(masterId), c_int(slaveId), byref(pbParam), isQueued, byref(queuedCmdIndex))
+            result = api.dll.SetPTPCommonParams(c_int(api.masterId), c_int(api.slaveId), byref(pbParam), isQueued, byref(queuedCmdIndex))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(5)
+                retry.backoff(result)
                 continue
             break
 
@@ -1806,27 +2103,29 @@ def SetPTPCommonParams(api, velocityRatio, accelerationRatio, isQueued=0):
 
 def GetPTPCommonParams(api):
     pbParam = PTPCommonParams()
+    retry = RetryState(api, "GetPTPCommonParams")
     while(True):
-        result = api.GetPTPCommonParams(c_int(masterId), c_int(slaveId), byref(pbParam ))
+        result = api.dll.GetPTPCommonParams(c_int(api.masterId), c_int(api.slaveId), byref(pbParam ))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [pbParam.velocityRatio, pbParam.accelerationRatio]
     
 
 def SetPTPCmd(api, ptpMode, x, y, z, rHead, isQueued=0):
-    cmd = PTPCmd()
+    cmd = api.ptpCmd
     cmd.ptpMode=ptpMode
     cmd.x=x
     cmd.y=y
     cmd.z=z
     cmd.rHead=rHead
-    queuedCmdIndex = c_uint64(0)
+    queuedCmdIndex = api.queuedCmdIndex
+    retry = RetryState(api, "SetPTPCmd")
     while(True):
-        result = api.SetPTPCmd(c_int(masterId), c_int(slaveId), byref(cmd), isQueued, byref(queuedCmdIndex))
+        result = api.dll.SetPTPCmd(c_int(api.masterId), c_int(api.slaveId), byref(cmd), isQueued, byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(2)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -1843,14 +2142,15 @@ def SetPTPWithLCmd(api, ptpMode, x, y, z, rHead, l, isQueued=0):
     queuedCmdIndex = c_uint64(0)
 
     # 滑轨的特殊处理
-    if slaveDevType == DevType.Magician:
+    if api.slaveDevType == DevType.Magician:
+        retry = RetryState(api, "SetPTPWithLCmd")
         while(True):
-            result = api.SetPTPWithLCmd(c_int(masterId), c_int(slaveId), byref(cmd), isQueued, byref(queuedCmdIndex))
+            result = api.dll.SetPTPWithLCmd(c_int(api.masterId), c_int(api.slaveId), byref(cmd), isQueued, byref(queuedCmdIndex))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(2)
+                retry.backoff(result)
                 continue
             break
-    elif masterDevType == DevType.Conntroller and slaveDevType == DevType.MagicianLite:
+    elif api.masterDevType == DevType.Conntroller and api.slaveDevType == DevType.MagicianLite:
         cmd1 = PTPCmd()
         cmd1.ptpMode = ptpMode
         cmd1.x = x
@@ -1858,43 +2158,98 @@ def SetPTPWithLCmd(api, ptpMode, x, y, z, rHead, l, isQueued=0):
         cmd1.z = z
         cmd1.rHead = rHead
         queuedCmdIndex1 = c_uint64(0)
+        retry = RetryState(api, "SetPTPWithLCmd")
         while(True):
-            result = api.SetPTPWithLCmd(c_int(masterId), c_int(-1), byref(cmd), isQueued, byref(queuedCmdIndex))
+            result = api.dll.SetPTPWithLCmd(c_int(api.masterId), c_int(-1), byref(cmd), isQueued, byref(queuedCmdIndex))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(2)
+                retry.backoff(result)
                 continue
             break
+        retry = RetryState(api, "SetPTPCmd")
         while(True):
-            result = api.SetPTPCmd(c_int(masterId), c_int(slaveId), byref(cmd1), isQueued, byref(queuedCmdIndex1))
+            result = api.dll.SetPTPCmd(c_int(api.masterId), c_int(api.slaveId), byref(cmd1), isQueued, byref(queuedCmdIndex1))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(2)
+                retry.backoff(result)
                 continue
             break
     else:
+        retry = RetryState(api, "SetPTPWithLCmd")
         while(True):
-            result = api.SetPTPWithLCmd(c_int(masterId), c_int(slaveId), byref(cmd), isQueued, byref(queuedCmdIndex))
+            result = api.dll.SetPTPWithLCmd(c_int(api.masterId), c_int(api.slaveId), byref(cmd), isQueued, byref(queuedCmdIndex))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(2)
+                retry.backoff(result)
                 continue
             break
     return [queuedCmdIndex.value]
+
+
+def parallelOutputs(parallelCmds):
+    #(ratio, address, level)列表 -> ParallelOutputCmd数组
+    #List of (ratio, address, level) -> ParallelOutputCmd array
+    outputs = (ParallelOutputCmd * len(parallelCmds))()
+    for output, (ratio, address, level) in zip(outputs, parallelCmds):
+        output.ratio = ratio
+        output.address = address
+        output.level = level
+    return outputs
+
+
+def SetPTPPOCmd(api, ptpMode, x, y, z, rHead, parallelCmds, isQueued=0):
+    cmd = PTPCmd()
+    cmd.ptpMode=ptpMode
+    cmd.x=x
+    cmd.y=y
+    cmd.z=z
+    cmd.rHead=rHead
+    outputs = parallelOutputs(parallelCmds)
+    queuedCmdIndex = c_uint64(0)
+    retry = RetryState(api, "SetPTPPOCmd")
+    while(True):
+        result = api.dll.SetPTPPOCmd(c_int(api.masterId), c_int(api.slaveId), byref(cmd), outputs, c_int(len(outputs)), isQueued, byref(queuedCmdIndex))
+        if result != DobotCommunicate.DobotCommunicate_NoError:
+            retry.backoff(result)
+            continue
+        break
+    return [queuedCmdIndex.value]
+
+
+def SetPTPPOWithLCmd(api, ptpMode, x, y, z, rHead, l, parallelCmds, isQueued=0):
+    cmd = PTPWithLCmd()
+    cmd.ptpMode=ptpMode
+    cmd.x=x
+    cmd.y=y
+    cmd.z=z
+    cmd.rHead=rHead
+    cmd.l = l
+    outputs = parallelOutputs(parallelCmds)
+    queuedCmdIndex = c_uint64(0)
+    retry = RetryState(api, "SetPTPPOWithLCmd")
+    while(True):
+        result = api.dll.SetPTPPOWithLCmd(c_int(api.masterId), c_int(api.slaveId), byref(cmd), outputs, c_int(len(outputs)), isQueued, byref(queuedCmdIndex))
+        if result != DobotCommunicate.DobotCommunicate_NoError:
+            retry.backoff(result)
+            continue
+        break
+    return [queuedCmdIndex.value]
     
 
 def SetCPRHoldEnable(api, isEnable):
+    retry = RetryState(api, "SetCPRHoldEnable")
     while(True):
-        result = api.SetCPRHoldEnable(c_int(masterId), c_int(slaveId), c_bool(isEnable))
+        result = api.dll.SetCPRHoldEnable(c_int(api.masterId), c_int(api.slaveId), c_bool(isEnable))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
 
 
 def GetCPRHoldEnable(api):
     isEnable = c_bool(False)
+    retry = RetryState(api, "GetCPRHoldEnable")
     while(True):
-        result = api.GetCPRHoldEnable(c_int(masterId), c_int(slaveId), byref(isEnable))
+        result = api.dll.GetCPRHoldEnable(c_int(api.masterId), c_int(api.slaveId), byref(isEnable))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [isEnable.value]
@@ -1907,10 +2262,11 @@ def SetCPParams(api, planAcc, juncitionVel, acc, realTimeTrack = 0,  isQueued=0)
     parm.acc = acc
     parm.realTimeTrack = realTimeTrack
     queuedCmdIndex = c_uint64(0)
+    retry = RetryState(api, "SetCPParams")
     while(True):
-        result = api.SetCPParams(c_int(masterId), c_int(slaveId), byref(parm), isQueued, byref(queuedCmdIndex))
+        result = api.dll.SetCPParams(c_int(api.masterId), c_int(api.slaveId), byref(parm), isQueued, byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -1918,10 +2274,11 @@ def SetCPParams(api, planAcc, juncitionVel, acc, realTimeTrack = 0,  isQueued=0)
 
 def GetCPParams(api):
     parm = CPParams()
+    retry = RetryState(api, "GetCPParams")
     while(True):
-        result = api.GetCPParams(c_int(masterId), c_int(slaveId), byref(parm))
+        result = api.dll.GetCPParams(c_int(api.masterId), c_int(api.slaveId), byref(parm))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [parm.planAcc, parm.juncitionVel, parm.acc, parm.realTimeTrack]
@@ -1936,10 +2293,11 @@ def SetCPCmd(api, cpMode, x, y, z, velocity, isQueued=0):
     cmd.velocity = velocity
     queuedCmdIndex = c_uint64(0)
 
+    retry = RetryState(api, "SetCPCmd")
     while(True):
-        result = api.SetCPCmd(c_int(masterId), c_int(slaveId), byref(cmd), isQueued, byref(queuedCmdIndex))
+        result = api.dll.SetCPCmd(c_int(api.masterId), c_int(api.slaveId), byref(cmd), isQueued, byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(2)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -1954,10 +2312,11 @@ def SetCP2Cmd(api, cpMode, x, y, z, isQueued=0):
     cmd.velocity = c_float(100)
     queuedCmdIndex = c_uint64(0)
 
+    retry = RetryState(api, "SetCP2Cmd")
     while(True):
-        result = api.SetCP2Cmd(c_int(masterId), c_int(slaveId), byref(cmd), isQueued, byref(queuedCmdIndex))
+        result = api.dll.SetCP2Cmd(c_int(api.masterId), c_int(api.slaveId), byref(cmd), isQueued, byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(2)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -1968,10 +2327,11 @@ def SetCPCommonParams(api, velocityRatio, accelerationRatio, isQueued=0):
     pbParam.velocityRatio = velocityRatio
     pbParam.accelerationRatio = accelerationRatio
     queuedCmdIndex = c_uint64(0)
+    retry = RetryState(api, "SetCPCommonParams")
     while(True):
-        result = api.SetCPCommonParams(c_int(masterId), c_int(slaveId), byref(pbParam), isQueued, byref(queuedCmdIndex))
+        result = api.dll.SetCPCommonParams(c_int(api.masterId), c_int(api.slaveId), byref(pbParam), isQueued, byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -1979,10 +2339,11 @@ def SetCPCommonParams(api, velocityRatio, accelerationRatio, isQueued=0):
 
 def GetCPCommonParams(api):
     pbParam = CPCommonParams()
+    retry = RetryState(api, "GetCPCommonParams")
     while(True):
-        result = api.GetCPCommonParams(c_int(masterId), c_int(slaveId), byref(pbParam ))
+        result = api.dll.GetCPCommonParams(c_int(api.masterId), c_int(api.slaveId), byref(pbParam ))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [pbParam.velocityRatio, pbParam.accelerationRatio]
@@ -1996,10 +2357,11 @@ def SetCPLECmd(api, cpMode, x, y, z, power, isQueued=0):
     cmd.z = z
     cmd.velocity = power
     queuedCmdIndex = c_uint64(0)
+    retry = RetryState(api, "SetCPLECmd")
     while(True):
-        result = api.SetCPLECmd(c_int(masterId), c_int(slaveId), byref(cmd), isQueued, byref(queuedCmdIndex))
+        result = api.dll.SetCPLECmd(c_int(api.masterId), c_int(api.slaveId), byref(cmd), isQueued, byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(2)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -2012,20 +2374,22 @@ def SetARCParams(api,  xyzVelocity, rVelocity, xyzAcceleration, rAcceleration,
     param.xyzAcceleration = xyzAcceleration
     param.rAcceleration = rAcceleration
     queuedCmdIndex = c_uint64(0)
+    retry = RetryState(api, "SetARCParams")
     while(True):
-        result = api.SetARCParams(c_int(masterId), c_int(slaveId), byref(param), isQueued, byref(queuedCmdIndex))
+        result = api.dll.SetARCParams(c_int(api.masterId), c_int(api.slaveId), byref(param), isQueued, byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
 
 def GetARCParams(api):
     parm = ARCParams()
+    retry = RetryState(api, "GetARCParams")
     while(True):
-        result = api.GetARCParams(c_int(masterId), c_int(slaveId), byref(parm))
+        result = api.dll.GetARCParams(c_int(api.masterId), c_int(api.slaveId), byref(parm))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [parm.xyzVelocity, parm.rVelocity, parm.xyzAcceleration, parm.rAcceleration]
@@ -2036,10 +2400,11 @@ def SetARCCmd(api, cirPoint, toPoint,  isQueued=0):
     cmd.cirPoint.x = cirPoint[0];cmd.cirPoint.y = cirPoint[1];cmd.cirPoint.z = cirPoint[2];cmd.cirPoint.rHead = cirPoint[3]
     cmd.toPoint.x = toPoint[0];cmd.toPoint.y = toPoint[1];cmd.toPoint.z = toPoint[2];cmd.toPoint.rHead = toPoint[3]
     queuedCmdIndex = c_uint64(0)
+    retry = RetryState(api, "SetARCCmd")
     while(True):
-        result = api.SetARCCmd(c_int(masterId), c_int(slaveId), byref(cmd), isQueued, byref(queuedCmdIndex))
+        result = api.dll.SetARCCmd(c_int(api.masterId), c_int(api.slaveId), byref(cmd), isQueued, byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -2050,10 +2415,11 @@ def SetCircleCmd(api, cirPoint, toPoint,  isQueued=0):
     cmd.cirPoint.x = cirPoint[0];cmd.cirPoint.y = cirPoint[1];cmd.cirPoint.z = cirPoint[2];cmd.cirPoint.rHead = cirPoint[3]
     cmd.toPoint.x = toPoint[0];cmd.toPoint.y = toPoint[1];cmd.toPoint.z = toPoint[2];cmd.toPoint.rHead = toPoint[3]
     queuedCmdIndex = c_uint64(0)
+    retry = RetryState(api, "SetCircleCmd")
     while(True):
-        result = api.SetCircleCmd(c_int(masterId), c_int(slaveId), byref(cmd), isQueued, byref(queuedCmdIndex))
+        result = api.dll.SetCircleCmd(c_int(api.masterId), c_int(api.slaveId), byref(cmd), isQueued, byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -2064,10 +2430,11 @@ def SetARCCommonParams(api, velocityRatio, accelerationRatio, isQueued=0):
     pbParam.velocityRatio = velocityRatio
     pbParam.accelerationRatio = accelerationRatio
     queuedCmdIndex = c_uint64(0)
+    retry = RetryState(api, "SetARCCommonParams")
     while(True):
-        result = api.SetARCCommonParams(c_int(masterId), c_int(slaveId), byref(pbParam), isQueued, byref(queuedCmdIndex))
+        result = api.dll.SetARCCommonParams(c_int(api.masterId), c_int(api.slaveId), byref(pbParam), isQueued, byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -2075,23 +2442,25 @@ def SetARCCommonParams(api, velocityRatio, accelerationRatio, isQueued=0):
 
 def GetARCCommonParams(api):
     pbParam = ARCCommonParams()
+    retry = RetryState(api, "GetARCCommonParams")
     while(True):
-        result = api.GetARCCommonParams(c_int(masterId), c_int(slaveId), byref(pbParam ))
+        result = api.dll.GetARCCommonParams(c_int(api.masterId), c_int(api.slaveId), byref(pbParam ))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [pbParam.velocityRatio, pbParam.accelerationRatio]
 
 
 def SetWAITCmd(api, waitTime, isQueued=0):
-    param = WAITCmd()
+    param = api.waitCmd
     param.waitTime = int(waitTime)
-    queuedCmdIndex = c_uint64(0)
+    queuedCmdIndex = api.queuedCmdIndex
+    retry = RetryState(api, "SetWAITCmd")
     while(True):
-        result = api.SetWAITCmd(c_int(masterId), c_int(slaveId), byref(param), isQueued, byref(queuedCmdIndex))
+        result = api.dll.SetWAITCmd(c_int(api.masterId), c_int(api.slaveId), byref(param), isQueued, byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -2104,10 +2473,11 @@ def SetTRIGCmd(api, address, mode,  condition,  threshold,  isQueued=0):
     param.condition = condition
     param.threshold = threshold
     queuedCmdIndex = c_uint64(0)
+    retry = RetryState(api, "SetTRIGCmd")
     while(True):
-        result = api.SetTRIGCmd(c_int(masterId), c_int(slaveId), byref(param), isQueued, byref(queuedCmdIndex))
+        result = api.dll.SetTRIGCmd(c_int(api.masterId), c_int(api.slaveId), byref(param), isQueued, byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -2118,16 +2488,17 @@ def SetIOMultiplexing(api, address, multiplex, isQueued=0):
     param.address = address
     param.multiplex = multiplex
     queuedCmdIndex = c_uint64(0)
-    if slaveDevType == DevType.Magician:
-        tempSlaveId = slaveId
-    elif masterDevType == DevType.Conntroller and (slaveDevType == DevType.MagicianLite or slaveDevType == DevType.Idle):
+    if api.slaveDevType == DevType.Magician:
+        tempSlaveId = api.slaveId
+    elif api.masterDevType == DevType.Conntroller and (api.slaveDevType == DevType.MagicianLite or api.slaveDevType == DevType.Idle):
         tempSlaveId = -1
     else:
-        tempSlaveId = slaveId
+        tempSlaveId = api.slaveId
+    retry = RetryState(api, "SetIOMultiplexing")
     while(True):
-        result = api.SetIOMultiplexing(c_int(masterId), c_int(tempSlaveId), byref(param), isQueued, byref(queuedCmdIndex))
+        result = api.dll.SetIOMultiplexing(c_int(api.masterId), c_int(tempSlaveId), byref(param), isQueued, byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -2136,16 +2507,17 @@ def SetIOMultiplexing(api, address, multiplex, isQueued=0):
 def GetIOMultiplexing(api,  addr):
     param = IOMultiplexing()
     param.address = addr
-    if slaveDevType == DevType.Magician:
-        tempSlaveId = slaveId
-    elif masterDevType == DevType.Conntroller and (slaveDevType == DevType.MagicianLite or slaveDevType == DevType.Idle):
+    if api.slaveDevType == DevType.Magician:
+        tempSlaveId = api.slaveId
+    elif api.masterDevType == DevType.Conntroller and (api.slaveDevType == DevType.MagicianLite or api.slaveDevType == DevType.Idle):
         tempSlaveId = -1
     else:
-        tempSlaveId = slaveId
+        tempSlaveId = api.slaveId
+    retry = RetryState(api, "GetIOMultiplexing")
     while(True):
-        result = api.GetIOMultiplexing(c_int(masterId), c_int(tempSlaveId), byref(param))
+        result = api.dll.GetIOMultiplexing(c_int(api.masterId), c_int(tempSlaveId), byref(param))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [param.multiplex]
@@ -2156,16 +2528,17 @@ def SetIODO(api, address, level, isQueued=0):
     param.address = address
     param.level = level
     queuedCmdIndex = c_uint64(0)
-    if slaveDevType == DevType.Magician:
-        tempSlaveId = slaveId
-    elif masterDevType == DevType.Conntroller and (slaveDevType == DevType.MagicianLite or slaveDevType == DevType.Idle):
+    if api.slaveDevType == DevType.Magician:
+        tempSlaveId = api.slaveId
+    elif api.masterDevType == DevType.Conntroller and (api.slaveDevType == DevType.MagicianLite or api.slaveDevType == DevType.Idle):
         tempSlaveId = -1
     else:
-        tempSlaveId = slaveId
+        tempSlaveId = api.slaveId
+    retry = RetryState(api, "SetIODO")
     while(True):
-        result = api.SetIODO(c_int(masterId), c_int(tempSlaveId), byref(param), isQueued, byref(queuedCmdIndex))
+        result = api.dll.SetIODO(c_int(api.masterId), c_int(tempSlaveId), byref(param), isQueued, byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -2174,16 +2547,17 @@ def SetIODO(api, address, level, isQueued=0):
 def GetIODO(api,  addr):
     param = IODO()
     param.address = addr
-    if slaveDevType == DevType.Magician:
-        tempSlaveId = slaveId
-    elif masterDevType == DevType.Conntroller and (slaveDevType == DevType.MagicianLite or slaveDevType == DevType.Idle):
+    if api.slaveDevType == DevType.Magician:
+        tempSlaveId = api.slaveId
+    elif api.masterDevType == DevType.Conntroller and (api.slaveDevType == DevType.MagicianLite or api.slaveDevType == DevType.Idle):
         tempSlaveId = -1
     else:
-        tempSlaveId = slaveId
+        tempSlaveId = api.slaveId
+    retry = RetryState(api, "GetIODO")
     while(True):
-        result = api.GetIODO(c_int(masterId), c_int(tempSlaveId), byref(param))
+        result = api.dll.GetIODO(c_int(api.masterId), c_int(tempSlaveId), byref(param))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [param.level]
@@ -2195,16 +2569,17 @@ def SetIOPWM(api, address, frequency, dutyCycle,  isQueued=0):
     param.frequency = frequency
     param.dutyCycle = dutyCycle
     queuedCmdIndex = c_uint64(0)
-    if slaveDevType == DevType.Magician:
-        tempSlaveId = slaveId
-    elif masterDevType == DevType.Conntroller and (slaveDevType == DevType.MagicianLite or slaveDevType == DevType.Idle):
+    if api.slaveDevType == DevType.Magician:
+        tempSlaveId = api.slaveId
+    elif api.masterDevType == DevType.Conntroller and (api.slaveDevType == DevType.MagicianLite or api.slaveDevType == DevType.Idle):
         tempSlaveId = -1
     else:
-        tempSlaveId = slaveId
+        tempSlaveId = api.slaveId
+    retry = RetryState(api, "SetIOPWM")
     while(True):
-        result = api.SetIOPWM(c_int(masterId), c_int(tempSlaveId), byref(param), isQueued, byref(queuedCmdIndex))
+        result = api.dll.SetIOPWM(c_int(api.masterId), c_int(tempSlaveId), byref(param), isQueued, byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -2213,16 +2588,17 @@ def SetIOPWM(api, address, frequency, dutyCycle,  isQueued=0):
 def GetIOPWM(api,  addr):
     param = IOPWM()
     param.address = addr
-    if slaveDevType == DevType.Magician:
-        tempSlaveId = slaveId
-    elif masterDevType == DevType.Conntroller and (slaveDevType == DevType.MagicianLite or slaveDevType == DevType.Idle):
+    if api.slaveDevType == DevType.Magician:
+        tempSlaveId = api.slaveId
+    elif api.masterDevType == DevType.Conntroller and (api.slaveDevType == DevType.MagicianLite or api.slaveDevType == DevType.Idle):
         tempSlaveId = -1
     else:
-        tempSlaveId = slaveId
+        tempSlaveId = api.slaveId
+    retry = RetryState(api, "GetIOPWM")
     while(True):
-        result = api.GetIOPWM(c_int(masterId), c_int(tempSlaveId), byref(param))
+        result = api.dll.GetIOPWM(c_int(api.masterId), c_int(tempSlaveId), byref(param))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [param.frequency,  param.dutyCycle]
@@ -2231,16 +2607,17 @@ def GetIOPWM(api,  addr):
 def GetIODI(api, addr):
     param = IODI()
     param.address = addr
-    if slaveDevType == DevType.Magician:
-        tempSlaveId = slaveId
-    elif masterDevType == DevType.Conntroller and (slaveDevType == DevType.MagicianLite or slaveDevType == DevType.Idle):
+    if api.slaveDevType == DevType.Magician:
+        tempSlaveId = api.slaveId
+    elif api.masterDevType == DevType.Conntroller and (api.slaveDevType == DevType.MagicianLite or api.slaveDevType == DevType.Idle):
         tempSlaveId = -1
     else:
-        tempSlaveId = slaveId
+        tempSlaveId = api.slaveId
+    retry = RetryState(api, "GetIODI")
     while(True):
-        result = api.GetIODI(c_int(masterId), c_int(tempSlaveId), byref(param))
+        result = api.dll.GetIODI(c_int(api.masterId), c_int(tempSlaveId), byref(param))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [param.level]
@@ -2252,16 +2629,17 @@ def SetEMotor(api, index, isEnabled, speed,  isQueued=0):
     emotor.isEnabled = isEnabled
     emotor.speed = speed
     queuedCmdIndex = c_uint64(0)
-    if slaveDevType == DevType.Magician:
-        tempSlaveId = slaveId
-    elif masterDevType == DevType.Conntroller and (slaveDevType == DevType.MagicianLite or slaveDevType == DevType.Idle):
+    if api.slaveDevType == DevType.Magician:
+        tempSlaveId = api.slaveId
+    elif api.masterDevType == DevType.Conntroller and (api.slaveDevType == DevType.MagicianLite or api.slaveDevType == DevType.Idle):
         tempSlaveId = -1
     else:
-        tempSlaveId = slaveId
+        tempSlaveId = api.slaveId
+    retry = RetryState(api, "SetEMotor")
     while(True):
-        result = api.SetEMotor(c_int(masterId), c_int(tempSlaveId), byref(emotor), isQueued, byref(queuedCmdIndex))
+        result = api.dll.SetEMotor(c_int(api.masterId), c_int(tempSlaveId), byref(emotor), isQueued, byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -2274,16 +2652,17 @@ def SetEMotorS(api, index, isEnabled, speed, distance,  isQueued=0):
     emotorS.speed = speed
     emotorS.distance = distance
     queuedCmdIndex = c_uint64(0)
-    if slaveDevType == DevType.Magician:
-        tempSlaveId = slaveId
-    elif masterDevType == DevType.Conntroller and (slaveDevType == DevType.MagicianLite or slaveDevType == DevType.Idle):
+    if api.slaveDevType == DevType.Magician:
+        tempSlaveId = api.slaveId
+    elif api.masterDevType == DevType.Conntroller and (api.slaveDevType == DevType.MagicianLite or api.slaveDevType == DevType.Idle):
         tempSlaveId = -1
     else:
-        tempSlaveId = slaveId
+        tempSlaveId = api.slaveId
+    retry = RetryState(api, "SetEMotorS")
     while(True):
-        result = api.SetEMotorS(c_int(masterId), c_int(tempSlaveId), byref(emotorS), isQueued, byref(queuedCmdIndex))
+        result = api.dll.SetEMotorS(c_int(api.masterId), c_int(tempSlaveId), byref(emotorS), isQueued, byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -2292,16 +2671,17 @@ def SetEMotorS(api, index, isEnabled, speed, distance,  isQueued=0):
 def GetIOADC(api, addr):
     param = IOADC()
     param.address = addr
-    if slaveDevType == DevType.Magician:
-        tempSlaveId = slaveId
-    elif masterDevType == DevType.Conntroller and (slaveDevType == DevType.MagicianLite or slaveDevType == DevType.Idle):
+    if api.slaveDevType == DevType.Magician:
+        tempSlaveId = api.slaveId
+    elif api.masterDevType == DevType.Conntroller and (api.slaveDevType == DevType.MagicianLite or api.slaveDevType == DevType.Idle):
         tempSlaveId = -1
     else:
-        tempSlaveId = slaveId
+        tempSlaveId = api.slaveId
+    retry = RetryState(api, "GetIOADC")
     while(True):
-        result = api.GetIOADC(c_int(masterId), c_int(tempSlaveId), byref(param))
+        result = api.dll.GetIOADC(c_int(api.masterId), c_int(tempSlaveId), byref(param))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [param.value]
@@ -2310,10 +2690,11 @@ def GetIOADC(api, addr):
 def SetAngleSensorStaticError(api,  rearArmAngleError, frontArmAngleError):
     c_rearArmAngleError = c_float(rearArmAngleError)
     c_frontArmAngleError = c_float(frontArmAngleError)
+    retry = RetryState(api, "SetAngleSensorStaticError")
     while(True):
-        result = api.SetAngleSensorStaticError(c_int(masterId), c_int(slaveId), c_rearArmAngleError, c_frontArmAngleError)
+        result = api.dll.SetAngleSensorStaticError(c_int(api.masterId), c_int(api.slaveId), c_rearArmAngleError, c_frontArmAngleError)
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
         
@@ -2321,10 +2702,11 @@ def SetAngleSensorStaticError(api,  rearArmAngleError, frontArmAngleError):
 def GetAngleSensorStaticError(api):
     rearArmAngleError = c_float(0)
     frontArmAngleError = c_float(0)
+    retry = RetryState(api, "GetAngleSensorStaticError")
     while(True):
-        result = api.GetAngleSensorStaticError(c_int(masterId), c_int(slaveId), byref(rearArmAngleError),  byref(frontArmAngleError))
+        result = api.dll.GetAngleSensorStaticError(c_int(api.masterId), c_int(api.slaveId), byref(rearArmAngleError),  byref(frontArmAngleError))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [rearArmAngleError.value, frontArmAngleError.value]
@@ -2333,10 +2715,11 @@ def GetAngleSensorStaticError(api):
 def SetAngleSensorCoef(api,  rearArmAngleCoef, frontArmAngleCoef):
     c_rearArmAngleCoef = c_float(rearArmAngleCoef)
     c_frontArmAngleCoef = c_float(frontArmAngleCoef)
+    retry = RetryState(api, "SetAngleSensorCoef")
     while(True):
-        result = api.SetAngleSensorCoef(c_int(masterId), c_int(slaveId), c_rearArmAngleCoef, c_frontArmAngleCoef)
+        result = api.dll.SetAngleSensorCoef(c_int(api.masterId), c_int(api.slaveId), c_rearArmAngleCoef, c_frontArmAngleCoef)
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
         
@@ -2344,10 +2727,11 @@ def SetAngleSensorCoef(api,  rearArmAngleCoef, frontArmAngleCoef):
 def GetAngleSensorCoef(api):
     rearArmAngleCoef = c_float(0)
     frontArmAngleCoef = c_float(0)
+    retry = RetryState(api, "GetAngleSensorCoef")
     while(True):
-        result = api.GetAngleSensorCoef(c_int(masterId), c_int(slaveId), byref(rearArmAngleCoef),  byref(frontArmAngleCoef))
+        result = api.dll.GetAngleSensorCoef(c_int(api.masterId), c_int(api.slaveId), byref(rearArmAngleCoef),  byref(frontArmAngleCoef))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [rearArmAngleCoef.value, frontArmAngleCoef.value]
@@ -2355,20 +2739,22 @@ def GetAngleSensorCoef(api):
 
 def SetBaseDecoderStaticError(api,  baseDecoderError):
     c_baseDecoderError = c_float(baseDecoderError)
+    retry = RetryState(api, "SetBaseDecoderStaticError")
     while(True):
-        result = api.SetBaseDecoderStaticError(c_int(masterId), c_int(slaveId), c_baseDecoderError)
+        result = api.dll.SetBaseDecoderStaticError(c_int(api.masterId), c_int(api.slaveId), c_baseDecoderError)
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     
 
 def GetBaseDecoderStaticError(api):
     baseDecoderError = c_float(0)
+    retry = RetryState(api, "GetBaseDecoderStaticError")
     while(True):
-        result = api.GetBaseDecoderStaticError(c_int(masterId), c_int(slaveId), byref(baseDecoderError))
+        result = api.dll.GetBaseDecoderStaticError(c_int(api.masterId), c_int(api.slaveId), byref(baseDecoderError))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [baseDecoderError.value]
@@ -2377,35 +2763,38 @@ def GetBaseDecoderStaticError(api):
 
 def GetWIFIConnectStatus(api):
     isConnected = c_bool(0)
+    retry = RetryState(api, "GetWIFIConnectStatus")
     while(True):
         if not QuitDobotApiFlag:
             break
-        result = api.GetWIFIConnectStatus(c_int(masterId), c_int(slaveId), byref(isConnected))
+        result = api.dll.GetWIFIConnectStatus(c_int(api.masterId), c_int(api.slaveId), byref(isConnected))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [isConnected.value]
 
 def SetWIFIConfigMode(api,  enable):
+    retry = RetryState(api, "SetWIFIConfigMode")
     while(True):
         if not QuitDobotApiFlag:
             break
-        result = api.SetWIFIConfigMode(c_int(masterId), c_int(slaveId), enable)
+        result = api.dll.SetWIFIConfigMode(c_int(api.masterId), c_int(api.slaveId), enable)
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     
 
 def GetWIFIConfigMode(api):
     isEnabled = c_bool(0)
+    retry = RetryState(api, "GetWIFIConfigMode")
     while(True):
         if not QuitDobotApiFlag:
             break
-        result = api.GetWIFIConfigMode(c_int(masterId), c_int(slaveId), byref(isEnabled))
+        result = api.dll.GetWIFIConfigMode(c_int(api.masterId), c_int(api.slaveId), byref(isEnabled))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [isEnabled.value]
@@ -2414,24 +2803,26 @@ def GetWIFIConfigMode(api):
 def SetWIFISSID(api,  ssid):
     szPara = create_string_buffer(len(ssid))
     szPara.raw = ssid.encode("utf-8")
+    retry = RetryState(api, "SetWIFISSID")
     while(True):
         if not QuitDobotApiFlag:
             break
-        result = api.SetWIFISSID(c_int(masterId), c_int(slaveId), szPara)
+        result = api.dll.SetWIFISSID(c_int(api.masterId), c_int(api.slaveId), szPara)
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     
 
 def GetWIFISSID(api):
     szPara = create_string_buffer(100)
+    retry = RetryState(api, "GetWIFISSID")
     while(True):
         if not QuitDobotApiFlag:
             break
-        result = api.GetWIFISSID(c_int(masterId), c_int(slaveId), szPara,  25)
+        result = api.dll.GetWIFISSID(c_int(api.masterId), c_int(api.slaveId), szPara,  25)
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     ssid = szPara.value.decode("utf-8") 
@@ -2441,24 +2832,26 @@ def GetWIFISSID(api):
 def SetWIFIPassword(api,  password):
     szPara = create_string_buffer(25)
     szPara.raw = password.encode("utf-8")
+    retry = RetryState(api, "SetWIFIPassword")
     while(True):
         if not QuitDobotApiFlag:
             break
-        result = api.SetWIFIPassword(c_int(masterId), c_int(slaveId), szPara)
+        result = api.dll.SetWIFIPassword(c_int(api.masterId), c_int(api.slaveId), szPara)
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
         
 
 def GetWIFIPassword(api):
     szPara = create_string_buffer(25)  
+    retry = RetryState(api, "GetWIFIPassword")
     while(True):
         if not QuitDobotApiFlag:
             break
-        result = api.GetWIFIPassword(c_int(masterId), c_int(slaveId), szPara,  25)
+        result = api.dll.GetWIFIPassword(c_int(api.masterId), c_int(api.slaveId), szPara,  25)
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     password = szPara.value.decode("utf-8") 
@@ -2473,24 +2866,26 @@ def SetWIFIIPAddress(api,  dhcp,  addr1,  addr2,  addr3,  addr4):
     wifiIPAddress.addr3 = addr3
     wifiIPAddress.addr4 = addr4
 
+    retry = RetryState(api, "SetWIFIIPAddress")
     while(True):
         if not QuitDobotApiFlag:
             break
-        result = api.SetWIFIIPAddress(c_int(masterId), c_int(slaveId), byref(wifiIPAddress))
+        result = api.dll.SetWIFIIPAddress(c_int(api.masterId), c_int(api.slaveId), byref(wifiIPAddress))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
         
 
 def GetWIFIIPAddress(api):
     wifiIPAddress = WIFIIPAddress()
+    retry = RetryState(api, "GetWIFIIPAddress")
     while(True):
         if not QuitDobotApiFlag:
             break
-        result = api.GetWIFIIPAddress(c_int(masterId), c_int(slaveId), byref(wifiIPAddress))
+        result = api.dll.GetWIFIIPAddress(c_int(api.masterId), c_int(api.slaveId), byref(wifiIPAddress))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [c_uint8(wifiIPAddress.dhcp).value,  c_uint8(wifiIPAddress.addr1).value,  c_uint8(wifiIPAddress.addr2).value,   c_uint8(wifiIPAddress.addr3).value,  c_uint8(wifiIPAddress.addr4).value]
@@ -2502,24 +2897,26 @@ def SetWIFINetmask(api, addr1,  addr2,  addr3,  addr4):
     wifiNetmask.addr2 = addr2
     wifiNetmask.addr3 = addr3
     wifiNetmask.addr4 = addr4
+    retry = RetryState(api, "SetWIFINetmask")
     while(True):
         if not QuitDobotApiFlag:
             break
-        result = api.SetWIFINetmask(c_int(masterId), c_int(slaveId), byref(wifiNetmask))
+        result = api.dll.SetWIFINetmask(c_int(api.masterId), c_int(api.slaveId), byref(wifiNetmask))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
         
 
 def GetWIFINetmask(api):
     wifiNetmask = WIFINetmask()
+    retry = RetryState(api, "GetWIFINetmask")
     while(True):
         if not QuitDobotApiFlag:
             break
-        result = api.GetWIFINetmask(c_int(masterId), c_int(slaveId), byref(wifiNetmask))
+        result = api.dll.GetWIFINetmask(c_int(api.masterId), c_int(api.slaveId), byref(wifiNetmask))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [c_uint8(wifiNetmask.addr1).value,  c_uint8(wifiNetmask.addr2).value,  c_uint8(wifiNetmask.addr3).value,  c_uint8(wifiNetmask.addr4).value]
@@ -2531,24 +2928,26 @@ def SetWIFIGateway(api, addr1,  addr2,  addr3,  addr4):
     wifiGateway.addr2 = addr2
     wifiGateway.addr3 = addr3
     wifiGateway.addr4 = addr4
+    retry = RetryState(api, "SetWIFIGateway")
     while(True):
         if not QuitDobotApiFlag:
             break
-        result = api.SetWIFIGateway(c_int(masterId), c_int(slaveId), byref(wifiGateway))
+        result = api.dll.SetWIFIGateway(c_int(api.masterId), c_int(api.slaveId), byref(wifiGateway))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
 
 
 def GetWIFIGateway(api):
     wifiGateway = WIFIGateway()
+    retry = RetryState(api, "GetWIFIGateway")
     while(True):
         if not QuitDobotApiFlag:
             break
-        result = api.GetWIFIGateway(c_int(masterId), c_int(slaveId), byref(wifiGateway))
+        result = api.dll.GetWIFIGateway(c_int(api.masterId), c_int(api.slaveId), byref(wifiGateway))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [c_uint8(wifiGateway.addr1).value,  c_uint8(wifiGateway.addr2).value,  c_uint8(wifiGateway.addr3).value,  c_uint8(wifiGateway.addr4).value]
@@ -2560,24 +2959,26 @@ def SetWIFIDNS(api, addr1,  addr2,  addr3,  addr4):
     wifiDNS.addr2 = addr2
     wifiDNS.addr3 = addr3
     wifiDNS.addr4 = addr4
+    retry = RetryState(api, "SetWIFIDNS")
     while(True):
         if not QuitDobotApiFlag:
             break
-        result = api.SetWIFIDNS(c_int(masterId), c_int(slaveId), byref(wifiDNS))
+        result = api.dll.SetWIFIDNS(c_int(api.masterId), c_int(api.slaveId), byref(wifiDNS))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
 
 
 def GetWIFIDNS(api):
     wifiDNS = WIFIDNS()
+    retry = RetryState(api, "GetWIFIDNS")
     while(True):
         if not QuitDobotApiFlag:
             break
-        result = api.GetWIFIDNS(c_int(masterId), c_int(slaveId), byref(wifiDNS))
+        result = api.dll.GetWIFIDNS(c_int(api.masterId), c_int(api.slaveId), byref(wifiDNS))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [c_uint8(wifiDNS.addr1).value,  c_uint8(wifiDNS.addr2).value,  c_uint8(wifiDNS.addr3).value,  c_uint8(wifiDNS.addr4).value]
@@ -2588,16 +2989,17 @@ def SetColorSensor(api, isEnable, colorPort, version=0):
     port = c_uint8(colorPort)
     version = c_uint8(version)
     queuedCmdIndex = c_uint64(0)
-    if slaveDevType == DevType.Magician:
-        tempSlaveId = slaveId
-    elif masterDevType == DevType.Conntroller and (slaveDevType == DevType.MagicianLite or slaveDevType == DevType.Idle):
+    if api.slaveDevType == DevType.Magician:
+        tempSlaveId = api.slaveId
+    elif api.masterDevType == DevType.Conntroller and (api.slaveDevType == DevType.MagicianLite or api.slaveDevType == DevType.Idle):
         tempSlaveId = -1
     else:
-        tempSlaveId = slaveId
+        tempSlaveId = api.slaveId
+    retry = RetryState(api, "SetColorSensor")
     while(True):
-        result = api.SetColorSensor(c_int(masterId), c_int(tempSlaveId), enable, port, version, 1, byref(queuedCmdIndex))
+        result = api.dll.SetColorSensor(c_int(api.masterId), c_int(tempSlaveId), enable, port, version, 1, byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     
@@ -2606,16 +3008,17 @@ def GetColorSensor(api):
     r = c_ubyte(0)
     g = c_ubyte(0)
     b = c_ubyte(0)
-    if slaveDevType == DevType.Magician:
-        tempSlaveId = slaveId
-    elif masterDevType == DevType.Conntroller and (slaveDevType == DevType.MagicianLite or slaveDevType == DevType.Idle):
+    if api.slaveDevType == DevType.Magician:
+        tempSlaveId = api.slaveId
+    elif api.masterDevType == DevType.Conntroller and (api.slaveDevType == DevType.MagicianLite or api.slaveDevType == DevType.Idle):
         tempSlaveId = -1
     else:
-        tempSlaveId = slaveId
+        tempSlaveId = api.slaveId
+    retry = RetryState(api, "GetColorSensor")
     while(True):
-        result = api.GetColorSensor(c_int(masterId), c_int(tempSlaveId), byref(r),  byref(g),  byref(b))
+        result = api.dll.GetColorSensor(c_int(api.masterId), c_int(tempSlaveId), byref(r),  byref(g),  byref(b))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [r.value, g.value, b.value]
@@ -2626,16 +3029,17 @@ def SetInfraredSensor(api,  isEnable, infraredPort, version=0):
     port = c_uint8(infraredPort)
     queuedCmdIndex = c_uint64(0)
     version = c_uint8(version)
-    if slaveDevType == DevType.Magician:
-        tempSlaveId = slaveId
-    elif masterDevType == DevType.Conntroller and (slaveDevType == DevType.MagicianLite or slaveDevType == DevType.Idle):
+    if api.slaveDevType == DevType.Magician:
+        tempSlaveId = api.slaveId
+    elif api.masterDevType == DevType.Conntroller and (api.slaveDevType == DevType.MagicianLite or api.slaveDevType == DevType.Idle):
         tempSlaveId = -1
     else:
-        tempSlaveId = slaveId
+        tempSlaveId = api.slaveId
+    retry = RetryState(api, "SetInfraredSensor")
     while(True):
-        result = api.SetInfraredSensor(c_int(masterId), c_int(tempSlaveId), enable, port, version, 1, byref(queuedCmdIndex))
+        result = api.dll.SetInfraredSensor(c_int(api.masterId), c_int(tempSlaveId), enable, port, version, 1, byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     
@@ -2643,16 +3047,17 @@ def SetInfraredSensor(api,  isEnable, infraredPort, version=0):
 def GetInfraredSensor(api, infraredPort):
     port = c_uint8(infraredPort)
     value = c_ubyte(0)
-    if slaveDevType == DevType.Magician:
-        tempSlaveId = slaveId
-    elif masterDevType == DevType.Conntroller and (slaveDevType == DevType.MagicianLite or slaveDevType == DevType.Idle):
+    if api.slaveDevType == DevType.Magician:
+        tempSlaveId = api.slaveId
+    elif api.masterDevType == DevType.Conntroller and (api.slaveDevType == DevType.MagicianLite or api.slaveDevType == DevType.Idle):
         tempSlaveId = -1
     else:
-        tempSlaveId = slaveId
+        tempSlaveId = api.slaveId
+    retry = RetryState(api, "GetInfraredSensor")
     while(True):
-        result = api.GetInfraredSensor(c_int(masterId), c_int(tempSlaveId), port,  byref(value))
+        result = api.dll.GetInfraredSensor(c_int(api.masterId), c_int(tempSlaveId), port,  byref(value))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [value.value]
@@ -2664,10 +3069,11 @@ def GetInfraredSensor(api, infraredPort):
 def SetLostStepParams(api, threshold, isQueued=0):
     queuedCmdIndex = c_uint64(0)
     t = c_float(threshold)
+    retry = RetryState(api, "SetLostStepParams")
     while(True):
-        result = api.SetLostStepParams(c_int(masterId), c_int(slaveId), t, isQueued, byref(queuedCmdIndex))
+        result = api.dll.SetLostStepParams(c_int(api.masterId), c_int(api.slaveId), t, isQueued, byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -2675,10 +3081,11 @@ def SetLostStepParams(api, threshold, isQueued=0):
 
 def SetLostStepCmd(api, isQueued=0):
     queuedCmdIndex = c_uint64(0)
+    retry = RetryState(api, "SetLostStepCmd")
     while(True):
-        result = api.SetLostStepCmd(c_int(masterId), c_int(slaveId), isQueued, byref(queuedCmdIndex))
+        result = api.dll.SetLostStepCmd(c_int(api.masterId), c_int(api.slaveId), isQueued, byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -2686,18 +3093,20 @@ def SetLostStepCmd(api, isQueued=0):
 
 def GetUART4PeripheralsType(api):
     type = c_uint8(0)
-    if (masterDevType == DevType.Conntroller and slaveDevType == DevType.MagicianLite) or (masterDevType == DevType.Conntroller and slaveDevType == DevType.Idle):
+    if (api.masterDevType == DevType.Conntroller and api.slaveDevType == DevType.MagicianLite) or (api.masterDevType == DevType.Conntroller and api.slaveDevType == DevType.Idle):
+        retry = RetryState(api, "GetUART4PeripheralsType")
         while(True):
-            result = api.GetUART4PeripheralsType(c_int(masterId), c_int(-1), byref(type))
+            result = api.dll.GetUART4PeripheralsType(c_int(api.masterId), c_int(-1), byref(type))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(5)
+                retry.backoff(result)
                 continue
             break 
-    elif masterDevType == DevType.Magician:
+    elif api.masterDevType == DevType.Magician:
+        retry = RetryState(api, "GetUART4PeripheralsType")
         while(True):
-            result = api.GetUART4PeripheralsType(c_int(masterId), c_int(slaveId), byref(type))
+            result = api.dll.GetUART4PeripheralsType(c_int(api.masterId), c_int(api.slaveId), byref(type))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(5)
+                retry.backoff(result)
                 continue
             break
     return [type.value]
@@ -2710,20 +3119,22 @@ def GetDeviceVersionEx(api):       #2019.6.25 song 控制盒+Magician Lite时，
     # hwVersion    = c_byte(0)
     deviceVersion1 = DeviceVersion()
     deviceVersion2 = DeviceVersion()
-    if masterDevType == DevType.Conntroller and slaveDevType == DevType.MagicianLite:
+    if api.masterDevType == DevType.Conntroller and api.slaveDevType == DevType.MagicianLite:
         # 2019.09.03 by song 控制盒+magicianLite 返回两个设备的版本信息
+        retry = RetryState(api, "GetDeviceVersion")
         while(True):
-            result = api.GetDeviceVersion(c_int(masterId), c_int(-1), byref(deviceVersion1))
+            result = api.dll.GetDeviceVersion(c_int(api.masterId), c_int(-1), byref(deviceVersion1))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(5)
+                retry.backoff(result)
                 continue
             break
         list_MagicBoxVersion = [deviceVersion1.fw_majorVersion, deviceVersion1.fw_minorVersion, deviceVersion1.fw_revision, deviceVersion1.fw_alphaVersion,
                                 deviceVersion1.hw_majorVersion, deviceVersion1.hw_minorVersion, deviceVersion1.hw_revision, deviceVersion1.hw_alphaVersion]
+        retry = RetryState(api, "GetDeviceVersion")
         while(True):
-            result = api.GetDeviceVersion(c_int(masterId), c_int(slaveId), byref(deviceVersion2))
+            result = api.dll.GetDeviceVersion(c_int(api.masterId), c_int(api.slaveId), byref(deviceVersion2))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(5)
+                retry.backoff(result)
                 continue
             break
         list_MagicianLiteVersion = [deviceVersion2.fw_majorVersion, deviceVersion2.fw_minorVersion, deviceVersion2.fw_revision, deviceVersion2.fw_alphaVersion,
@@ -2749,35 +3160,60 @@ def SetHOMECmdEx(api,  temp,  isQueued=0):
     ret = SetHOMECmd(api, temp,  isQueued)
     queuedCmdIndex = c_uint64(0)
     queuedCmdIndex1 = c_uint64(0)
-    if masterDevType == DevType.Conntroller and slaveDevType == DevType.MagicianLite:
+    if api.masterDevType == DevType.Conntroller and api.slaveDevType == DevType.MagicianLite:
         if isUsingLinearRail:        
+            retry = RetryState(api, "GetQueuedCmdCurrentIndex")
             while(True):
-                result = api.GetQueuedCmdCurrentIndex(c_int(masterId), c_int(-1), byref(queuedCmdIndex1))
-                if result == DobotCommunicate.DobotCommunicate_NoError and ret[1] <= queuedCmdIndex1.value:
+                result = api.dll.GetQueuedCmdCurrentIndex(c_int(api.masterId), c_int(-1), byref(queuedCmdIndex1))
+                if result != DobotCommunicate.DobotCommunicate_NoError:
+                    retry.backoff(result)
+                    continue
+                if ret[1] <= queuedCmdIndex1.value:
                     break
+                retry.reset()
                 dSleep(100)
+            retry = RetryState(api, "GetQueuedCmdCurrentIndex")
             while(True):
-                result = api.GetQueuedCmdCurrentIndex(c_int(masterId), c_int(slaveId), byref(queuedCmdIndex))
-                if result == DobotCommunicate.DobotCommunicate_NoError and ret[0] <= queuedCmdIndex.value:
+                result = api.dll.GetQueuedCmdCurrentIndex(c_int(api.masterId), c_int(api.slaveId), byref(queuedCmdIndex))
+                if result != DobotCommunicate.DobotCommunicate_NoError:
+                    retry.backoff(result)
+                    continue
+                if ret[0] <= queuedCmdIndex.value:
                     break
+                retry.reset()
                 dSleep(100)
         else:
+            retry = RetryState(api, "GetQueuedCmdCurrentIndex")
             while(True):
-                result = api.GetQueuedCmdCurrentIndex(c_int(masterId), c_int(slaveId), byref(queuedCmdIndex))
-                if result == DobotCommunicate.DobotCommunicate_NoError and ret[0] <= queuedCmdIndex.value:
+                result = api.dll.GetQueuedCmdCurrentIndex(c_int(api.masterId), c_int(api.slaveId), byref(queuedCmdIndex))
+                if result != DobotCommunicate.DobotCommunicate_NoError:
+                    retry.backoff(result)
+                    continue
+                if ret[0] <= queuedCmdIndex.value:
                     break
+                retry.reset()
                 dSleep(100)
-    elif masterDevType == DevType.Conntroller and slaveDevType == DevType.Idle: 
+    elif api.masterDevType == DevType.Conntroller and api.slaveDevType == DevType.Idle: 
+        retry = RetryState(api, "GetQueuedCmdCurrentIndex")
         while(True):
-            result = api.GetQueuedCmdCurrentIndex(c_int(masterId), c_int(-1), byref(queuedCmdIndex1))
-            if result == DobotCommunicate.DobotCommunicate_NoError and ret[1] <= queuedCmdIndex1.value:
+            result = api.dll.GetQueuedCmdCurrentIndex(c_int(api.masterId), c_int(-1), byref(queuedCmdIndex1))
+            if result != DobotCommunicate.DobotCommunicate_NoError:
+                retry.backoff(result)
+                continue
+            if ret[1] <= queuedCmdIndex1.value:
                 break
+            retry.reset()
             dSleep(100)
     else:
+        retry = RetryState(api, "GetQueuedCmdCurrentIndex")
         while(True):
-            result = api.GetQueuedCmdCurrentIndex(c_int(masterId), c_int(slaveId), byref(queuedCmdIndex))
-            if result == DobotCommunicate.DobotCommunicate_NoError and ret[0] <= queuedCmdIndex.value:
+            result = api.dll.GetQueuedCmdCurrentIndex(c_int(api.masterId), c_int(api.slaveId), byref(queuedCmdIndex))
+            if result != DobotCommunicate.DobotCommunicate_NoError:
+                retry.backoff(result)
+                continue
+            if ret[0] <= queuedCmdIndex.value:
                 break
+            retry.reset()
             dSleep(100)
         
 def SetWAITCmdEx(api, waitTime, isQueued=0):
@@ -2845,7 +3281,7 @@ def SetPTPCmdEx(api, ptpMode, x, y, z, rHead, isQueued=0):
     
 def SetIOMultiplexingEx(api, address, multiplex, isQueued=0):
     ret = SetIOMultiplexing(api, address, multiplex, isQueued)
-    if masterDevType == DevType.Magician:
+    if api.masterDevType == DevType.Magician:
         while(True):
             if ret[0] <= GetQueuedCmdCurrentIndex(api)[0]:
                 break
@@ -2858,7 +3294,7 @@ def SetIOMultiplexingEx(api, address, multiplex, isQueued=0):
         
 def SetEndEffectorSuctionCupEx(api, enableCtrl,  on, isQueued=0):
     ret = SetEndEffectorSuctionCup(api, enableCtrl,  on, isQueued)
-    if masterDevType == DevType.Magician:
+    if api.masterDevType == DevType.Magician:
         while(True):
             if ret[0] <= GetQueuedCmdCurrentIndex(api)[0]:
                 break
@@ -2871,7 +3307,7 @@ def SetEndEffectorSuctionCupEx(api, enableCtrl,  on, isQueued=0):
 
 def SetEndEffectorGripperEx(api, enableCtrl,  on, isQueued=0):
     ret = SetEndEffectorGripper(api, enableCtrl,  on, isQueued)
-    if masterDevType == DevType.Magician:
+    if api.masterDevType == DevType.Magician:
         while(True):
             if ret[0] <= GetQueuedCmdCurrentIndex(api)[0]:
                 break
@@ -2890,7 +3326,7 @@ def SetEndEffectorLaserEx(api, enableCtrl, power, isQueued=0):
 
 def SetIODOEx(api, address, level, isQueued=0):
     ret = SetIODO(api, address, level, isQueued)
-    if masterDevType == DevType.Magician:
+    if api.masterDevType == DevType.Magician:
         while(True):
             if ret[0] <= GetQueuedCmdCurrentIndex(api)[0]:
                 break
@@ -2903,7 +3339,7 @@ def SetIODOEx(api, address, level, isQueued=0):
         
 def SetEMotorEx(api, index, isEnabled, speed,  isQueued=0):
     ret = SetEMotor(api, index, isEnabled, speed,  isQueued)
-    if masterDevType == DevType.Magician:
+    if api.masterDevType == DevType.Magician:
         while(True):
             if ret[0] <= GetQueuedCmdCurrentIndex(api)[0]:
                 break
@@ -2916,7 +3352,7 @@ def SetEMotorEx(api, index, isEnabled, speed,  isQueued=0):
     
 def SetEMotorSEx(api, index, isEnabled, speed, distance,  isQueued=0):
     ret = SetEMotorS(api, index, isEnabled, speed, distance,   isQueued)
-    if masterDevType == DevType.Magician:
+    if api.masterDevType == DevType.Magician:
         while(True):
             if ret[0] <= GetQueuedCmdCurrentIndex(api)[0]:
                 break
@@ -2929,7 +3365,7 @@ def SetEMotorSEx(api, index, isEnabled, speed, distance,  isQueued=0):
     
 def SetIOPWMEx(api, address, frequency, dutyCycle,  isQueued=0):
     ret = SetIOPWM(api, address, frequency, dutyCycle,  isQueued)
-    if masterDevType == DevType.Magician:
+    if api.masterDevType == DevType.Magician:
         while(True):
             if ret[0] <= GetQueuedCmdCurrentIndex(api)[0]:
                 break
@@ -2958,57 +3394,81 @@ def SetPTPWithLCmdEx(api, ptpMode, x, y, z, rHead,  l, isQueued=0):
     queuedCmdIndex1 = c_uint64(0)
     queuedCmdIndex2 = c_uint64(0)
     # 滑轨的特殊处理
-    if slaveDevType == DevType.Magician:
+    if api.slaveDevType == DevType.Magician:
+        retry = RetryState(api, "SetPTPWithLCmd")
         while(True):
-            result = api.SetPTPWithLCmd(c_int(masterId), c_int(slaveId), byref(cmd), isQueued, byref(queuedCmdIndex))
+            result = api.dll.SetPTPWithLCmd(c_int(api.masterId), c_int(api.slaveId), byref(cmd), isQueued, byref(queuedCmdIndex))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(2)
+                retry.backoff(result)
                 continue
             break
+        retry = RetryState(api, "GetQueuedCmdCurrentIndex")
         while(True):
-            result = api.GetQueuedCmdCurrentIndex(c_int(masterId), c_int(slaveId), byref(queuedCmdIndex1))
-            if result != DobotCommunicate.DobotCommunicate_NoError or queuedCmdIndex1.value < queuedCmdIndex.value:
+            result = api.dll.GetQueuedCmdCurrentIndex(c_int(api.masterId), c_int(api.slaveId), byref(queuedCmdIndex1))
+            if result != DobotCommunicate.DobotCommunicate_NoError:
+                retry.backoff(result)
+                continue
+            if queuedCmdIndex1.value < queuedCmdIndex.value:
+                retry.reset()
                 dSleep(2)
                 continue
             break
-    elif masterDevType == DevType.Conntroller and slaveDevType == DevType.MagicianLite:
+    elif api.masterDevType == DevType.Conntroller and api.slaveDevType == DevType.MagicianLite:
+        retry = RetryState(api, "SetPTPWithLCmd")
         while(True):
-            result = api.SetPTPWithLCmd(c_int(masterId), c_int(-1), byref(cmd), isQueued, byref(queuedCmdIndex))
+            result = api.dll.SetPTPWithLCmd(c_int(api.masterId), c_int(-1), byref(cmd), isQueued, byref(queuedCmdIndex))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(2)
+                retry.backoff(result)
                 continue
             queuedCmdIndex2 = queuedCmdIndex
             break
+        retry = RetryState(api, "GetQueuedCmdCurrentIndex")
         while(True):
-            result = api.GetQueuedCmdCurrentIndex(c_int(masterId), c_int(-1), byref(queuedCmdIndex1))
-            if result != DobotCommunicate.DobotCommunicate_NoError or queuedCmdIndex1.value < queuedCmdIndex2.value:
+            result = api.dll.GetQueuedCmdCurrentIndex(c_int(api.masterId), c_int(-1), byref(queuedCmdIndex1))
+            if result != DobotCommunicate.DobotCommunicate_NoError:
+                retry.backoff(result)
+                continue
+            if queuedCmdIndex1.value < queuedCmdIndex2.value:
+                retry.reset()
                 dSleep(2)
                 continue
             break
 
+        retry = RetryState(api, "SetPTPCmd")
         while(True):
-            result = api.SetPTPCmd(c_int(masterId), c_int(slaveId), byref(cmd), isQueued, byref(queuedCmdIndex))
+            result = api.dll.SetPTPCmd(c_int(api.masterId), c_int(api.slaveId), byref(cmd), isQueued, byref(queuedCmdIndex))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(2)
+                retry.backoff(result)
                 continue
             break
+        retry = RetryState(api, "GetQueuedCmdCurrentIndex")
         while(True):
-            result = api.GetQueuedCmdCurrentIndex(c_int(masterId), c_int(slaveId), byref(queuedCmdIndex1))
-            if result != DobotCommunicate.DobotCommunicate_NoError or queuedCmdIndex1.value < queuedCmdIndex.value:
+            result = api.dll.GetQueuedCmdCurrentIndex(c_int(api.masterId), c_int(api.slaveId), byref(queuedCmdIndex1))
+            if result != DobotCommunicate.DobotCommunicate_NoError:
+                retry.backoff(result)
+                continue
+            if queuedCmdIndex1.value < queuedCmdIndex.value:
+                retry.reset()
                 dSleep(2)
                 continue
             break
     else:
+        retry = RetryState(api, "SetPTPWithLCmd")
         while(True):
-            result = api.SetPTPWithLCmd(c_int(masterId), c_int(-1), byref(cmd), isQueued, byref(queuedCmdIndex))
+            result = api.dll.SetPTPWithLCmd(c_int(api.masterId), c_int(-1), byref(cmd), isQueued, byref(queuedCmdIndex))
             if result != DobotCommunicate.DobotCommunicate_NoError:
-                dSleep(2)
+                retry.backoff(result)
                 continue
             queuedCmdIndex2 = queuedCmdIndex
             break
+        retry = RetryState(api, "GetQueuedCmdCurrentIndex")
         while(True):
-            result = api.GetQueuedCmdCurrentIndex(c_int(masterId), c_int(-1), byref(queuedCmdIndex1))
-            if result != DobotCommunicate.DobotCommunicate_NoError or queuedCmdIndex1.value < queuedCmdIndex.value:
+            result = api.dll.GetQueuedCmdCurrentIndex(c_int(api.masterId), c_int(-1), byref(queuedCmdIndex1))
+            if result != DobotCommunicate.DobotCommunicate_NoError:
+                retry.backoff(result)
+                continue
+            if queuedCmdIndex1.value < queuedCmdIndex.value:
+                retry.reset()
                 dSleep(2)
                 continue
             break
@@ -3048,18 +3508,19 @@ def SetUpgradeFWReadyCmd(api,fwSize, md5):
         print(e)
 
     # # 只发送给主设备
-    # result = api.SetUpgradeFWReadyCmd(c_int(masterId), c_int(-1), byref(upgradeFWReadyCmd))
+    # result = api.dll.SetUpgradeFWReadyCmd(c_int(api.masterId), c_int(-1), byref(upgradeFWReadyCmd))
     # return result
 
     # 不能去掉等待！！！！！！，jomar 2019年5月7日 09:28:30
-    if masterDevType == DevType.Conntroller and (slaveDevType == DevType.MagicianLite or slaveDevType == DevType.Idle):
+    if api.masterDevType == DevType.Conntroller and (api.slaveDevType == DevType.MagicianLite or api.slaveDevType == DevType.Idle):
         tempSlaveId = -1
     else:
-        tempSlaveId = slaveId
+        tempSlaveId = api.slaveId
+    retry = RetryState(api, "SetUpgradeFWReadyCmd")
     while(True):
-        result = api.SetUpgradeFWReadyCmd(c_int(masterId), c_int(tempSlaveId), byref(upgradeFWReadyCmd))
+        result = api.dll.SetUpgradeFWReadyCmd(c_int(api.masterId), c_int(tempSlaveId), byref(upgradeFWReadyCmd))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
 
@@ -3077,18 +3538,19 @@ def GetUpgradeFWReadyCmd(api,fwSize, md5):
         print(e)
 
     # # 只发送给主设备
-    # result = api.SetUpgradeFWReadyCmd(c_int(masterId), c_int(-1), byref(upgradeFWReadyCmd))
+    # result = api.dll.SetUpgradeFWReadyCmd(c_int(api.masterId), c_int(-1), byref(upgradeFWReadyCmd))
     # return result
 
     # 不能去掉等待！！！！！！，jomar 2019年5月7日 09:28:30
-    if masterDevType == DevType.Conntroller and (slaveDevType == DevType.MagicianLite or slaveDevType == DevType.Idle):
+    if api.masterDevType == DevType.Conntroller and (api.slaveDevType == DevType.MagicianLite or api.slaveDevType == DevType.Idle):
         tempSlaveId = -1
     else:
-        tempSlaveId = slaveId
+        tempSlaveId = api.slaveId
+    retry = RetryState(api, "GetUpgradeFWReadyCmd")
     while(True):
-        result = api.GetUpgradeFWReadyCmd(c_int(masterId), c_int(tempSlaveId), byref(upgradeFWReadyCmd), byref(isUpgrade))
+        result = api.dll.GetUpgradeFWReadyCmd(c_int(api.masterId), c_int(tempSlaveId), byref(upgradeFWReadyCmd), byref(isUpgrade))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [isUpgrade.value]
@@ -3118,20 +3580,22 @@ def SetARCCmdEx(api, cirPoint, toPoint, isQueued=1):
 
 
 def SetMotorMode(api, mode):
+    retry = RetryState(api, "SetMotorMode")
     while(True):
-        result = api.SetMotorMode(c_int(masterId), c_int(slaveId), c_int(mode))
+        result = api.dll.SetMotorMode(c_int(api.masterId), c_int(api.slaveId), c_int(mode))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break 
 
 
 def GetMotorMode(api):
     mode = c_int(0)
+    retry = RetryState(api, "GetMotorMode")
     while(True):
-        result = api.GetMotorMode(c_int(masterId), c_int(slaveId), byref(mode))
+        result = api.dll.GetMotorMode(c_int(api.masterId), c_int(api.slaveId), byref(mode))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break 
     return [mode.value]
@@ -3145,10 +3609,11 @@ def SetIOMultiplexingExt(api, address, multiplex, isQueued=0):
     param.address = address
     param.multiplex = multiplex
     queuedCmdIndex = c_uint64(0)
+    retry = RetryState(api, "SetIOMultiplexing")
     while(True):
-        result = api.SetIOMultiplexing(c_int(masterId), c_int(-1), byref(param), isQueued, byref(queuedCmdIndex))
+        result = api.dll.SetIOMultiplexing(c_int(api.masterId), c_int(-1), byref(param), isQueued, byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -3157,10 +3622,11 @@ def SetIOMultiplexingExt(api, address, multiplex, isQueued=0):
 def GetIOMultiplexingExt(api, addr):
     param = IOMultiplexing()
     param.address = addr
+    retry = RetryState(api, "GetIOMultiplexing")
     while(True):
-        result = api.GetIOMultiplexing(c_int(masterId), c_int(-1), byref(param))
+        result = api.dll.GetIOMultiplexing(c_int(api.masterId), c_int(-1), byref(param))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [param.multiplex]
@@ -3169,10 +3635,11 @@ def GetIOMultiplexingExt(api, addr):
 def GetIOADCExt(api, addr):
     param = IOADC()
     param.address = addr
+    retry = RetryState(api, "GetIOADC")
     while(True):
-        result = api.GetIOADC(c_int(masterId), c_int(-1), byref(param))
+        result = api.dll.GetIOADC(c_int(api.masterId), c_int(-1), byref(param))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [param.value]
@@ -3184,10 +3651,11 @@ def SetIOPWMExt(api, address, frequency, dutyCycle,  isQueued=0):
     param.frequency = frequency
     param.dutyCycle = dutyCycle
     queuedCmdIndex = c_uint64(0)
+    retry = RetryState(api, "SetIOPWM")
     while(True):
-        result = api.SetIOPWM(c_int(masterId), c_int(-1), byref(param), isQueued, byref(queuedCmdIndex))
+        result = api.dll.SetIOPWM(c_int(api.masterId), c_int(-1), byref(param), isQueued, byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -3196,10 +3664,11 @@ def SetIOPWMExt(api, address, frequency, dutyCycle,  isQueued=0):
 def GetIOPWMExt(api, addr):
     param = IOPWM()
     param.address = addr
+    retry = RetryState(api, "GetIOPWM")
     while(True):
-        result = api.GetIOPWM(c_int(masterId), c_int(-1), byref(param))
+        result = api.dll.GetIOPWM(c_int(api.masterId), c_int(-1), byref(param))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [param.frequency,  param.dutyCycle]
@@ -3208,10 +3677,11 @@ def GetIOPWMExt(api, addr):
 def GetIODIExt(api, addr):
     param = IODI()
     param.address = addr
+    retry = RetryState(api, "GetIODI")
     while(True):
-        result = api.GetIODI(c_int(masterId), c_int(-1), byref(param))
+        result = api.dll.GetIODI(c_int(api.masterId), c_int(-1), byref(param))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [param.level]
@@ -3222,10 +3692,11 @@ def SetIODOExt(api, address, level, isQueued=0):
     param.address = address
     param.level = level
     queuedCmdIndex = c_uint64(0)
+    retry = RetryState(api, "SetIODO")
     while(True):
-        result = api.SetIODO(c_int(masterId), c_int(-1), byref(param), isQueued, byref(queuedCmdIndex))
+        result = api.dll.SetIODO(c_int(api.masterId), c_int(-1), byref(param), isQueued, byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -3234,10 +3705,11 @@ def SetIODOExt(api, address, level, isQueued=0):
 def GetIODOExt(api, addr):
     param = IODO()
     param.address = addr
+    retry = RetryState(api, "GetIODO")
     while(True):
-        result = api.GetIODO(c_int(masterId), c_int(-1), byref(param))
+        result = api.dll.GetIODO(c_int(api.masterId), c_int(-1), byref(param))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [param.level]
@@ -3249,10 +3721,11 @@ def SetEMotorExt(api, index, isEnabled, speed, isQueued=0):
     emotor.isEnabled = isEnabled
     emotor.speed = speed
     queuedCmdIndex = c_uint64(0)
+    retry = RetryState(api, "SetEMotor")
     while (True):
-        result = api.SetEMotor(c_int(masterId), c_int(-1), byref(emotor), isQueued, byref(queuedCmdIndex))
+        result = api.dll.SetEMotor(c_int(api.masterId), c_int(-1), byref(emotor), isQueued, byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -3265,10 +3738,11 @@ def SetEMotorSExt(api, index, isEnabled, speed, distance, isQueued=0):
     emotorS.speed = speed
     emotorS.distance = distance
     queuedCmdIndex = c_uint64(0)
+    retry = RetryState(api, "SetEMotorS")
     while (True):
-        result = api.SetEMotorS(c_int(masterId), c_int(-1), byref(emotorS), isQueued, byref(queuedCmdIndex))
+        result = api.dll.SetEMotorS(c_int(api.masterId), c_int(-1), byref(emotorS), isQueued, byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -3279,10 +3753,11 @@ def SetColorSensorExt(api, isEnable, colorPort, version=0, isQueued=0):
     port = c_uint8(colorPort)
     version = c_uint8(version)
     queuedCmdIndex = c_uint64(0)
+    retry = RetryState(api, "SetColorSensor")
     while(True):
-        result = api.SetColorSensor(c_int(masterId), c_int(-1), enable, port, version, isQueued, byref(queuedCmdIndex))
+        result = api.dll.SetColorSensor(c_int(api.masterId), c_int(-1), enable, port, version, isQueued, byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -3293,10 +3768,11 @@ def SetInfraredSensorExt(api,  isEnable, infraredPort, version=0, isQueued=0):
     port = c_uint8(infraredPort)
     version = c_uint8(version)
     queuedCmdIndex = c_uint64(0)
+    retry = RetryState(api, "SetInfraredSensor")
     while(True):
-        result = api.SetInfraredSensor(c_int(masterId), c_int(-1), enable, port, version, isQueued, byref(queuedCmdIndex))
+        result = api.dll.SetInfraredSensor(c_int(api.masterId), c_int(-1), enable, port, version, isQueued, byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -3306,10 +3782,11 @@ def GetInfraredSensorExt(api, infraredPort):
     port = c_uint8(infraredPort)
     value = c_ubyte(0)
     
+    retry = RetryState(api, "GetInfraredSensor")
     while(True):
-        result = api.GetInfraredSensor(c_int(masterId), c_int(-1), port,  byref(value))
+        result = api.dll.GetInfraredSensor(c_int(api.masterId), c_int(-1), port,  byref(value))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [value.value]
@@ -3319,10 +3796,11 @@ def GetColorSensorExt(api, index):
     r = c_ubyte(0)
     g = c_ubyte(0)
     b = c_ubyte(0)
+    retry = RetryState(api, "GetColorSensor")
     while(True):
-        result = api.GetColorSensor(c_int(masterId), c_int(-1), byref(r),  byref(g),  byref(b))
+        result = api.dll.GetColorSensor(c_int(api.masterId), c_int(-1), byref(r),  byref(g),  byref(b))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [r.value, g.value, b.value][index]
@@ -3331,7 +3809,7 @@ def GetColorSensorExt(api, index):
 
 def SetIOMultiplexingExtEx(api, address, multiplex, isQueued=0):
     ret = SetIOMultiplexingExt(api, address, multiplex, isQueued)
-    if masterDevType == DevType.Magician:
+    if api.masterDevType == DevType.Magician:
         while(True):
             if ret[0] <= GetQueuedCmdCurrentIndex(api)[0]:
                 break
@@ -3344,7 +3822,7 @@ def SetIOMultiplexingExtEx(api, address, multiplex, isQueued=0):
 
 def SetIOPWMExtEx(api, address, frequency, dutyCycle,  isQueued=0):
     ret = SetIOPWMExt(api, address, frequency, dutyCycle,  isQueued)
-    if masterDevType == DevType.Magician:
+    if api.masterDevType == DevType.Magician:
         while(True):
             if ret[0] <= GetQueuedCmdCurrentIndex(api)[0]:
                 break
@@ -3358,7 +3836,7 @@ def SetIOPWMExtEx(api, address, frequency, dutyCycle,  isQueued=0):
 
 def SetIODOExtEx(api, address, level, isQueued=0):
     ret = SetIODOExt(api, address, level, isQueued)
-    if masterDevType == DevType.Magician:
+    if api.masterDevType == DevType.Magician:
         while(True):
             if ret[0] <= GetQueuedCmdCurrentIndex(api)[0]:
                 break
@@ -3372,7 +3850,7 @@ def SetIODOExtEx(api, address, level, isQueued=0):
 
 def SetEMotorExtEx(api, index, isEnabled, speed, isQueued=0):
     ret = SetEMotorExt(api, index, isEnabled, speed, isQueued)
-    if masterDevType == DevType.Magician:
+    if api.masterDevType == DevType.Magician:
         while(True):
             if ret[0] <= GetQueuedCmdCurrentIndex(api)[0]:
                 break
@@ -3386,7 +3864,7 @@ def SetEMotorExtEx(api, index, isEnabled, speed, isQueued=0):
 
 def SetEMotorSExtEx(api, index, isEnabled, speed, distance, isQueued=0):
     ret = SetEMotorSExt(api, index, isEnabled, speed, distance, isQueued)
-    if masterDevType == DevType.Magician:
+    if api.masterDevType == DevType.Magician:
         while(True):
             if ret[0] <= GetQueuedCmdCurrentIndex(api)[0]:
                 break
@@ -3400,7 +3878,7 @@ def SetEMotorSExtEx(api, index, isEnabled, speed, distance, isQueued=0):
 
 def SetColorSensorExtEx(api, isEnable, colorPort, version=0, isQueued=0):
     ret = SetColorSensorExt(api, isEnable, colorPort, version, isQueued)
-    if masterDevType == DevType.Magician:
+    if api.masterDevType == DevType.Magician:
         while(True):
             if ret[0] <= GetQueuedCmdCurrentIndex(api)[0]:
                 break
@@ -3414,7 +3892,7 @@ def SetColorSensorExtEx(api, isEnable, colorPort, version=0, isQueued=0):
 
 def SetInfraredSensorExtEx(api,  isEnable, infraredPort, version=0, isQueued=0):
     ret = SetInfraredSensorExt(api,  isEnable, infraredPort, version, isQueued)
-    if masterDevType == DevType.Magician:
+    if api.masterDevType == DevType.Magician:
         while(True):
             if ret[0] <= GetQueuedCmdCurrentIndex(api)[0]:
                 break
@@ -3433,16 +3911,17 @@ def GetSeeedColorSensorExt(api):
     g = c_ushort(0)
     b = c_ushort(0)
     Cct = c_ushort(0)
-    if slaveDevType == DevType.Magician:
-        tempSlaveId = slaveId
-    elif masterDevType == DevType.Conntroller and (slaveDevType == DevType.MagicianLite or slaveDevType == DevType.Idle):
+    if api.slaveDevType == DevType.Magician:
+        tempSlaveId = api.slaveId
+    elif api.masterDevType == DevType.Conntroller and (api.slaveDevType == DevType.MagicianLite or api.slaveDevType == DevType.Idle):
         tempSlaveId = -1
     else:
-        tempSlaveId = slaveId
+        tempSlaveId = api.slaveId
+    retry = RetryState(api, "GetSeeedColorSensor")
     while(True):
-        result = api.GetSeeedColorSensor(c_int(masterId), c_int(tempSlaveId), byref(r),  byref(g),  byref(b), byref(Cct))
+        result = api.dll.GetSeeedColorSensor(c_int(api.masterId), c_int(tempSlaveId), byref(r),  byref(g),  byref(b), byref(Cct))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [r.value, g.value, b.value, Cct.value]
@@ -3451,16 +3930,17 @@ def GetSeeedColorSensorExt(api):
 def SetSeeedColorSensorExt(api, SeeedPort,isQueued=0):
     queuedCmdIndex = c_uint64(0)
     port = c_uint8(SeeedPort)
-    if slaveDevType == DevType.Magician:
-        tempSlaveId = slaveId
-    elif masterDevType == DevType.Conntroller and (slaveDevType == DevType.MagicianLite or slaveDevType == DevType.Idle):
+    if api.slaveDevType == DevType.Magician:
+        tempSlaveId = api.slaveId
+    elif api.masterDevType == DevType.Conntroller and (api.slaveDevType == DevType.MagicianLite or api.slaveDevType == DevType.Idle):
         tempSlaveId = -1
     else:
-        tempSlaveId = slaveId
+        tempSlaveId = api.slaveId
+    retry = RetryState(api, "SetSeeedColorSensor")
     while(True):
-        result = api.SetSeeedColorSensor(c_int(masterId), c_int(tempSlaveId), port, isQueued, byref(queuedCmdIndex))
+        result = api.dll.SetSeeedColorSensor(c_int(api.masterId), c_int(tempSlaveId), port, isQueued, byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -3469,16 +3949,17 @@ def SetSeeedColorSensorExt(api, SeeedPort,isQueued=0):
 def GetSeeedDistanceSensorExt(api, SeeedPort):
     port = c_uint8(SeeedPort)
     distance = c_ubyte(0)
-    if slaveDevType == DevType.Magician:
-        tempSlaveId = slaveId
-    elif masterDevType == DevType.Conntroller and (slaveDevType == DevType.MagicianLite or slaveDevType == DevType.Idle):
+    if api.slaveDevType == DevType.Magician:
+        tempSlaveId = api.slaveId
+    elif api.masterDevType == DevType.Conntroller and (api.slaveDevType == DevType.MagicianLite or api.slaveDevType == DevType.Idle):
         tempSlaveId = -1
     else:
-        tempSlaveId = slaveId
+        tempSlaveId = api.slaveId
+    retry = RetryState(api, "GetSeeedDistanceSensor")
     while(True):
-        result = api.GetSeeedDistanceSensor(c_int(masterId), c_int(tempSlaveId), port, byref(distance))
+        result = api.dll.GetSeeedDistanceSensor(c_int(api.masterId), c_int(tempSlaveId), port, byref(distance))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [distance.value]
@@ -3487,16 +3968,17 @@ def GetSeeedDistanceSensorExt(api, SeeedPort):
 def SetSeeedTempSensorExt(api, SeeedPort, isQueued=0):
     port = c_uint8(SeeedPort)
     queuedCmdIndex = c_uint64(0)
-    if slaveDevType == DevType.Magician:
-        tempSlaveId = slaveId
-    elif masterDevType == DevType.Conntroller and (slaveDevType == DevType.MagicianLite or slaveDevType == DevType.Idle):
+    if api.slaveDevType == DevType.Magician:
+        tempSlaveId = api.slaveId
+    elif api.masterDevType == DevType.Conntroller and (api.slaveDevType == DevType.MagicianLite or api.slaveDevType == DevType.Idle):
         tempSlaveId = -1
     else:
-        tempSlaveId = slaveId
+        tempSlaveId = api.slaveId
+    retry = RetryState(api, "SetSeeedTempSensor")
     while(True):
-        result = api.SetSeeedTempSensor(c_int(masterId), c_int(tempSlaveId), port, isQueued, byref(queuedCmdIndex))
+        result = api.dll.SetSeeedTempSensor(c_int(api.masterId), c_int(tempSlaveId), port, isQueued, byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -3505,16 +3987,17 @@ def SetSeeedTempSensorExt(api, SeeedPort, isQueued=0):
 def GetSeeedTempSensorExt(api):
     tem = c_ushort(0)
     hum = c_ushort(0)
-    if slaveDevType == DevType.Magician:
-        tempSlaveId = slaveId
-    elif masterDevType == DevType.Conntroller and (slaveDevType == DevType.MagicianLite or slaveDevType == DevType.Idle):
+    if api.slaveDevType == DevType.Magician:
+        tempSlaveId = api.slaveId
+    elif api.masterDevType == DevType.Conntroller and (api.slaveDevType == DevType.MagicianLite or api.slaveDevType == DevType.Idle):
         tempSlaveId = -1
     else:
-        tempSlaveId = slaveId
+        tempSlaveId = api.slaveId
+    retry = RetryState(api, "GetSeeedTempSensor")
     while(True):
-        result = api.GetSeeedTempSensor(c_int(masterId), c_int(tempSlaveId), byref(tem),  byref(hum))
+        result = api.dll.GetSeeedTempSensor(c_int(api.masterId), c_int(tempSlaveId), byref(tem),  byref(hum))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [tem.value, hum.value]
@@ -3523,16 +4006,17 @@ def GetSeeedTempSensorExt(api):
 def SetSeeedLightSensorExt(api, SeeedPort, isQueued=0):
     port = c_uint8(SeeedPort)
     queuedCmdIndex = c_uint64(0)
-    if slaveDevType == DevType.Magician:
-        tempSlaveId = slaveId
-    elif masterDevType == DevType.Conntroller and (slaveDevType == DevType.MagicianLite or slaveDevType == DevType.Idle):
+    if api.slaveDevType == DevType.Magician:
+        tempSlaveId = api.slaveId
+    elif api.masterDevType == DevType.Conntroller and (api.slaveDevType == DevType.MagicianLite or api.slaveDevType == DevType.Idle):
         tempSlaveId = -1
     else:
-        tempSlaveId = slaveId
+        tempSlaveId = api.slaveId
+    retry = RetryState(api, "SetSeeedLightSensor")
     while(True):
-        result = api.SetSeeedLightSensor(c_int(masterId), c_int(tempSlaveId), port, isQueued, byref(queuedCmdIndex))
+        result = api.dll.SetSeeedLightSensor(c_int(api.masterId), c_int(tempSlaveId), port, isQueued, byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -3540,16 +4024,17 @@ def SetSeeedLightSensorExt(api, SeeedPort, isQueued=0):
 
 def GetSeeedLightSensorExt(api):
     lux = c_ushort(0)
-    if slaveDevType == DevType.Magician:
-        tempSlaveId = slaveId
-    elif masterDevType == DevType.Conntroller and (slaveDevType == DevType.MagicianLite or slaveDevType == DevType.Idle):
+    if api.slaveDevType == DevType.Magician:
+        tempSlaveId = api.slaveId
+    elif api.masterDevType == DevType.Conntroller and (api.slaveDevType == DevType.MagicianLite or api.slaveDevType == DevType.Idle):
         tempSlaveId = -1
     else:
-        tempSlaveId = slaveId
+        tempSlaveId = api.slaveId
+    retry = RetryState(api, "GetSeeedLightSensor")
     while(True):
-        result = api.GetSeeedLightSensor(c_int(masterId), c_int(tempSlaveId), byref(lux))
+        result = api.dll.GetSeeedLightSensor(c_int(api.masterId), c_int(tempSlaveId), byref(lux))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [lux.value]
@@ -3559,16 +4044,17 @@ def SetSeeedRgbExt(api, SeeedPort, Rgb, isQueued=0):
     port = c_ubyte(SeeedPort)
     rgb = c_float(Rgb)
     queuedCmdIndex = c_uint64(0)
-    if slaveDevType == DevType.Magician:
-        tempSlaveId = slaveId
-    elif masterDevType == DevType.Conntroller and (slaveDevType == DevType.MagicianLite or slaveDevType == DevType.Idle):
+    if api.slaveDevType == DevType.Magician:
+        tempSlaveId = api.slaveId
+    elif api.masterDevType == DevType.Conntroller and (api.slaveDevType == DevType.MagicianLite or api.slaveDevType == DevType.Idle):
         tempSlaveId = -1
     else:
-        tempSlaveId = slaveId
+        tempSlaveId = api.slaveId
+    retry = RetryState(api, "SetSeeedRgb")
     while(True):
-        result = api.SetSeeedRgb(c_int(masterId), c_int(tempSlaveId), port, rgb, isQueued, byref(queuedCmdIndex))
+        result = api.dll.SetSeeedRgb(c_int(api.masterId), c_int(tempSlaveId), port, rgb, isQueued, byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -3577,7 +4063,7 @@ def SetSeeedRgbExt(api, SeeedPort, Rgb, isQueued=0):
 
 def SetSeeedColorSensorExtEx(api, SeeedPort,isQueued=0):
     ret = SetSeeedColorSensorExt(api, SeeedPort, isQueued)
-    if masterDevType == DevType.Magician:
+    if api.masterDevType == DevType.Magician:
         while(True):
             if ret[0] <= GetQueuedCmdCurrentIndex(api)[0]:
                 break
@@ -3591,7 +4077,7 @@ def SetSeeedColorSensorExtEx(api, SeeedPort,isQueued=0):
 
 def SetSeeedTempSensorExtEx(api, SeeedPort, isQueued=0):
     ret = SetSeeedTempSensorExt(api, SeeedPort, isQueued)
-    if masterDevType == DevType.Magician:
+    if api.masterDevType == DevType.Magician:
         while(True):
             if ret[0] <= GetQueuedCmdCurrentIndex(api)[0]:
                 break
@@ -3605,7 +4091,7 @@ def SetSeeedTempSensorExtEx(api, SeeedPort, isQueued=0):
 
 def SetSeeedLightSensorExtEx(api, SeeedPort, isQueued=0):
     ret = SetSeeedLightSensorExt(api, SeeedPort, isQueued)
-    if masterDevType == DevType.Magician:
+    if api.masterDevType == DevType.Magician:
         while(True):
             if ret[0] <= GetQueuedCmdCurrentIndex(api)[0]:
                 break
@@ -3619,7 +4105,7 @@ def SetSeeedLightSensorExtEx(api, SeeedPort, isQueued=0):
 
 def SetSeeedRgbExtEx(api, SeeedPort, Rgb, isQueued=0):
     ret = SetSeeedRgbExt(api, SeeedPort, Rgb, isQueued)
-    if masterDevType == DevType.Magician:
+    if api.masterDevType == DevType.Magician:
         while(True):
             if ret[0] <= GetQueuedCmdCurrentIndex(api)[0]:
                 break
@@ -3632,10 +4118,11 @@ def SetSeeedRgbExtEx(api, SeeedPort, Rgb, isQueued=0):
     
 
 def RestartMagicBox(api):
+    retry = RetryState(api, "RestartMagicBox")
     while(True):
-        result = api.RestartMagicBox(c_int(masterId), c_int(-1))
+        result = api.dll.RestartMagicBox(c_int(api.masterId), c_int(-1))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
 
@@ -3645,10 +4132,11 @@ def RestartMagicBox(api):
 
 def SetLostStepEnableAndParamsCmd(api, enable, threshlod, isQueued=0):
     queuedCmdIndex = c_uint64(0)
+    retry = RetryState(api, "SetLostStepEnableAndParamsCmd")
     while(True):
-        result = api.SetLostStepEnableAndParamsCmd(c_int(masterId), c_int(slaveId), c_uint8(enable), c_float(threshlod), isQueued, byref(queuedCmdIndex))
+        result = api.dll.SetLostStepEnableAndParamsCmd(c_int(api.masterId), c_int(api.slaveId), c_uint8(enable), c_float(threshlod), isQueued, byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -3657,10 +4145,11 @@ def SetLostStepEnableAndParamsCmd(api, enable, threshlod, isQueued=0):
 def GetLostStepEnableAndParamsCmd(api):
     enable = c_uint8(0)
     threshlod = c_float(0)
+    retry = RetryState(api, "GetLostStepEnableAndParamsCmd")
     while(True):
-        result = api.GetLostStepEnableAndParamsCmd(c_int(masterId), c_int(slaveId), byref(enable), byref(threshlod))
+        result = api.dll.GetLostStepEnableAndParamsCmd(c_int(api.masterId), c_int(api.slaveId), byref(enable), byref(threshlod))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [enable.value, threshlod.value]
@@ -3669,10 +4158,11 @@ def GetLostStepEnableAndParamsCmd(api):
 
 def SetEndEffectorType(api, endType=0, isQueued=0):
     queuedCmdIndex = c_uint64(0)
+    retry = RetryState(api, "SetEndEffectorType")
     while(True):
-        result = api.SetEndEffectorType(c_int(masterId), c_int(slaveId), isQueued, c_uint8(endType), byref(queuedCmdIndex))
+        result = api.dll.SetEndEffectorType(c_int(api.masterId), c_int(api.slaveId), isQueued, c_uint8(endType), byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break  
     return[queuedCmdIndex.value]
@@ -3680,10 +4170,11 @@ def SetEndEffectorType(api, endType=0, isQueued=0):
 
 def GetEndEffectorType(api):
     endType = c_uint8(0)
+    retry = RetryState(api, "GetEndEffectorType")
     while(True):
-        result = api.GetEndEffectorType(c_int(masterId), c_int(slaveId), byref(endType))
+        result = api.dll.GetEndEffectorType(c_int(api.masterId), c_int(api.slaveId), byref(endType))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [endType.value]
@@ -3691,10 +4182,11 @@ def GetEndEffectorType(api):
 
 def SetServoAngle(api, servoId, angle, isQueued=0):
     queuedCmdIndex = c_uint64(0)
+    retry = RetryState(api, "SetServoAngle")
     while(True):
-        result = api.SetServoAngle(c_int(masterId), c_int(-1), isQueued, c_uint8(servoId), c_float(angle), byref(queuedCmdIndex))
+        result = api.dll.SetServoAngle(c_int(api.masterId), c_int(-1), isQueued, c_uint8(servoId), c_float(angle), byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break 
     return [queuedCmdIndex.value]
@@ -3702,10 +4194,11 @@ def SetServoAngle(api, servoId, angle, isQueued=0):
 
 def GetServoAngle(api, servoId):
     angle = c_float(0)
+    retry = RetryState(api, "GetServoAngle")
     while(True):
-        result = api.GetServoAngle(c_int(masterId), c_int(-1),  c_uint8(servoId) ,byref(angle))
+        result = api.dll.GetServoAngle(c_int(api.masterId), c_int(-1),  c_uint8(servoId) ,byref(angle))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [angle.value]
@@ -3713,10 +4206,11 @@ def GetServoAngle(api, servoId):
 
 def SetArmSpeedRatio(api, paramsMode, speedRatio, isQueued=0):
     queuedCmdIndex = c_uint64(0)
+    retry = RetryState(api, "SetArmSpeedRatio")
     while(True):
-        result = api.SetArmSpeedRatio(c_int(masterId), c_int(slaveId), isQueued, c_uint8(paramsMode), c_uint8(speedRatio),  byref(queuedCmdIndex))
+        result = api.dll.SetArmSpeedRatio(c_int(api.masterId), c_int(api.slaveId), isQueued, c_uint8(paramsMode), c_uint8(speedRatio),  byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break 
     return [queuedCmdIndex.value]
@@ -3725,10 +4219,11 @@ def SetArmSpeedRatio(api, paramsMode, speedRatio, isQueued=0):
 def GetArmSpeedRatio(api, paramsMode=0):
     speedRatio = c_uint8(0)
     # paramsMode = c_uint8(0)
+    retry = RetryState(api, "GetArmSpeedRatio")
     while(True):
-        result = api.GetArmSpeedRatio(c_int(masterId), c_int(slaveId),  c_uint8(paramsMode), byref(speedRatio))
+        result = api.dll.GetArmSpeedRatio(c_int(api.masterId), c_int(api.slaveId),  c_uint8(paramsMode), byref(speedRatio))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return[speedRatio.value]
@@ -3736,10 +4231,11 @@ def GetArmSpeedRatio(api, paramsMode=0):
 
 def SetLSpeedRatio(api, paramsMode, speedRatio, isQueued=0):
     queuedCmdIndex = c_uint64(0)
+    retry = RetryState(api, "SetLSpeedRatio")
     while(True):
-        result = api.SetLSpeedRatio(c_int(masterId), c_int(-1), isQueued, c_uint8(paramsMode), c_uint8(speedRatio), byref(queuedCmdIndex))
+        result = api.dll.SetLSpeedRatio(c_int(api.masterId), c_int(-1), isQueued, c_uint8(paramsMode), c_uint8(speedRatio), byref(queuedCmdIndex))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return [queuedCmdIndex.value]
@@ -3747,10 +4243,11 @@ def SetLSpeedRatio(api, paramsMode, speedRatio, isQueued=0):
 
 def GetLSpeedRatio(api, paramsMode):
     speedRatio = c_uint8(0)
+    retry = RetryState(api, "GetLSpeedRatio")
     while(True):
-        result = api.GetLSpeedRatio(c_int(masterId), c_int(-1), c_uint8(paramsMode), byref(speedRatio))
+        result = api.dll.GetLSpeedRatio(c_int(api.masterId), c_int(-1), c_uint8(paramsMode), byref(speedRatio))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
     return[speedRatio.value]
@@ -3759,19 +4256,21 @@ def GetLSpeedRatio(api, paramsMode):
 def PrintInfo(api, info):
     szPara = create_string_buffer(len(info))
     szPara.raw = info.encode("utf-8")
+    retry = RetryState(api, "PrintInfo")
     while(True):
-        result = api.PrintInfo(c_int(masterId), c_int(-1), szPara)
+        result = api.dll.PrintInfo(c_int(api.masterId), c_int(-1), szPara)
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
 
 
 def SetProgbar(api, progbar):
+    retry = RetryState(api, "SetProgbar")
     while(True):
-        result = api.SetProgbar(c_int(masterId), c_int(-1), c_uint8(progbar))
+        result = api.dll.SetProgbar(c_int(api.masterId), c_int(-1), c_uint8(progbar))
         if result != DobotCommunicate.DobotCommunicate_NoError:
-            dSleep(5)
+            retry.backoff(result)
             continue
         break
 
@@ -3807,3 +4306,11 @@ def SetLSpeedRatioEx(api, paramsMode, speedRatio, isQueued=1):
         if ret[0] <= GetQueuedCmdCurrentIndex(api)[1]:
             break
         dSleep(5)
+
+
+#将所有接口函数绑定为DobotSession的方法
+#Bind every api wrapper as a DobotSession method
+for _name, _func in list(globals().items()):
+    if isinstance(_func, FunctionType) and _func.__code__.co_varnames[:1] == ("api",):
+        setattr(DobotSession, _name, _func)
+del _name, _func
@@ -0,0 +1,111 @@
+# DobotPool.py
+import time
+import threading
+from ctypes import c_int, c_uint64, byref
+
+import DobotDllType as dType
+
+BAUDRATE = 115200
+
+
+class DobotConnectionPool:
+    """Keeps one DobotSession open per COM port across MES cycles.
+
+    The DLL is loaded once. Before each job the session is health-checked
+    with a single GetQueuedCmdCurrentIndex round trip and only reconnected
+    when that check fails.
+    """
+
+    def __init__(self, baudrate=BAUDRATE):
+        self.baudrate = baudrate
+        self.dll = dType.loadLibrary()
+        self.sessions = {}
+        self.lock = threading.Lock()
+        self.port_locks = {}
+        # port -> list of (acquire seconds, reconnected) per cycle
+        self.cycle_stats = {}
+
+    def _port_lock(self, port):
+        with self.lock:
+            return self.port_locks.setdefault(port, threading.Lock())
+
+    def is_healthy(self, api):
+        """One raw query without the wrapper's retry loop."""
+        index = c_uint64(0)
+        result = api.dll.GetQueuedCmdCurrentIndex(c_int(api.masterId), c_int(api.slaveId), byref(index))
+        return result == dType.DobotCommunicate.DobotCommunicate_NoError
+
+    def _connect(self, port):
+        api = dType.DobotSession(self.dll)
+        state = api.connect(port, self.baudrate)[0]
+        if state != dType.DobotConnect.DobotConnect_NoError:
+            raise ConnectionError(f"[{port}] Connect failed, state={state}")
+        try:
+            dType.SetQueuedCmdClear(api)
+        except Exception:
+            # Release the port, or every reconnect after this finds it occupied
+            self._disconnect(api)
+            raise
+        print(f"[{port}] Connected.")
+        return api
+
+    def acquire(self, port):
+        """Return a healthy session for port, connecting only if needed."""
+        with self._port_lock(port):
+            t0 = time.monotonic()
+            api = self.sessions.get(port)
+            reconnected = False
+            if api is None or not self.is_healthy(api):
+                if api is not None:
+                    print(f"[{port}] Health check failed. Reconnecting.")
+                    self._disconnect(api)
+                api = self._connect(port)
+                self.sessions[port] = api
+                reconnected = True
+            elapsed = time.monotonic() - t0
+            self.cycle_stats.setdefault(port, []).append((elapsed, reconnected))
+            print(f"[{port}] Session ready in {elapsed * 1000:.1f} ms ({'connected' if reconnected else 'reused'}).")
+            return api
+
+    def invalidate(self, port):
+        """Drop a session after a failed job so the next cycle reconnects."""
+        with self._port_lock(port):
+            api = self.sessions.pop(port, None)
+            if api is not None:
+                self._disconnect(api)
+
+    def _disconnect(self, api):
+        try:
+            dType.DisconnectDobot(api)
+        except Exception as e:
+            print(f"[{api.portName}] Disconnect error: {e}")
+
+    def close_all(self):
+        with self.lock:
+            ports = list(self.sessions)
+        for port in ports:
+            self.invalidate(port)
+            print(f"[{port}] Disconnected.")
+
+    def metrics(self):
+        """Per-port connect-time summary and the time saved by reuse."""
+        report = {}
+        for port, stats in self.cycle_stats.items():
+            connects = [s for s, reconnected in stats if reconnected]
+            reuses = [s for s, reconnected in stats if not reconnected]
+            mean_connect = sum(connects) / len(connects) if connects else 0.0
+            mean_reuse = sum(reuses) / len(reuses) if reuses else 0.0
+            report[port] = {
+                "cycles": len(stats),
+                "connects": len(connects),
+                "mean_connect_ms": mean_connect * 1000,
+                "mean_reuse_ms": mean_reuse * 1000,
+                "saved_ms": len(reuses) * (mean_connect - mean_reuse) * 1000,
+            }
+        return report
+
+    def print_metrics(self):
+        for port, m in self.metrics().items():
+            print(f"[{port}] cycles={m['cycles']} connects={m['connects']} "
+                  f"connect={m['mean_connect_ms']:.1f} ms reuse={m['mean_reuse_ms']:.1f} ms "
+                  f"saved={m['saved_ms']:.0f} ms")
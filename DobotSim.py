@@ -0,0 +1,464 @@
+# DobotSim.py
+import itertools
+import math
+import time
+import threading
+from collections import deque
+from ctypes import byref, c_uint64, memmove, sizeof, Structure
+
+import DobotDllType as dType
+from Kinematics import inverse_kinematics as inverseKinematics, in_workspace as inWorkspace
+from MotionModel import COMMAND_LATENCY, MotionModel, trapezoidTime
+
+# Commands the controller queue holds before SetXXX returns BufferFull
+QUEUE_CAPACITY = 32
+# Duration of SetHOMECmd, in seconds
+HOME_TIME = 15.0
+
+ARG_REF = type(byref(c_uint64(0)))
+
+
+class QueuedCmd(object):
+    __slots__ = ("index", "duration", "start", "target", "apply")
+
+    def __init__(self, index, duration, start=None, target=None, apply=None):
+        self.index = index
+        self.duration = duration
+        self.start = start
+        self.target = target
+        self.apply = apply
+
+
+class SimulatedArm(MotionModel):
+    """State of one simulated Magician: pose, parameters and command queue.
+
+    The queue runs on the caller's clock: every call first retires the
+    commands whose duration has elapsed since execution reached them, so
+    no thread is needed and the timing does not depend on poll rates.
+    """
+
+    def __init__(self, devId, portName, speed=1.0, capacity=QUEUE_CAPACITY):
+        self.devId = devId
+        self.portName = portName
+        self.speed = speed
+        self.capacity = capacity
+        MotionModel.__init__(self)
+        self.values = {}
+        self.params["HOMEParams"] = dType.HOMEParams(*self.home)
+        self.pose = self.home
+        self.queue = deque()
+        self.lastIndex = 0
+        self.currentIndex = 0
+        self.running = False
+        self.headStart = None
+        self.startTime = time.monotonic()
+
+    # =========================================================
+    # QUEUE
+    # =========================================================
+
+    def advance(self, now=None):
+        now = time.monotonic() if now is None else now
+        while self.running and self.queue and self.headStart + self.queue[0].duration <= now:
+            cmd = self.queue.popleft()
+            self.finish(cmd)
+            self.headStart += cmd.duration
+        if not self.queue:
+            self.headStart = None
+
+    def finish(self, cmd):
+        if cmd.target is not None:
+            self.pose = cmd.target
+        if cmd.apply is not None:
+            cmd.apply()
+        self.currentIndex = cmd.index
+
+    def enqueue(self, duration=0.0, target=None, apply=None):
+        self.advance()
+        if len(self.queue) >= self.capacity:
+            return None
+        self.lastIndex += 1
+        cmd = QueuedCmd(self.lastIndex, duration / self.speed, self.plannedPose, target, apply)
+        if target is not None:
+            self.plannedPose = target
+        self.queue.append(cmd)
+        if self.running and self.headStart is None:
+            self.headStart = time.monotonic()
+        return self.lastIndex
+
+    def startExec(self):
+        self.advance()
+        if not self.running:
+            self.running = True
+            self.headStart = time.monotonic() if self.queue else None
+
+    def stopExec(self, force=False):
+        now = time.monotonic()
+        self.advance(now)
+        if self.running and self.queue and self.headStart is not None:
+            cmd = self.queue[0]
+            if force:
+                #强制停止：丢弃正在执行的指令，停在当前插补位置
+                #Force stop drops the running command where it is
+                self.pose = self.currentPose(now)
+                self.queue.popleft()
+                self.currentIndex = cmd.index
+                targets = [c.target for c in self.queue if c.target is not None]
+                self.plannedPose = targets[-1] if targets else self.pose
+            else:
+                #暂停：保留剩余时间，恢复后继续
+                #Pause keeps the remaining time of the running command
+                cmd.start = self.pose = self.currentPose(now)
+                cmd.duration -= now - self.headStart
+        self.running = False
+        self.headStart = None
+
+    def clear(self):
+        self.advance()
+        self.queue.clear()
+        self.currentIndex = self.lastIndex
+        self.plannedPose = self.pose
+        self.cpSpeed = 0.0
+        self.headStart = None
+
+    def currentPose(self, now=None):
+        #运动中按时间线性插值
+        #Linear interpolation of the running move
+        now = time.monotonic() if now is None else now
+        if not (self.running and self.queue and self.headStart is not None):
+            return self.pose
+        cmd = self.queue[0]
+        if cmd.target is None or cmd.duration <= 0:
+            return self.pose
+        f = min(1.0, max(0.0, (now - self.headStart) / cmd.duration))
+        return tuple(a + (b - a) * f for a, b in zip(cmd.start, cmd.target))
+
+class SimulatedDll(object):
+    """Pure-Python stand-in for DobotDll.dll.
+
+    Functions take the same ctypes arguments as the DLL, so every
+    DobotDllType wrapper runs unchanged on a DobotSession(SimulatedDll()).
+    PTP, CP, ARC, WAIT and HOME commands are timed from the PTP/CP/ARC
+    parameters in force when they are queued; other Set*/Get* calls store
+    and return their values. speed > 1 runs motion faster than real time,
+    latency is slept on every call like the serial round trip.
+    """
+
+    def __init__(self, speed=1.0, latency=COMMAND_LATENCY, capacity=QUEUE_CAPACITY, ports=("COM3", "COM4", "COM9")):
+        self.speed = speed
+        self.latency = latency
+        self.capacity = capacity
+        self.ports = list(ports)
+        self.arms = {}
+        #设备ID单调递增，断开后不复用
+        #Device ids only grow; a disconnected arm's id is never handed out again
+        self.devIds = itertools.count(1)
+        self.calls = 0
+        self.lock = threading.RLock()
+
+    def arm(self, devId):
+        return self.arms.get(devId.value if hasattr(devId, "value") else devId)
+
+    def call(self, function, *args):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        with self.lock:
+            return function(*args)
+
+    # =========================================================
+    # CONNECTION
+    # =========================================================
+
+    def SearchDobot(self, szPara, maxLen):
+        found = " ".join(self.ports).encode("utf-8")
+        memmove(szPara, found, min(len(found), sizeof(szPara) - 1))
+        return len(self.ports)
+
+    def ConnectDobot(self, szPara, baudrate, connectInfo):
+        def connect():
+            portName = szPara.value.decode("utf-8")
+            if any(arm.portName == portName for arm in self.arms.values()):
+                return dType.DobotConnect.DobotConnect_Occupied
+            devId = next(self.devIds)
+            arm = SimulatedArm(devId, portName, self.speed, self.capacity)
+            self.arms[devId] = arm
+            info = connectInfo._obj.masterDevInfo
+            info.devId = devId
+            info.type = dType.DevType.Magician
+            for field, text in (("firmwareName", b"Magician-sim"), ("firwareVersion", b"3.7.0")):
+                memmove(getattr(info, field), text, len(text))
+            return dType.DobotConnect.DobotConnect_NoError
+        return self.call(connect)
+
+    def DisconnectDobot(self, masterId):
+        def disconnect():
+            self.arms.pop(masterId.value if hasattr(masterId, "value") else masterId, None)
+        return self.call(disconnect)
+
+    def DobotExec(self):
+        return 0
+
+    def PeriodicTask(self):
+        return 0
+
+    def SetCmdTimeout(self, masterId, times):
+        return 0
+
+    def SetDebugEnable(self, flag):
+        return 0
+
+    # =========================================================
+    # QUEUE CONTROL
+    # =========================================================
+
+    def queueControl(self, masterId, action):
+        def control():
+            arm = self.arm(masterId)
+            if arm is None:
+                return dType.DobotCommunicate.DobotCommunicate_InvalidDevice
+            arm.advance()
+            action(arm)
+            return dType.DobotCommunicate.DobotCommunicate_NoError
+        return self.call(control)
+
+    def SetQueuedCmdStartExec(self, masterId, slaveId):
+        return self.queueControl(masterId, SimulatedArm.startExec)
+
+    def SetQueuedCmdStopExec(self, masterId, slaveId):
+        return self.queueControl(masterId, SimulatedArm.stopExec)
+
+    def SetQueuedCmdForceStopExec(self, masterId, slaveId):
+        return self.queueControl(masterId, lambda arm: arm.stopExec(force=True))
+
+    def SetQueuedCmdClear(self, masterId, slaveId):
+        return self.queueControl(masterId, SimulatedArm.clear)
+
+    def GetQueuedCmdCurrentIndex(self, masterId, slaveId, queuedCmdIndex):
+        def current(arm):
+            queuedCmdIndex._obj.value = arm.currentIndex
+        return self.queueControl(masterId, current)
+
+    def GetQueuedCmdMotionFinish(self, masterId, slaveId, isFinish):
+        def finished(arm):
+            isFinish._obj.value = not arm.queue
+        return self.queueControl(masterId, finished)
+
+    def GetPose(self, masterId, slaveId, pose):
+        def read(arm):
+            x, y, z, r = arm.currentPose()
+            joints = inverseKinematics(x, y, z, r) or (0.0, 0.0, 0.0, 0.0)
+            p = pose._obj
+            p.x, p.y, p.z, p.rHead = x, y, z, r
+            p.joint1Angle, p.joint2Angle, p.joint3Angle, p.joint4Angle = joints
+        return self.queueControl(masterId, read)
+
+    def GetDeviceTime(self, masterId, slaveId, deviceTime):
+        def read(arm):
+            deviceTime._obj.value = int((time.monotonic() - arm.startTime) * 1000) & 0xFFFFFFFF
+        return self.queueControl(masterId, read)
+
+    def GetPTPTime(self, masterId, slaveId, ptpCmd, ptpTime):
+        #从当前位置出发的规划时间（真实时间，不受speed影响）
+        #Planned time from the current pose, in real-time ms (not scaled by speed)
+        cmd = ptpCmd._obj
+        def read():
+            arm = self.arm(masterId)
+            if arm is None:
+                return dType.DobotCommunicate.DobotCommunicate_InvalidDevice
+            arm.advance()
+            start = arm.currentPose()
+            target = arm.ptpTarget(cmd.ptpMode, cmd.x, cmd.y, cmd.z, cmd.rHead, start)
+            if target is None or not inWorkspace(*target):
+                return dType.DobotCommunicate.DobotCommunicate_InvalidParams
+            ptpTime._obj.value = int(round(arm.ptpTime(cmd.ptpMode, target, start) * 1000))
+            return dType.DobotCommunicate.DobotCommunicate_NoError
+        return self.call(read)
+
+    # =========================================================
+    # QUEUED COMMANDS
+    # =========================================================
+
+    def queued(self, masterId, isQueued, queuedCmdIndex, plan):
+        """plan(arm) -> (duration, target pose or None, apply or None), or None if invalid."""
+        def issue():
+            arm = self.arm(masterId)
+            if arm is None:
+                return dType.DobotCommunicate.DobotCommunicate_InvalidDevice
+            cpSpeed = arm.cpSpeed
+            arm.cpSegment = False
+            planned = plan(arm)
+            if planned is None:
+                arm.cpSpeed = cpSpeed
+                return dType.DobotCommunicate.DobotCommunicate_InvalidParams
+            duration, target, apply = planned
+            if isQueued and not arm.cpSegment and cpSpeed > 0:
+                #非CP指令打断连续轨迹，先减速停止
+                #Any other command ends a CP chain, which stops first
+                duration += arm.cpStopTime()
+            if not isQueued:
+                #非队列指令立即生效
+                #Immediate commands take effect at once
+                arm.advance()
+                if target is not None:
+                    arm.pose = arm.plannedPose = target
+                if apply is not None:
+                    apply()
+                return dType.DobotCommunicate.DobotCommunicate_NoError
+            index = arm.enqueue(duration, target, apply)
+            if index is None:
+                arm.cpSpeed = cpSpeed
+                return dType.DobotCommunicate.DobotCommunicate_BufferFull
+            queuedCmdIndex._obj.value = index
+            return dType.DobotCommunicate.DobotCommunicate_NoError
+        return self.call(issue)
+
+    def ptp(self, masterId, isQueued, queuedCmdIndex, mode, x, y, z, r, outputs=()):
+        def plan(arm):
+            target = arm.ptpTarget(mode, x, y, z, r)
+            if target is None or not inWorkspace(*target):
+                return None
+            apply = None
+            if outputs:
+                #并行输出在运动结束时生效（不模拟ratio），保存为最后一次IODO
+                #Parallel outputs apply when the move ends (ratio is not simulated), stored as the last IODO
+                def apply():
+                    for address, level in outputs:
+                        arm.params["IODO"] = dType.IODO(address, level)
+            return arm.ptpTime(mode, target), target, apply
+        return self.queued(masterId, isQueued, queuedCmdIndex, plan)
+
+    def SetPTPCmd(self, masterId, slaveId, ptpCmd, isQueued, queuedCmdIndex):
+        cmd = ptpCmd._obj
+        return self.ptp(masterId, isQueued, queuedCmdIndex, cmd.ptpMode, cmd.x, cmd.y, cmd.z, cmd.rHead)
+
+    def SetPTPWithLCmd(self, masterId, slaveId, ptpWithLCmd, isQueued, queuedCmdIndex):
+        #滑轨位置不参与计时
+        #The rail position l is not timed
+        cmd = ptpWithLCmd._obj
+        return self.ptp(masterId, isQueued, queuedCmdIndex, cmd.ptpMode, cmd.x, cmd.y, cmd.z, cmd.rHead)
+
+    def SetPTPPOCmd(self, masterId, slaveId, ptpCmd, parallelCmd, parallelCmdCount, isQueued, queuedCmdIndex):
+        cmd = ptpCmd._obj
+        outputs = [(p.address, p.level) for p in parallelCmd[:parallelCmdCount.value]]
+        return self.ptp(masterId, isQueued, queuedCmdIndex, cmd.ptpMode, cmd.x, cmd.y, cmd.z, cmd.rHead, outputs)
+
+    def SetPTPPOWithLCmd(self, masterId, slaveId, ptpWithLCmd, parallelCmd, parallelCmdCount, isQueued, queuedCmdIndex):
+        cmd = ptpWithLCmd._obj
+        outputs = [(p.address, p.level) for p in parallelCmd[:parallelCmdCount.value]]
+        return self.ptp(masterId, isQueued, queuedCmdIndex, cmd.ptpMode, cmd.x, cmd.y, cmd.z, cmd.rHead, outputs)
+
+    def SetCPCmd(self, masterId, slaveId, cpCmd, isQueued, queuedCmdIndex):
+        cmd = cpCmd._obj
+        mode, x, y, z, velocity = cmd.cpMode, cmd.x, cmd.y, cmd.z, cmd.velocity
+
+        def plan(arm):
+            start = arm.plannedPose
+            if mode == dType.ContinuousPathMode.CPRelativeMode:
+                target = (start[0] + x, start[1] + y, start[2] + z, start[3])
+            else:
+                target = (x, y, z, start[3])
+            if not inWorkspace(*target):
+                return None
+            if not isQueued:
+                return 0.0, target, None
+            return arm.cpTime(target, velocity), target, None
+        return self.queued(masterId, isQueued, queuedCmdIndex, plan)
+
+    SetCPLECmd = SetCPCmd
+    SetCP2Cmd = SetCPCmd
+
+    def SetARCCmd(self, masterId, slaveId, arcCmd, isQueued, queuedCmdIndex):
+        cmd = arcCmd._obj
+        via = (cmd.cirPoint.x, cmd.cirPoint.y, cmd.cirPoint.z)
+        target = (cmd.toPoint.x, cmd.toPoint.y, cmd.toPoint.z, cmd.toPoint.rHead)
+
+        def plan(arm):
+            #圆弧长度用经过中间点的两段弦近似
+            #Arc length approximated by the two chords through the via point
+            arc = arm.params["ARCParams"]
+            common = arm.params["ARCCommonParams"]
+            distance = math.dist(arm.plannedPose[:3], via) + math.dist(via, target[:3])
+            return trapezoidTime(distance, arc.xyzVelocity * common.velocityRatio / 100.0,
+                                 arc.xyzAcceleration * common.accelerationRatio / 100.0), target, None
+        return self.queued(masterId, isQueued, queuedCmdIndex, plan)
+
+    SetCircleCmd = SetARCCmd
+
+    def SetWAITCmd(self, masterId, slaveId, waitCmd, isQueued, queuedCmdIndex):
+        waitTime = waitCmd._obj.waitTime
+        return self.queued(masterId, isQueued, queuedCmdIndex, lambda arm: (waitTime / 1000.0, None, None))
+
+    def SetHOMECmd(self, masterId, slaveId, homeCmd, isQueued, queuedCmdIndex):
+        def plan(arm):
+            home = arm.params["HOMEParams"]
+            return HOME_TIME, (home.x, home.y, home.z, home.r), None
+        return self.queued(masterId, isQueued, queuedCmdIndex, plan)
+
+    def setEndEffector(self, name, masterId, enableCtrl, on, isQueued, queuedCmdIndex):
+        def plan(arm):
+            return 0.0, None, lambda: arm.values.__setitem__(name, (enableCtrl, on))
+        return self.queued(masterId, isQueued, queuedCmdIndex, plan)
+
+    def SetEndEffectorSuctionCup(self, masterId, slaveId, enableCtrl, on, isQueued, queuedCmdIndex):
+        return self.setEndEffector("EndEffectorSuctionCup", masterId, enableCtrl, on, isQueued, queuedCmdIndex)
+
+    def SetEndEffectorGripper(self, masterId, slaveId, enableCtrl, on, isQueued, queuedCmdIndex):
+        return self.setEndEffector("EndEffectorGripper", masterId, enableCtrl, on, isQueued, queuedCmdIndex)
+
+    # =========================================================
+    # OTHER SET/GET FUNCTIONS
+    # =========================================================
+
+    def __getattr__(self, name):
+        #其他接口：Set保存参数（结构体或数值），Get原样返回
+        #Any other function: Set stores its values, Get copies them back
+        if name.startswith("Set"):
+            return lambda *args: self.setValues(name[3:], args)
+        if name.startswith("Get"):
+            return lambda *args: self.getValues(name[3:], args)
+        raise AttributeError(name)
+
+    def setValues(self, key, args):
+        masterId, args = args[0], list(args[2:])
+        isQueued, queuedCmdIndex = 0, None
+        if len(args) >= 2 and isinstance(args[-1], ARG_REF) and isinstance(args[-1]._obj, c_uint64):
+            isQueued, queuedCmdIndex = args[-2], args[-1]
+            args = args[:-2]
+        values = []
+        for arg in args:
+            obj = arg._obj if isinstance(arg, ARG_REF) else arg
+            if isinstance(obj, Structure):
+                values.append(type(obj).from_buffer_copy(obj))
+            else:
+                values.append(obj.value if hasattr(obj, "value") else obj)
+
+        def plan(arm):
+            if isQueued and key.startswith("CP") and len(values) == 1:
+                #队列中的CP参数作用于其后排队的CP段，不打断连续轨迹
+                #Queued CP parameters apply to the CP segments queued after them and keep a CP chain going
+                arm.params[key] = values[0]
+                arm.cpSegment = True
+                return 0.0, None, None
+
+            def apply():
+                if len(values) == 1 and isinstance(values[0], Structure):
+                    arm.params[key] = values[0]
+                else:
+                    arm.values[key] = tuple(values)
+            return 0.0, None, apply
+        return self.queued(masterId, isQueued, queuedCmdIndex, plan)
+
+    def getValues(self, key, args):
+        outputs = [arg._obj for arg in args[2:] if isinstance(arg, ARG_REF)]
+
+        def read(arm):
+            if key in arm.params and len(outputs) == 1:
+                memmove(byref(outputs[0]), byref(arm.params[key]), min(sizeof(outputs[0]), sizeof(arm.params[key])))
+                return
+            for out, value in zip(outputs, arm.values.get(key, ())):
+                if isinstance(out, Structure):
+                    memmove(byref(out), byref(value), min(sizeof(out), sizeof(value)))
+                elif hasattr(out, "value"):
+                    out.value = value
+        return self.queueControl(args[0], read)
@@ -25,8 +25,7 @@ if __name__ == "__main__":
         lastIndex = dType.SetHOMECmd(api, temp=0, isQueued=1)[0]
 
         # Wait until homing completes
-        while lastIndex > dType.GetQueuedCmdCurrentIndex(api)[0]:
-            dType.dSleep(200)
+        dType.WaitQueuedCmd(api, lastIndex)
 
         print("✅ Factory Homing finished. Executing waypoints...")
 
@@ -51,8 +50,7 @@ if __name__ == "__main__":
                                         isQueued=1)[0]
 
         # Wait until last waypoint completes
-        while lastIndex > dType.GetQueuedCmdCurrentIndex(api)[0]:
-            dType.dSleep(100)
+        dType.WaitQueuedCmd(api, lastIndex)
 
         dType.SetQueuedCmdStopExec(api)
 
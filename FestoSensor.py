@@ -1,183 +1,207 @@
+import os
 import time
 import socket
-import pymcprotocol
+import asyncio
+from AsyncMC import AsyncType3E
+from PlcLink import PlcLink
+from PlcIO import AsyncPlcIO
+from PlcScanner import AsyncPlcScanner
+from InspectionTree import InspectionTree
 
-mc = pymcprotocol.Type3E()
 PLC_IP = "192.168.10.100"
 PLC_PORT = 5052
-
-def connect_plc():
-    while True:
-        try:
-            mc.connect(PLC_IP, PLC_PORT)
-            print(f"Connected to PLC at {PLC_IP}:{PLC_PORT}")
-            return
-        except Exception as e:
-            print("PLC connect error:", e)
-            time.sleep(2)
-
-def pulse_bit(address, on_time=0.2, off_time=0.2):
-    mc.batchwrite_bitunits(headdevice=address, values=[1])
-    time.sleep(on_time)
-    mc.batchwrite_bitunits(headdevice=address, values=[0])
-    time.sleep(off_time)
+mc = AsyncType3E(PLC_IP, PLC_PORT)
+
+# Output image: Y/M writes are staged and sent one frame per flush, and
+# writes that would not change an output are dropped
+io = AsyncPlcIO(mc, skip_unchanged=True)
+
+# M100 is sampled by the scanner task; its reads are pipelined with the
+# handshake frames on the same connection
+SCAN_INTERVAL = 0.2
+io.declare(bits=["M100"])
+scanner = AsyncPlcScanner(io, period=SCAN_INTERVAL)
+
+# Backoff reconnect, keepalive and latency metrics for the one connection
+link = PlcLink(mc, io)
+
+# Jobs (select bits, inputs, settle time), branching and outcomes
+TREE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "inspection_tree.json")
+# Dummy Y1E pulses before the real handshake; 0 drops them
+DUMMY_PULSES = 2
+# Time between the job select write and the first Y1E edge, so the PLC
+# latches the job on a scan before it sees the trigger (at least one scan)
+JOB_SELECT_SETTLE = 0.05
+# Pipelined cycle: the result bit, the lamp and M101 go out in one pulse as
+# soon as the sensors are read, while the sensor outputs are reset, so the
+# PLC can move the next part in while the arm handles this one.
+# False keeps the original serial pulse order.
+PIPELINE = True
+# Parts per minute are averaged over this many parts
+THROUGHPUT_WINDOW = 20
+
+async def connect_plc():
+    await link.connect()
+    print(f"Connected to PLC at {PLC_IP}:{PLC_PORT}")
+
+async def pulse_bit(address, on_time=0.2, off_time=0.2):
+    # Anything staged before the pulse goes out with its ON edge
+    await io.write_bits(**{address: 1})
+    await asyncio.sleep(on_time)
+    await io.write_bits(**{address: 0})
+    await asyncio.sleep(off_time)
     print(f"[DEBUG] Pulse {address} → ON {on_time}s, OFF {off_time}s")
 
-def reset_all_y():
-    mc.batchwrite_bitunits(headdevice="Y1A", values=[0])
-    mc.batchwrite_bitunits(headdevice="Y1C", values=[0])
-    mc.batchwrite_bitunits(headdevice="Y18", values=[0])
-    mc.batchwrite_bitunits(headdevice="Y1E", values=[0])
+async def reset_all_y():
+    # Y18..Y1E in one frame (or none if they are all OFF already)
+    await io.write_bits(Y1A=0, Y1C=0, Y18=0, Y1E=0)
     print("[DEBUG] Reset all Y outputs")
-    time.sleep(0.2)
+    await asyncio.sleep(0.2)
 
 
 
-def set_job(y1a, y1c, y18):
-    if y1a: mc.batchwrite_bitunits(headdevice="Y1A", values=[1])
-    if y1c: mc.batchwrite_bitunits(headdevice="Y1C", values=[1])
-    if y18: mc.batchwrite_bitunits(headdevice="Y18", values=[1])
-    print(f"[DEBUG] Set job → Y1A={y1a}, Y1C={y1c}, Y18={y18}")
+async def set_job(select):
+    # Own frame, then a settle: the select bits must not share a write with
+    # the Y1E edge or the PLC can see both in the same scan
+    await io.write_bits(**{device: 1 for device in select})
+    await asyncio.sleep(JOB_SELECT_SETTLE)
+    print(f"[DEBUG] Set job → {', '.join(select) or 'none'}")
 
-def clear_job():
-    mc.batchwrite_bitunits(headdevice="Y1A", values=[0])
-    mc.batchwrite_bitunits(headdevice="Y1C", values=[0])
-    mc.batchwrite_bitunits(headdevice="Y18", values=[0])
+async def clear_job():
+    await io.write_bits(Y1A=0, Y1C=0, Y18=0)
     print("[DEBUG] Cleared job bits")
-    time.sleep(0.2)
+    await asyncio.sleep(0.2)
+
+async def read_inputs(addresses):
+    # Every input of the job in one frame
+    values = await io.read_bits(addresses)
+    print(f"[DEBUG] Read {', '.join(f'{a}={v}' for a, v in zip(addresses, values))}")
+    return values
 
-def read_input_bit(address):
-    val = mc.batchread_bitunits(headdevice=address, readsize=1)[0]
-    ival = int(val)
-    print(f"[DEBUG] Read {address} = {ival}")
-    return ival
+def print_write_stats():
+    stats = io.cycle_stats()
+    print(f"[PLC] Cycle writes: {stats['requests']} bit writes in {stats['frames']} frames "
+          f"→ {stats['saved']} round trips saved")
+    link.print_metrics()
 
 # --- Corrected handshake logic with normal delays ---
-def perform_handshake_and_read(input_addr):
+async def perform_handshake_and_read(inputs, settle=0.5):
     # dummy handshake
-    pulse_bit("Y1E", on_time=0.2, off_time=0.2)
-    pulse_bit("Y1E", on_time=0.2, off_time=0.2)
+    for _ in range(DUMMY_PULSES):
+        await pulse_bit("Y1E", on_time=0.2, off_time=0.2)
     # real handshake: ON, read, then OFF
-    mc.batchwrite_bitunits(headdevice="Y1E", values=[1])
-    time.sleep(0.5)   # normal settle delay
-    val = read_input_bit(input_addr)
-    mc.batchwrite_bitunits(headdevice="Y1E", values=[0])
-    return val
-
-# --- Job routines ---
-def run_job1():
-    reset_all_y()
-    set_job(1, 0, 0)   # 100
-    job1_val = perform_handshake_and_read("X0E")
-    clear_job()
-    print(f"[DEBUG] Job1 result → {job1_val}")
-    return job1_val
-
-def run_dummy_job1():
-    reset_all_y()
-    set_job(1, 0, 0)   # 100
-    perform_handshake_and_read("X0E")
-    clear_job()
-    
-
-def run_job2():
-    reset_all_y()
-    set_job(0, 1, 0)   # 010
-    job2_val = perform_handshake_and_read("X06")
-    clear_job()
-    print(f"[DEBUG] Job2 result → {job2_val}")
-    return job2_val
-
-def run_job3():
-    reset_all_y()
-    set_job(1, 1, 0)   # 110
-    job3_val = perform_handshake_and_read("X0E")
-    clear_job()
-    print(f"[DEBUG] Job3 result → {job3_val}")
-    return job3_val
-
-def run_job4():
-    reset_all_y()
-    set_job(0, 0, 1)   # 001
-    job4_val = perform_handshake_and_read("X06")
-    clear_job()
-    print(f"[DEBUG] Job4 result → {job4_val}")
-    return job4_val
-
-def main():
-    connect_plc()
-    reset_all_y()
+    await io.write_bits(Y1E=1)
+    await asyncio.sleep(settle)   # per-job settle delay
+    values = await read_inputs(inputs)
+    await io.write_bits(Y1E=0)
+    return values
+
+# --- Job routine, one per decision level of the tree ---
+async def run_job(job):
+    await reset_all_y()
+    await set_job(job.select)
+    values = await perform_handshake_and_read(list(job.inputs), job.settle)
+    await clear_job()
+    print(f"[DEBUG] {job.name} result → {values}")
+    return values
+
+async def inspect(tree):
+    """Sensor phase of a cycle: walk the decision tree and return the outcome."""
+    outcome, levels = await tree.run(run_job)
+    print(f"[DEBUG] {levels} sensor job(s) for this part")
+    return outcome
+
+async def signal_outcome(outcome):
+    """Output phase: result bit, lamp and (unless the tray is empty) M101."""
+    result_bit, lamp, release = outcome.result, outcome.lamp, outcome.release
+    print(outcome.message)
+    if not PIPELINE:
+        await pulse_bit(result_bit)
+        await pulse_bit(lamp)
+        await reset_all_y()
+        if release:
+            print("Cycle complete → M101 will pulse ON and start the next cycle")
+            await pulse_bit("M101")
+        return
+
+    async def pulse_outputs():
+        bits = [result_bit, lamp] + (["M101"] if release else [])
+        await io.write_bits(**{bit: 1 for bit in bits})
+        await asyncio.sleep(0.2)
+        await io.write_bits(**{bit: 0 for bit in bits})
+        await asyncio.sleep(0.2)
+        print(f"[DEBUG] Pulse {', '.join(bits)} → ON 0.2s, OFF 0.2s")
+
+    # Sensor outputs (Y18..Y1E) and result outputs are disjoint: reset them
+    # while the result pulse runs
+    await asyncio.gather(pulse_outputs(), reset_all_y())
+    if release:
+        print("Cycle complete → M101 pulsed with the result, next cycle can start")
+
+class TrayMeter:
+    """End-to-end timing: M100 detected → sensors read → outputs done."""
+
+    def __init__(self, window=THROUGHPUT_WINDOW):
+        self.window = window
+        self.finished = []
+        self.tray_start = None
+        self.tray_parts = 0
+
+    def record(self, started, inspected, done, outcome):
+        if self.tray_start is None:
+            self.tray_start = started
+        self.finished = (self.finished + [done])[-self.window:]
+        if len(self.finished) > 1:
+            rate = 60.0 * (len(self.finished) - 1) / (self.finished[-1] - self.finished[0])
+        else:
+            rate = 0.0
+        print(f"[TRAY] part {self.tray_parts + 1}: sense {inspected - started:.2f} s, "
+              f"signal {done - inspected:.2f} s, cycle {done - started:.2f} s, {rate:.1f} parts/min")
+        if not outcome.release:
+            # Tray empty: no M101, the tray is finished
+            print(f"[TRAY] Tray done: {self.tray_parts} parts in {done - self.tray_start:.1f} s")
+            self.tray_start = None
+            self.tray_parts = 0
+        else:
+            self.tray_parts += 1
+
+async def main():
+    await connect_plc()
+    await reset_all_y()
+    scan_task = asyncio.create_task(scanner.run())
+    link_task = asyncio.create_task(link.run())
+    tree = InspectionTree.load(TREE_FILE)
+    meter = TrayMeter()
     print("Connected to PLC, waiting for M100 to start cycle...")
 
     while True:
         try:
-            m100_val = int(mc.batchread_bitunits(headdevice="M100", readsize=1)[0])
-            if m100_val == 1:
+            # Level trigger: returns at once while M100 stays ON, otherwise on
+            # the scan that sees it rise
+            if await scanner.wait_for("M100", 1, timeout=0.5):
                 print("M100 detected → Begin sequence")
-                
-                # --- Job1 ---
-                job1_val = run_job1()
-                if job1_val == 1:
-                    print("Outcome 1: Tray Empty M200 is on")
-                    mc.batchwrite_bitunits(headdevice="M200", values=[1])
-                    pulse_bit("M200")
-                    pulse_bit("Y12")   # alarm
-                    reset_all_y()
+                started = time.monotonic()
+                outcome = await inspect(tree)
+                inspected = time.monotonic()
+                await signal_outcome(outcome)
+                meter.record(started, inspected, time.monotonic(), outcome)
+                if not outcome.release:
                     print("Cycle complete → M101 will stay OFF")
-                    continue
-
-                # --- Job2 ---
-                job2_val = run_job2()
-                if job2_val == 1:
-                    # Orange path
-                    job3_val = run_job3()
-                    if job3_val == 1:
-                        print("Outcome 2: Orange Pass M300 is on")
-                        mc.batchwrite_bitunits(headdevice="M300", values=[1])
-                        # run_dummy_job1()
-                        pulse_bit("M300")
-                        pulse_bit("Y11")   # green
-                    else:
-                        print("Outcome 3: Orange Fail M400 is on")
-                        mc.batchwrite_bitunits(headdevice="M400", values=[1])
-                        # run_dummy_job1()
-                        pulse_bit("M400")
-                        pulse_bit("Y10")   # red
-                else:
-                    # Brown path
-                    job4_val = run_job4()
-                    if job4_val == 1:
-                        print("Outcome 4: Brown Pass M301 is on")
-                        mc.batchwrite_bitunits(headdevice="M301", values=[1])
-                        # run_dummy_job1()
-                        pulse_bit("M301")
-                        pulse_bit("Y11")   # green
-                    else:
-                        print("Outcome 5: Brown Fail M401 is on")
-                        mc.batchwrite_bitunits(headdevice="M401", values=[1])
-                        # run_dummy_job1()
-                        pulse_bit("M401")
-                        pulse_bit("Y10")   # red
-
-                reset_all_y()
-
-
-
-                print("Cycle complete → M101 will pulse ON and start the next cycle")
-                pulse_bit("M101")
-                
-            else:
-                time.sleep(0.5)
+                print_write_stats()
+
+            elif scanner.error is not None:
+                # The scanner lost the link: wait for the supervisor below
+                raise scanner.error
 
         except (ConnectionResetError, socket.error) as e:
             print("PLC communication error (socket):", e)
-            try: mc.close()
-            except: pass
-            time.sleep(1)
-            connect_plc()
+            # The link supervisor reconnects with backoff; this cycle is abandoned
+            await link.wait_connected()
+            # Output state after a reconnect is unknown: send everything again
+            io.forget()
         except Exception as e:
             print("PLC communication error:", e)
-            time.sleep(1)
+            await asyncio.sleep(1)
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
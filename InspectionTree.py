@@ -0,0 +1,123 @@
+# InspectionTree.py
+import json
+from collections import namedtuple
+
+# Inputs read per job are limited so every row of the table stays small
+MAX_INPUTS = 8
+
+# One sensor job: select bits choose the sensor program, inputs are read in
+# one frame after the handshake, settle is the wait before that read
+Job = namedtuple("Job", "name select inputs settle")
+# Terminal state: message, result bit, lamp, M101 pulse to start the next cycle
+Outcome = namedtuple("Outcome", "name message result lamp release")
+
+
+class InspectionTree:
+    """Inspection decision tree compiled into a transition table.
+
+    States 0..len(jobs)-1 are jobs, the following ones are outcomes. The
+    input values of a job, first input as bit 0, index its table row,
+    whose entry is the next state. Evaluating a level is therefore one
+    handshake, one batched read of every input of the job and one lookup,
+    however many bits the branches look at.
+
+    Config format (JSON):
+
+        {"start": "job1",
+         "jobs": {"job1": {"select": ["Y1A"], "inputs": ["X0E"], "settle": 0.5,
+                           "branches": [{"when": {"X0E": 1}, "next": "tray_empty"}],
+                           "else": "job2"}, ...},
+         "outcomes": {"tray_empty": {"message": "...", "result": "M200",
+                                     "lamp": "Y12", "release": false}, ...}}
+
+    Branches are tried in order; the first whose "when" bits all match wins.
+    """
+
+    def __init__(self, jobs, outcomes, table, start):
+        self.jobs = jobs
+        self.outcomes = outcomes
+        self.table = table
+        self.start = start
+
+    @classmethod
+    def load(cls, filename):
+        with open(filename, "r", encoding="utf-8") as f:
+            return cls.compile(json.load(f))
+
+    @classmethod
+    def compile(cls, config):
+        job_names = list(config["jobs"])
+        outcome_names = list(config["outcomes"])
+        index = {name: i for i, name in enumerate(job_names + outcome_names)}
+        if len(index) != len(job_names) + len(outcome_names):
+            raise ValueError("job and outcome names must be unique")
+
+        def state(name, where):
+            if name not in index:
+                raise ValueError(f"{where}: unknown job or outcome '{name}'")
+            return index[name]
+
+        jobs = []
+        table = []
+        for name in job_names:
+            spec = config["jobs"][name]
+            inputs = list(spec["inputs"])
+            if not 0 < len(inputs) <= MAX_INPUTS:
+                raise ValueError(f"{name}: 1 to {MAX_INPUTS} inputs expected")
+            jobs.append(Job(name, tuple(spec.get("select", ())), tuple(inputs), float(spec.get("settle", 0.5))))
+
+            rules = []
+            for branch in spec.get("branches", ()):
+                mask = value = 0
+                for device, bit in branch["when"].items():
+                    if device not in inputs:
+                        raise ValueError(f"{name}: branch reads {device}, which is not an input")
+                    mask |= 1 << inputs.index(device)
+                    value |= (1 if bit else 0) << inputs.index(device)
+                rules.append((mask, value, state(branch["next"], name)))
+            fallback = state(spec["else"], name)
+
+            row = []
+            for code in range(1 << len(inputs)):
+                row.append(next((target for mask, value, target in rules if code & mask == value), fallback))
+            table.append(row)
+
+        outcomes = [Outcome(name, spec["message"], spec["result"], spec["lamp"], bool(spec.get("release", True)))
+                    for name, spec in ((n, config["outcomes"][n]) for n in outcome_names)]
+        tree = cls(jobs, outcomes, table, state(config["start"], "start"))
+        tree._check_acyclic()
+        return tree
+
+    def _check_acyclic(self):
+        done = set()
+
+        def visit(state, path):
+            if state >= len(self.jobs) or state in done:
+                return
+            if state in path:
+                raise ValueError(f"cycle through job '{self.jobs[state].name}'")
+            for target in set(self.table[state]):
+                visit(target, path | {state})
+            done.add(state)
+
+        visit(self.start, frozenset())
+
+    def next_state(self, state, values):
+        code = 0
+        for i, value in enumerate(values):
+            if value:
+                code |= 1 << i
+        return self.table[state][code]
+
+    async def run(self, run_job):
+        """Walk the tree; run_job(job) is a coroutine returning the input values.
+
+        Returns (outcome, number of jobs run).
+        """
+        state = self.start
+        levels = 0
+        while state < len(self.jobs):
+            values = await run_job(self.jobs[state])
+            levels += 1
+            state = self.next_state(state, values)
+        return self.outcomes[state - len(self.jobs)], levels
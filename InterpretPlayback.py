@@ -1,48 +1,44 @@
-import xml.etree.ElementTree as ET
 import csv
 import sys
 import os
 
+from PlaybackParser import iter_playback_rows, item_float
+
 def load_playback_file(filename):
     """
     Load playback file (XML format).
     Extract waypoints: x, y, z, r, vel, accel, suction/gripper
     """
-    try:
-        # Check if the file exists
-        if not os.path.exists(filename):
-            print(f"Error: File not found at '{filename}'")
-            return None
-
-        tree = ET.parse(filename)
-        root = tree.getroot()
-    except ET.ParseError as e:
-        print(f"Error: Failed to parse XML file '{filename}'. Details: {e}")
-        return None
-    except Exception as e:
-        print(f"An unexpected error occurred while loading the file: {e}")
+    # Check if the file exists
+    if not os.path.exists(filename):
+        print(f"Error: File not found at '{filename}'")
         return None
 
     waypoints = []
-    for row in root:
-        if row.tag.startswith("row"):  # only process rows like <row0>, <row1>, ...
+    try:
+        # Rows are streamed with iterparse, so large exports stay in bounded memory;
+        # a parse error is reported and the rows before it are kept
+        for row_number, items in iter_playback_rows(filename):
             try:
                 # Extract positional data
-                x = float(row.find("item_2").text)
-                y = float(row.find("item_3").text)
-                z = float(row.find("item_4").text)
-                r = float(row.find("item_5").text)
+                x = item_float(items, "item_2")
+                y = item_float(items, "item_3")
+                z = item_float(items, "item_4")
+                r = item_float(items, "item_5")
                 
                 # Extract motion and gripper data
                 # Default vel to 50.0 if item_10 is missing
-                vel = float(row.find("item_10").text) if row.find("item_10") is not None and row.find("item_10").text else 50.0
+                vel = item_float(items, "item_10", 50.0)
                 accel = vel # accel is set equal to vel in the original logic
-                suction_gripper = int(row.find("item_11").text) if row.find("item_11") is not None and row.find("item_11").text else 0
+                suction_gripper = int(items["item_11"]) if items.get("item_11") else 0
 
                 wp = (x, y, z, r, vel, accel, suction_gripper)
                 waypoints.append(wp)
             except Exception as e:
-                print(f"Skipping {row.tag} due to error during data extraction: {e}")
+                print(f"Skipping row{row_number} due to error during data extraction: {e}")
+    except Exception as e:
+        print(f"An unexpected error occurred while loading the file: {e}")
+        return None
     
     return waypoints
 
@@ -0,0 +1,172 @@
+# Kinematics.py
+import math
+from array import array
+
+# Magician geometry (mm): rear arm, forearm, end effector reach past the
+# forearm joint. Approximate, used for joint angles and joint-space timing.
+REAR_ARM = 135.0
+FORE_ARM = 147.0
+TOOL_OFFSET = 59.7
+
+# Joint ranges (degrees) in GetPose's convention: J2 is the rear arm from
+# vertical, J3 the forearm from horizontal, R = J1 + J4. A little wider than
+# the datasheet so taught points near the edge still pass.
+JOINT_LIMITS = ((-135.0, 135.0), (-5.0, 90.0), (-15.0, 95.0), (-150.0, 150.0))
+
+# Violation reasons, one per point
+REACH = "reach"
+JOINT_NAMES = ("J1", "J2", "J3", "J4 (R)")
+
+
+def forward_kinematics(j1, j2, j3, j4):
+    """Joint angles -> (x, y, z, r)."""
+    reach = REAR_ARM * math.sin(math.radians(j2)) + FORE_ARM * math.cos(math.radians(j3)) + TOOL_OFFSET
+    z = REAR_ARM * math.cos(math.radians(j2)) - FORE_ARM * math.sin(math.radians(j3))
+    return (reach * math.cos(math.radians(j1)), reach * math.sin(math.radians(j1)), z, j1 + j4)
+
+
+def inverse_kinematics_branches(x, y, z, r):
+    """(x, y, z, r) -> both joint solutions, elbow-up first, or None when
+    the point is out of reach. They meet at full extension."""
+    j1 = math.degrees(math.atan2(y, x))
+    reach = math.hypot(x, y) - TOOL_OFFSET
+    distance = math.hypot(reach, z)
+    if distance > REAR_ARM + FORE_ARM or distance < abs(REAR_ARM - FORE_ARM) or distance == 0:
+        return None
+    # Rounding can push the cosine just past 1 at full extension
+    cosine = (REAR_ARM ** 2 + distance ** 2 - FORE_ARM ** 2) / (2 * REAR_ARM * distance)
+    elbow = math.acos(min(1.0, max(-1.0, cosine)))
+    heading = math.atan2(z, reach)
+    branches = []
+    for rear in (heading + elbow, heading - elbow):
+        fore = math.atan2(z - REAR_ARM * math.sin(rear), reach - REAR_ARM * math.cos(rear))
+        # heading + elbow can pass 180 degrees; keep J2 in [-180, 180)
+        j2 = (270.0 - math.degrees(rear)) % 360.0 - 180.0
+        branches.append((j1, j2, -math.degrees(fore), r - j1))
+    return branches
+
+
+def within_limits(joints, limits=JOINT_LIMITS):
+    return all(low <= angle <= high for angle, (low, high) in zip(joints, limits))
+
+
+def choose_branch(branches, seed=None, limits=JOINT_LIMITS):
+    """Branch inside limits, the one nearest seed if both are; elbow-up if
+    neither is or there is no seed."""
+    inside = [b for b in branches if within_limits(b, limits)]
+    if not inside:
+        return branches[0]
+    if seed is None or len(inside) == 1:
+        return inside[0]
+    return min(inside, key=lambda b: abs(b[1] - seed[1]) + abs(b[2] - seed[2]))
+
+
+def inverse_kinematics(x, y, z, r, seed=None, limits=JOINT_LIMITS):
+    """(x, y, z, r) -> joint angles, None when the point is out of reach.
+
+    Of the two elbow solutions the one inside limits is returned; when both
+    are, the one nearest seed (joint angles, e.g. the previous point), or
+    elbow-up without a seed.
+    """
+    branches = inverse_kinematics_branches(x, y, z, r)
+    return None if branches is None else choose_branch(branches, seed, limits)
+
+
+def in_workspace(x, y, z, r, limits=JOINT_LIMITS):
+    """True when (x, y, z, r) is reachable with every joint inside limits."""
+    joints = inverse_kinematics(x, y, z, r, limits=limits)
+    return joints is not None and within_limits(joints, limits)
+
+
+def inverse_kinematics_columns(xs, ys, zs, rs, limits=JOINT_LIMITS):
+    """Batched inverse_kinematics over coordinate columns.
+
+    Returns four array('d') joint columns and the indices of unreachable
+    points (their joints are NaN). Each point takes the elbow branch that
+    inverse_kinematics would with the previous point's joints as seed.
+    Runs as one loop with the constants and math functions bound locally,
+    so a thousand points take a few milliseconds.
+    """
+    atan2, hypot, acos, degrees = math.atan2, math.hypot, math.acos, math.degrees
+    sin, cos = math.sin, math.cos
+    rear_arm, tool_offset = REAR_ARM, TOOL_OFFSET
+    longest, shortest = REAR_ARM + FORE_ARM, abs(REAR_ARM - FORE_ARM)
+    cosine_num = REAR_ARM ** 2 - FORE_ARM ** 2
+    nan = math.nan
+    (low2, high2), (low3, high3) = limits[1], limits[2]
+    j1s, j2s, j3s, j4s = array("d"), array("d"), array("d"), array("d")
+    unreachable = []
+    seed = None
+    for i, (x, y, z, r) in enumerate(zip(xs, ys, zs, rs)):
+        j1 = degrees(atan2(y, x))
+        reach = hypot(x, y) - tool_offset
+        distance = hypot(reach, z)
+        if distance > longest or distance < shortest or distance == 0:
+            unreachable.append(i)
+            for column in (j1s, j2s, j3s, j4s):
+                column.append(nan)
+            continue
+        cosine = (cosine_num + distance * distance) / (2 * rear_arm * distance)
+        elbow = acos(1.0 if cosine > 1.0 else cosine)
+        heading = atan2(z, reach)
+        chosen = None
+        for rear in (heading + elbow, heading - elbow):
+            fore = atan2(z - rear_arm * sin(rear), reach - rear_arm * cos(rear))
+            j2, j3 = (270.0 - degrees(rear)) % 360.0 - 180.0, -degrees(fore)
+            inside = low2 <= j2 <= high2 and low3 <= j3 <= high3
+            if chosen is None:
+                chosen = (j2, j3, inside)
+            elif inside and (not chosen[2] or (seed is not None
+                                               and abs(j2 - seed[0]) + abs(j3 - seed[1])
+                                               < abs(chosen[0] - seed[0]) + abs(chosen[1] - seed[1]))):
+                chosen = (j2, j3, inside)
+        seed = chosen
+        j1s.append(j1)
+        j2s.append(chosen[0])
+        j3s.append(chosen[1])
+        j4s.append(r - j1)
+    return (j1s, j2s, j3s, j4s), unreachable
+
+
+class WorkspaceError(ValueError):
+    """A program has points the arm cannot reach; violations is a list of
+    (index, reason, value) sorted by index."""
+
+    def __init__(self, violations, label="program"):
+        self.violations = violations
+        shown = "; ".join(format_violation(v) for v in violations[:5])
+        more = f" (+{len(violations) - 5} more)" if len(violations) > 5 else ""
+        points = len({v[0] for v in violations})
+        super().__init__(f"{label}: {points} point(s) outside the workspace: {shown}{more}")
+
+
+def format_violation(violation):
+    index, reason, value = violation
+    if reason == REACH:
+        return f"point {index + 1} out of reach"
+    return f"point {index + 1} {reason} = {value:.1f} deg"
+
+
+def validate_program(program, limits=JOINT_LIMITS):
+    """Check every point of a Program (or anything with x/y/z/r columns).
+
+    Returns (joints, violations): joint columns as from
+    inverse_kinematics_columns and a list of (index, reason, value) with
+    reason REACH or one of JOINT_NAMES. Points with mode MODE_NONE are
+    checked too; they repeat the pose before them anyway.
+    """
+    joints, unreachable = inverse_kinematics_columns(program.x, program.y, program.z, program.r, limits)
+    violations = [(i, REACH, math.nan) for i in unreachable]
+    for name, column, (low, high) in zip(JOINT_NAMES, joints, limits):
+        # NaN compares False both ways, so unreachable points are skipped here
+        violations.extend((i, name, angle) for i, angle in enumerate(column) if angle < low or angle > high)
+    violations.sort(key=lambda v: v[0])
+    return joints, violations
+
+
+def check_program(program, label="program", limits=JOINT_LIMITS):
+    """Raise WorkspaceError unless every point of program is reachable."""
+    joints, violations = validate_program(program, limits)
+    if violations:
+        raise WorkspaceError(violations, label)
+    return joints
@@ -0,0 +1,156 @@
+# MotionEstimator.py
+import DobotDllType as dType
+from MotionModel import MotionModel, COMMAND_LATENCY
+from WaypointProgram import MODE_DEFAULT, MODE_NONE, MODE_CP, TOOL_HOLD, JUNCTION_STEP
+
+
+class SegmentEstimate:
+    """Predicted time of one program point: move to it, tool change, dwell."""
+    __slots__ = ("index", "move_ms", "tool_ms", "dwell_ms", "overhead_ms", "end_ms", "source")
+
+    def __init__(self, index, move_ms, tool_ms, dwell_ms, overhead_ms, end_ms, source):
+        self.index = index
+        self.move_ms = move_ms
+        self.tool_ms = tool_ms
+        self.dwell_ms = dwell_ms
+        self.overhead_ms = overhead_ms
+        self.end_ms = end_ms
+        self.source = source
+
+    @property
+    def total_ms(self):
+        return self.move_ms + self.tool_ms + self.dwell_ms + self.overhead_ms
+
+    def __repr__(self):
+        return (f"SegmentEstimate(#{self.index + 1}, move={self.move_ms:.0f} ms ({self.source}), "
+                f"tool={self.tool_ms:.0f} ms, dwell={self.dwell_ms:.0f} ms, end={self.end_ms:.0f} ms)")
+
+
+class MotionEstimator:
+    """Predicts how long a Program takes once it is queued.
+
+    Moves are timed offline with trapezoidal velocity profiles from the PTP
+    joint, coordinate, jump and common parameters (MotionModel, shared with the
+    simulator). When an api is passed to segments(), the first move, which
+    starts at the arm's current pose, is asked from the controller with
+    GetPTPTime instead. Every queued command adds command_ms of host round
+    trip, every tool change tool_ms (less the part of the move it overlaps
+    when it is sent as a parallel output). CP segments (MODE_CP) run from
+    the end speed of the segment before without stopping, timed with the
+    CP parameters; a chain of them stops before the next other command.
+    """
+
+    def __init__(self, joint_params=None, coordinate_params=None, jump_params=None,
+                 velocity_ratio=100.0, acceleration_ratio=100.0, tool_ms=0.0, command_ms=COMMAND_LATENCY * 1000,
+                 cp_params=None):
+        self.model = MotionModel()
+        if joint_params is not None:
+            self.model.params["PTPJointParams"] = joint_params
+        if coordinate_params is not None:
+            self.model.params["PTPCoordinateParams"] = coordinate_params
+        if jump_params is not None:
+            self.model.params["PTPJumpParams"] = jump_params
+        if cp_params is not None:
+            self.model.params["CPParams"] = cp_params
+        self.model.params["PTPCommonParams"] = dType.PTPCommonParams(velocity_ratio, acceleration_ratio)
+        self.tool_ms = tool_ms
+        self.command_ms = command_ms
+
+    @classmethod
+    def from_api(cls, api, **kwargs):
+        """Estimator with the PTP parameters currently set on the arm."""
+        j = dType.GetPTPJointParams(api)
+        c = dType.GetPTPCoordinateParams(api)
+        jump = dType.GetPTPJumpParams(api)
+        velocity_ratio, acceleration_ratio = dType.GetPTPCommonParams(api)
+        kwargs.setdefault("cp_params", dType.CPParams(*dType.GetCPParams(api)))
+        return cls(dType.PTPJointParams(j[0], j[2], j[4], j[6], j[1], j[3], j[5], j[7]),
+                   dType.PTPCoordinateParams(*c), dType.PTPJumpParams(*jump),
+                   velocity_ratio, acceleration_ratio, **kwargs)
+
+    def move_ms(self, mode, target, start):
+        """Offline model time of one PTP move."""
+        return self.model.ptpTime(mode, tuple(target[:4]), tuple(start[:4])) * 1000.0
+
+    def segments(self, program, start_pose=None, default_mode=dType.PTPMode.PTPMOVLXYZMode, tool_settle_ms=0,
+                 api=None):
+        """One SegmentEstimate per point, in the order Program.commands() queues them.
+
+        start_pose defaults to the first point. With api, start_pose must be
+        the arm's current pose; the first move then uses GetPTPTime.
+        """
+        if start_pose is not None:
+            pose = tuple(start_pose[:4])
+        elif len(program):
+            pose = (program.x[0], program.y[0], program.z[0], program.r[0])
+        result = []
+        end = 0.0
+        self.model.cpSpeed = 0.0
+        junction = None
+        for i in range(len(program)):
+            mode = program.mode[i]
+            move = 0.0
+            source = "none"
+            commands = 0
+            if mode != MODE_CP:
+                move += self.model.cpStopTime() * 1000.0
+            if mode == MODE_CP:
+                target = (program.x[i], program.y[i], program.z[i], pose[3])
+                if junction is None or abs(program.junction[i] - junction) > JUNCTION_STEP:
+                    # Queued SetCPParams, see Program.commands()
+                    junction = program.junction[i]
+                    cp = self.model.params["CPParams"]
+                    self.model.params["CPParams"] = dType.CPParams(cp.planAcc, junction, cp.acc, cp.realTimeTrack)
+                    commands += 1
+                self.model.plannedPose = pose
+                move = self.model.cpTime(target, program.velocity[i]) * 1000.0
+                source = "cp"
+                pose = target
+                commands += 1
+            elif mode != MODE_NONE:
+                mode = default_mode if mode == MODE_DEFAULT else mode
+                target = (program.x[i], program.y[i], program.z[i], program.r[i])
+                if api is not None and not result:
+                    move += float(dType.GetPTPTime(api, mode, *target)[0])
+                    source = "dll"
+                else:
+                    move += self.move_ms(mode, target, pose)
+                    source = "model"
+                pose = target
+                commands += 1
+            tool = 0.0
+            if program.tool[i] != TOOL_HOLD:
+                tool = self.tool_ms
+                if program.parallel_outputs(i) is not None:
+                    # Sent with the move: only the part past its end counts
+                    tool = max(0.0, tool - move * (100 - program.output_ratio[i]) / 100.0)
+                else:
+                    commands += 1
+                if tool_settle_ms > 0:
+                    tool += tool_settle_ms
+                    commands += 1
+            dwell = program.dwell_ms[i]
+            if dwell > 0:
+                commands += 1
+            if mode == MODE_CP and (program.tool[i] != TOOL_HOLD or dwell > 0 or i + 1 == len(program)):
+                move += self.model.cpStopTime() * 1000.0
+            segment = SegmentEstimate(i, move, tool, dwell, commands * self.command_ms, 0.0, source)
+            end += segment.total_ms
+            segment.end_ms = end
+            result.append(segment)
+        return result
+
+    def total_ms(self, program, start_pose=None, default_mode=dType.PTPMode.PTPMOVLXYZMode, tool_settle_ms=0,
+                 api=None):
+        segments = self.segments(program, start_pose, default_mode, tool_settle_ms, api)
+        return segments[-1].end_ms if segments else 0.0
+
+    def print_estimate(self, program, label="program", start_pose=None, default_mode=dType.PTPMode.PTPMOVLXYZMode,
+                       tool_settle_ms=0, api=None):
+        segments = self.segments(program, start_pose, default_mode, tool_settle_ms, api)
+        for s in segments:
+            print(f"[ESTIMATE] {label} #{s.index + 1:<3} move {s.move_ms:7.0f} ms ({s.source:5}) "
+                  f"tool {s.tool_ms:5.0f} ms  dwell {s.dwell_ms:5.0f} ms  -> {s.end_ms / 1000:6.2f} s")
+        total = segments[-1].end_ms if segments else 0.0
+        print(f"[ESTIMATE] {label}: {len(segments)} points, {total / 1000:.2f} s per cycle")
+        return total
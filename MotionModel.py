@@ -0,0 +1,145 @@
+# MotionModel.py
+import math
+
+import DobotDllType as dType
+from Kinematics import forward_kinematics as forwardKinematics, inverse_kinematics as inverseKinematics
+
+# Host <-> controller round trip of one DLL call, in seconds
+COMMAND_LATENCY = 0.002
+
+# Controller parameters after power-on
+DEFAULT_PARAMS = {
+    "PTPJointParams": dType.PTPJointParams(200, 200, 200, 200, 200, 200, 200, 200),
+    "PTPCoordinateParams": dType.PTPCoordinateParams(200, 200, 200, 200),
+    "PTPJumpParams": dType.PTPJumpParams(20, 200),
+    "PTPCommonParams": dType.PTPCommonParams(100, 100),
+    "CPParams": dType.CPParams(200, 100, 200, 0),
+    "ARCParams": dType.ARCParams(100, 100, 100, 100),
+    "ARCCommonParams": dType.ARCCommonParams(100, 100),
+}
+
+JUMP_MODES = (dType.PTPMode.PTPJUMPXYZMode, dType.PTPMode.PTPJUMPANGLEMode, dType.PTPMode.PTPJUMPMOVLXYZMode)
+LINEAR_MODES = (dType.PTPMode.PTPMOVLXYZMode, dType.PTPMode.PTPMOVLANGLEMode, dType.PTPMode.PTPMOVLXYZINCMode)
+ANGLE_MODES = (dType.PTPMode.PTPJUMPANGLEMode, dType.PTPMode.PTPMOVJANGLEMode, dType.PTPMode.PTPMOVLANGLEMode)
+
+
+def trapezoidTime(distance, velocity, acceleration):
+    #梯形速度曲线下走完distance所需时间（达不到最大速度时为三角形）
+    #Time to cover distance with a trapezoidal profile (triangular if vmax is not reached)
+    distance = abs(distance)
+    if distance == 0 or velocity <= 0 or acceleration <= 0:
+        return 0.0
+    if distance >= velocity * velocity / acceleration:
+        return distance / velocity + velocity / acceleration
+    return 2.0 * math.sqrt(distance / acceleration)
+
+
+class MotionModel(object):
+    """Trapezoidal motion timing of a Magician from its PTP/CP parameters.
+
+    params holds the controller parameters as ctypes structs, plannedPose
+    is where the next move starts. Used by the simulator to time queued
+    commands and by MotionEstimator to predict programs offline.
+    """
+
+    def __init__(self):
+        self.params = {name: type(p).from_buffer_copy(p) for name, p in DEFAULT_PARAMS.items()}
+        self.home = forwardKinematics(0, 0, 0, 0)
+        # Pose after the last queued command, start of the next planned move
+        self.plannedPose = self.home
+        # Speed at the end of the last queued CP segment, 0 when it stopped
+        self.cpSpeed = 0.0
+        self.cpSegment = False
+
+    # =========================================================
+    # MOTION TIMING
+    # =========================================================
+
+    def jointTime(self, start, target):
+        joints = self.params["PTPJointParams"]
+        common = self.params["PTPCommonParams"]
+        a = inverseKinematics(*start)
+        b = inverseKinematics(*target, seed=a)
+        if a is None or b is None:
+            return self.linearTime(start, target)
+        velocities = (joints.joint1Velocity, joints.joint2Velocity, joints.joint3Velocity, joints.joint4Velocity)
+        accelerations = (joints.joint1Acceleration, joints.joint2Acceleration,
+                         joints.joint3Acceleration, joints.joint4Acceleration)
+        return max(trapezoidTime(q1 - q0, v * common.velocityRatio / 100.0, acc * common.accelerationRatio / 100.0)
+                   for q0, q1, v, acc in zip(a, b, velocities, accelerations))
+
+    def linearTime(self, start, target):
+        coord = self.params["PTPCoordinateParams"]
+        common = self.params["PTPCommonParams"]
+        vr = common.velocityRatio / 100.0
+        ar = common.accelerationRatio / 100.0
+        distance = math.dist(start[:3], target[:3])
+        return max(trapezoidTime(distance, coord.xyzVelocity * vr, coord.xyzAcceleration * ar),
+                   trapezoidTime(target[3] - start[3], coord.rVelocity * vr, coord.rAcceleration * ar))
+
+    def jumpTime(self, start, target):
+        jump = self.params["PTPJumpParams"]
+        top = min(max(start[2], target[2]) + jump.jumpHeight, max(jump.zLimit, start[2], target[2]))
+        up = (start[0], start[1], top, start[3])
+        down = (target[0], target[1], top, target[3])
+        return self.linearTime(start, up) + self.jointTime(up, down) + self.linearTime(down, target)
+
+    def cpTime(self, target, velocity):
+        #连续轨迹段：从上一段末速度加速到velocity，在终点以juncitionVel通过，段间不停
+        #Blended CP segment: from the previous segment's end speed up to velocity,
+        #passing the end point at juncitionVel, without stopping in between
+        cp = self.params["CPParams"]
+        v = velocity if velocity > 0 else cp.juncitionVel
+        acc = cp.acc
+        distance = math.dist(self.plannedPose[:3], target[:3])
+        v0 = self.cpSpeed
+        self.cpSegment = True
+        if acc <= 0 or v <= 0:
+            self.cpSpeed = 0.0
+            return 0.0
+        v1 = min(v, cp.juncitionVel)
+        rampUp = abs(v * v - v0 * v0) / (2 * acc)
+        rampDown = (v * v - v1 * v1) / (2 * acc)
+        if rampUp + rampDown <= distance:
+            self.cpSpeed = v1
+            return abs(v - v0) / acc + (v - v1) / acc + (distance - rampUp - rampDown) / v
+        peak = math.sqrt((2 * acc * distance + v0 * v0 + v1 * v1) / 2)
+        if peak >= max(v0, v1):
+            #段太短，达不到velocity
+            #Too short to reach velocity
+            self.cpSpeed = v1
+            return (peak - v0) / acc + (peak - v1) / acc
+        #段太短，无法在终点达到juncitionVel
+        #Too short to reach juncitionVel at the end
+        sign = 1 if v1 > v0 else -1
+        end = math.sqrt(max(v0 * v0 + sign * 2 * acc * distance, 0.0))
+        self.cpSpeed = end
+        return abs(end - v0) / acc
+
+    def cpStopTime(self):
+        #CP链结束：减速到0比匀速走完减速距离多用v/(2a)
+        #End of a CP chain: stopping takes v/(2a) longer than cruising the braking distance
+        cp = self.params["CPParams"]
+        speed, self.cpSpeed = self.cpSpeed, 0.0
+        return speed / (2 * cp.acc) if speed > 0 and cp.acc > 0 else 0.0
+
+    def ptpTarget(self, mode, x, y, z, r, start=None):
+        start = self.plannedPose if start is None else start
+        if mode in ANGLE_MODES:
+            return forwardKinematics(x, y, z, r)
+        if mode == dType.PTPMode.PTPMOVJANGLEINCMode:
+            joints = inverseKinematics(*start)
+            if joints is None:
+                return None
+            return forwardKinematics(joints[0] + x, joints[1] + y, joints[2] + z, joints[3] + r)
+        if mode in (dType.PTPMode.PTPMOVLXYZINCMode, dType.PTPMode.PTPMOVJXYZINCMode):
+            return (start[0] + x, start[1] + y, start[2] + z, start[3] + r)
+        return (x, y, z, r)
+
+    def ptpTime(self, mode, target, start=None):
+        start = self.plannedPose if start is None else start
+        if mode in JUMP_MODES:
+            return self.jumpTime(start, target)
+        if mode in LINEAR_MODES:
+            return self.linearTime(start, target)
+        return self.jointTime(start, target)
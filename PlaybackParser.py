@@ -0,0 +1,55 @@
+# PlaybackParser.py
+import xml.etree.ElementTree as ET
+
+
+def iter_playback_rows(filename):
+    """Stream the <rowN> entries of a DobotStudio .playback file.
+
+    Yields (row_number, items) where items maps "item_N" to its text, in file
+    order and for any number of rows. Each row is cleared from the tree
+    once it has been yielded, so memory stays bounded and parse time is
+    linear in the file size.
+
+    A truncated or corrupt file is reported and ends the stream: the rows
+    before the error have already been yielded and are kept by the caller.
+    """
+    depth = 0
+    root = None
+    row_number = None
+    items = None
+    rows = 0
+    try:
+        for event, elem in ET.iterparse(filename, events=("start", "end")):
+            if event == "start":
+                depth += 1
+                if depth == 1:
+                    root = elem
+                elif depth == 2:
+                    tag = elem.tag
+                    if tag.startswith("row") and tag[3:].isdigit():
+                        row_number = int(tag[3:])
+                        items = {}
+                continue
+
+            depth -= 1
+            if depth == 2 and items is not None:
+                items[elem.tag] = elem.text
+            elif depth == 1:
+                if items is not None:
+                    rows += 1
+                    yield row_number, items
+                row_number = None
+                items = None
+                # Drop everything parsed so far
+                root.clear()
+    except ET.ParseError as e:
+        print(f"Error: Failed to parse XML file '{filename}' after {rows} rows. Details: {e}")
+
+
+def item_float(items, key, default=None):
+    text = items.get(key)
+    if text is None or not text.strip():
+        if default is None:
+            raise ValueError(f"missing {key}")
+        return default
+    return float(text)
@@ -0,0 +1,473 @@
+# PlcEmulator.py
+import sys
+import time
+import random
+import asyncio
+import threading
+
+from AsyncMC import AsyncType3E
+from PlcIO import AsyncPlcIO, WORD_DEVICES, format_device, parse_device
+from PlcLink import percentile
+from PlcScanner import AsyncPlcScanner
+
+# Binary device codes of Q/L series 3E frames (3-byte number + 1-byte code)
+DEVICE_CODES = {
+    "X": 0x9C, "Y": 0x9D, "M": 0x90, "L": 0x92, "F": 0x93, "V": 0x94, "B": 0xA0,
+    "SM": 0x91, "SB": 0xA1, "D": 0xA8, "W": 0xB4, "R": 0xAF, "ZR": 0xB0, "SD": 0xA9, "SW": 0xB5,
+}
+DEVICE_PREFIXES = {code: prefix for prefix, code in DEVICE_CODES.items()}
+
+# Request header: subheader(2) network(1) pc(1) module io(2) station(1) data length(2)
+REQUEST_HEADER = 9
+# Answer header: subheader D000, network 0, PC FF, module I/O 03FF, station 0
+ANSWER_PREFIX = b"\xd0\x00\x00\xff\xff\x03\x00"
+# End code of a command the emulator does not implement
+END_COMMAND_ERROR = 0xC059
+
+# Emulator address for the standalone server (point PLC_IP/PLC_PORT here)
+EMULATOR_IP = "127.0.0.1"
+EMULATOR_PORT = 5051
+
+# Benchmark: handshake cycles per mode, robot job time, PLC gap between parts
+# (the polling loop misses an M100 OFF shorter than its 0.5 s reset poll
+# plus the done pulse, so the gap is kept above that)
+BENCH_CYCLES = 10
+BENCH_JOB_TIME = 0.3
+BENCH_GAP = 1.0
+# Answer latency of a real Q CPU on Ethernet is a few ms
+BENCH_LATENCY = 0.005
+
+
+class PlcEmulator:
+    """Local MC protocol 3E (binary, Q/L) server over emulated device memory.
+
+    Implements batch and random read/write of bit and word devices, which
+    is everything pymcprotocol.Type3E and AsyncType3E send for M, X, Y, D
+    and the other devices of DEVICE_CODES. SM400 reads as 1 like a running
+    CPU, so PlcLink keepalives work.
+
+    Scripts run on the emulator's event loop: set()/get() device values,
+    pulse() a device, wait_for() a value written by a client, or register
+    when(device, value, action, delay) to answer a client write, e.g. a
+    sensor output that follows its trigger after a settle time.
+
+    latency (+ uniform jitter) delays every answer. loss is the chance per
+    request that the link stalls: that request and every later one on the
+    connection go unanswered, so the client times out and reconnects.
+    """
+
+    def __init__(self, ip=EMULATOR_IP, port=EMULATOR_PORT, latency=0.0, jitter=0.0, loss=0.0):
+        self.ip = ip
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.bits = {("SM", 400): 1}
+        self.words = {}
+        self.watchers = []
+        self.server = None
+        self.writers = set()
+        self.loop = None
+        self.changed = None
+        self.requests = 0
+        self.stalls = 0
+
+    # =========================================================
+    # DEVICE MEMORY
+    # =========================================================
+
+    def get(self, device):
+        prefix, number = parse_device(device)
+        if prefix in WORD_DEVICES:
+            return self.words.get((prefix, number), 0)
+        return self.bits.get((prefix, number), 0)
+
+    def set(self, device, value):
+        prefix, number = parse_device(device)
+        self._store(prefix, number, value)
+
+    def _store(self, prefix, number, value):
+        if prefix in WORD_DEVICES:
+            old = self.words.get((prefix, number), 0)
+            self.words[(prefix, number)] = ((int(value) + 0x8000) & 0xFFFF) - 0x8000
+            new = self.words[(prefix, number)]
+        else:
+            old = self.bits.get((prefix, number), 0)
+            new = self.bits[(prefix, number)] = 1 if value else 0
+        if old != new:
+            self._notify(format_device(prefix, number), new)
+
+    def _read_word(self, prefix, number):
+        # Word access to a bit device covers 16 consecutive bits, first one in bit 0
+        if prefix in WORD_DEVICES:
+            return self.words.get((prefix, number), 0)
+        return sum(self.bits.get((prefix, number + i), 0) << i for i in range(16))
+
+    def _write_word(self, prefix, number, value):
+        if prefix in WORD_DEVICES:
+            self._store(prefix, number, value)
+        else:
+            for i in range(16):
+                self._store(prefix, number + i, (value >> i) & 1)
+
+    # =========================================================
+    # SCRIPTING
+    # =========================================================
+
+    def when(self, device, value, action, delay=0.0):
+        """On every change of device to value, after delay: set the {device: value}
+        dict action, or call action(emulator) (a coroutine function is run as a task).
+        """
+        device = format_device(*parse_device(device))
+        watcher = (device, value, action, delay)
+        self.watchers.append(watcher)
+        return watcher
+
+    def _notify(self, device, value):
+        if self.loop is None:
+            return
+        self.changed.set()
+        self.changed = asyncio.Event()
+        for watched, wanted, action, delay in list(self.watchers):
+            if watched == device and wanted == value:
+                self.loop.call_later(delay, self._run_action, action)
+
+    def _run_action(self, action):
+        if isinstance(action, dict):
+            for device, value in action.items():
+                self.set(device, value)
+            return
+        result = action(self)
+        if asyncio.iscoroutine(result):
+            self.loop.create_task(result)
+
+    async def wait_for(self, device, value, timeout=None):
+        """Wait until device == value. Returns False on timeout."""
+        deadline = None if timeout is None else self.loop.time() + timeout
+        while self.get(device) != value:
+            remaining = None if deadline is None else deadline - self.loop.time()
+            if remaining is not None and remaining <= 0:
+                return False
+            try:
+                await asyncio.wait_for(self.changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                return False
+        return True
+
+    async def pulse(self, device, on_time=0.2):
+        self.set(device, 1)
+        await asyncio.sleep(on_time)
+        self.set(device, 0)
+
+    # =========================================================
+    # SERVER
+    # =========================================================
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        self.changed = asyncio.Event()
+        self.server = await asyncio.start_server(self._serve, self.ip, self.port)
+        # Port 0 picks a free port
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self):
+        self.drop_connections()
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    def drop_connections(self):
+        """Reset every client connection, like a pulled cable or a CPU reset."""
+        for writer in list(self.writers):
+            writer.transport.abort()
+        self.writers.clear()
+
+    def start_thread(self):
+        """Run the emulator on its own event loop thread, for blocking clients.
+
+        Scripts must then be submitted with run_threadsafe().
+        """
+        started = threading.Event()
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(self.start())
+            started.set()
+            loop.run_forever()
+
+        threading.Thread(target=run, name="plc-emulator", daemon=True).start()
+        started.wait()
+        return self
+
+    def run_threadsafe(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    async def _serve(self, reader, writer):
+        self.writers.add(writer)
+        stalled = False
+        try:
+            while True:
+                header = await reader.readexactly(REQUEST_HEADER)
+                body = await reader.readexactly(int.from_bytes(header[7:9], "little"))
+                self.requests += 1
+                if not stalled and self.loss and random.random() < self.loss:
+                    self.stalls += 1
+                    stalled = True
+                if stalled:
+                    continue
+                end_code, data = self._execute(body)
+                delay = self.latency + (random.uniform(0.0, self.jitter) if self.jitter else 0.0)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                length = (2 + len(data)).to_bytes(2, "little")
+                writer.write(ANSWER_PREFIX + length + end_code.to_bytes(2, "little") + data)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.writers.discard(writer)
+            writer.close()
+
+    # =========================================================
+    # COMMANDS
+    # =========================================================
+
+    @staticmethod
+    def _device(data, offset):
+        code = data[offset + 3]
+        if code not in DEVICE_PREFIXES:
+            raise ValueError(f"unsupported device code {code:#04x}")
+        return DEVICE_PREFIXES[code], int.from_bytes(data[offset:offset + 3], "little")
+
+    def _execute(self, body):
+        """body: monitoring timer(2) command(2) subcommand(2) data -> (end code, answer data)."""
+        command = int.from_bytes(body[2:4], "little")
+        subcommand = int.from_bytes(body[4:6], "little")
+        data = body[6:]
+        try:
+            if command == 0x0401:
+                return 0, self._batch_read(data, subcommand == 0x0001)
+            if command == 0x1401:
+                self._batch_write(data, subcommand == 0x0001)
+                return 0, b""
+            if command == 0x0403 and subcommand == 0x0000:
+                return 0, self._random_read(data)
+            if command == 0x1402:
+                self._random_write(data, subcommand == 0x0001)
+                return 0, b""
+        except (ValueError, IndexError):
+            pass
+        return END_COMMAND_ERROR, b""
+
+    def _batch_read(self, data, bit_units):
+        prefix, head = self._device(data, 0)
+        count = int.from_bytes(data[4:6], "little")
+        if bit_units:
+            # Two points per byte, the first one in the high nibble
+            packed = bytearray((count + 1) // 2)
+            for i in range(count):
+                packed[i // 2] |= self.bits.get((prefix, head + i), 0) << (4 if i % 2 == 0 else 0)
+            return bytes(packed)
+        return b"".join(self._read_word(prefix, head + i).to_bytes(2, "little", signed=prefix in WORD_DEVICES)
+                        for i in range(count))
+
+    def _batch_write(self, data, bit_units):
+        prefix, head = self._device(data, 0)
+        count = int.from_bytes(data[4:6], "little")
+        values = data[6:]
+        for i in range(count):
+            if bit_units:
+                self._store(prefix, head + i, (values[i // 2] >> (4 if i % 2 == 0 else 0)) & 1)
+            else:
+                self._write_word(prefix, head + i, int.from_bytes(values[i * 2:i * 2 + 2], "little", signed=True))
+
+    def _random_read(self, data):
+        words, dwords = data[0], data[1]
+        answer = b""
+        for i in range(words):
+            prefix, number = self._device(data, 2 + i * 4)
+            answer += (self._read_word(prefix, number) & 0xFFFF).to_bytes(2, "little")
+        for i in range(dwords):
+            prefix, number = self._device(data, 2 + (words + i) * 4)
+            value = self._read_word(prefix, number) & 0xFFFF | (self._read_word(prefix, number + 1) & 0xFFFF) << 16
+            answer += value.to_bytes(4, "little")
+        return answer
+
+    def _random_write(self, data, bit_units):
+        if bit_units:
+            for i in range(data[0]):
+                prefix, number = self._device(data, 1 + i * 5)
+                self._store(prefix, number, data[1 + i * 5 + 4])
+            return
+        words, dwords = data[0], data[1]
+        offset = 2
+        for i in range(words):
+            prefix, number = self._device(data, offset)
+            self._write_word(prefix, number, int.from_bytes(data[offset + 4:offset + 6], "little", signed=True))
+            offset += 6
+        for i in range(dwords):
+            prefix, number = self._device(data, offset)
+            value = int.from_bytes(data[offset + 4:offset + 8], "little")
+            self._write_word(prefix, number, value & 0xFFFF)
+            self._write_word(prefix, number + 1, value >> 16)
+            offset += 8
+
+
+# =========================================================
+# PLC PROGRAMS
+# =========================================================
+
+async def handshake_program(emu, start="M100", busy="M101", done="M102", cycles=None, gap=BENCH_GAP):
+    """PLC side of the COM4/COM9 handshake: start ON, wait for done, start OFF.
+
+    Returns per cycle (start -> busy, start -> done) in seconds.
+    """
+    timings = []
+    while cycles is None or len(timings) < cycles:
+        await emu.wait_for(done, 0)
+        emu.set(start, 1)
+        started = time.monotonic()
+        await emu.wait_for(busy, 1)
+        responded = time.monotonic()
+        await emu.wait_for(done, 1)
+        timings.append((responded - started, time.monotonic() - started))
+        emu.set(start, 0)
+        await asyncio.sleep(gap)
+    return timings
+
+
+def festo_program(emu, parts=(("orange", True), ("brown", False), ("orange", False), ("brown", True)), settle=0.1):
+    """Sensor and conveyor side of FestoSensor.py with inspection_tree.json.
+
+    Parts are fed in order, then the tray reads empty. On the Y1E trigger
+    the sensor outputs (X0E, X06) follow the selected program (Y1A, Y1C,
+    Y18) after settle; M101 from the robot moves the next part in.
+    """
+    state = {"part": 0}
+
+    def sense(emu):
+        select = {device for device in ("Y1A", "Y1C", "Y18") if emu.get(device)}
+        if state["part"] >= len(parts):
+            emu.set("X0E", select == {"Y1A"})
+            return
+        color, good = parts[state["part"]]
+        emu.set("X0E", good if select == {"Y1A", "Y1C"} else False)
+        emu.set("X06", color == "orange" if select == {"Y1C"} else good and select == {"Y18"})
+
+    def next_part(emu):
+        state["part"] += 1
+        emu.set("M100", 0)
+        emu.loop.call_later(0.2, emu.set, "M100", 1)
+
+    emu.when("Y1E", 1, sense, delay=settle)
+    emu.when("M101", 1, next_part)
+    # Tray empty result: the tray is done, no next start
+    emu.when("M200", 1, {"M100": 0})
+    emu.set("M100", 1)
+    return state
+
+
+# =========================================================
+# POLLING VS EVENT BENCHMARK
+# =========================================================
+
+async def polling_robot(mc, job_time, poll_interval=0.2, reset_poll=0.5, pulse_time=0.2):
+    """The original loop: one read per poll, one write per bit."""
+    while True:
+        if (await mc.batchread_bitunits(headdevice="M100", readsize=1))[0] == 1:
+            await mc.batchwrite_bitunits(headdevice="M101", values=[1])
+            await asyncio.sleep(job_time)
+            await mc.batchwrite_bitunits(headdevice="M101", values=[0])
+            await mc.batchwrite_bitunits(headdevice="M102", values=[1])
+            await asyncio.sleep(pulse_time)
+            await mc.batchwrite_bitunits(headdevice="M102", values=[0])
+            await asyncio.sleep(pulse_time)
+            while (await mc.batchread_bitunits(headdevice="M100", readsize=1))[0] == 1:
+                await asyncio.sleep(reset_poll)
+        await asyncio.sleep(poll_interval)
+
+
+async def event_robot(mc, job_time, scan_interval=0.05, pulse_time=0.2):
+    """The scanner loop: edges from one read per scan, staged writes in one frame."""
+    io = AsyncPlcIO(mc, bits=["M100", "M101", "M102"])
+    scanner = AsyncPlcScanner(io, period=scan_interval)
+    triggers = asyncio.Queue()
+    scanner.subscribe("M100", queue=triggers)
+    scan_task = asyncio.create_task(scanner.run())
+    try:
+        while True:
+            await triggers.get()
+            io.set_bit("M101", 1)
+            await io.flush()
+            await asyncio.sleep(job_time)
+            io.set_bit("M101", 0)
+            io.set_bit("M102", 1)
+            await io.flush()
+            await asyncio.sleep(pulse_time)
+            io.set_bit("M102", 0)
+            await io.flush()
+            await scanner.wait_for("M100", 0)
+            while not triggers.empty():
+                triggers.get_nowait()
+    finally:
+        scanner.stop()
+        scan_task.cancel()
+
+
+async def benchmark(cycles=BENCH_CYCLES, job_time=BENCH_JOB_TIME, latency=BENCH_LATENCY, loss=0.0):
+    results = {}
+    for name, robot in (("polling", polling_robot), ("event", event_robot)):
+        emu = await PlcEmulator(port=0, latency=latency, jitter=latency / 2, loss=loss).start()
+        mc = AsyncType3E(emu.ip, emu.port, timeout=1.0)
+        await mc.connect()
+        robot_task = asyncio.create_task(robot(mc, job_time))
+        started = time.monotonic()
+        timings = await handshake_program(emu, cycles=cycles)
+        elapsed = time.monotonic() - started
+        robot_task.cancel()
+        await asyncio.gather(robot_task, return_exceptions=True)
+        await mc.close()
+        await emu.close()
+
+        responses = sorted(t[0] for t in timings)
+        results[name] = {
+            "cycles": cycles,
+            "response_p50_ms": percentile(responses, 50) * 1000,
+            "response_p95_ms": percentile(responses, 95) * 1000,
+            "cycle_s": sum(t[1] for t in timings) / cycles,
+            "cycles_per_min": 60.0 * cycles / elapsed,
+            "requests_per_cycle": emu.requests / cycles,
+        }
+    return results
+
+
+def print_benchmark(results):
+    for name, m in results.items():
+        print(f"[BENCH] {name:<8} {m['cycles']} cycles: start->busy p50={m['response_p50_ms']:.0f} "
+              f"p95={m['response_p95_ms']:.0f} ms, start->done {m['cycle_s']:.2f} s, "
+              f"{m['cycles_per_min']:.1f} cycles/min, {m['requests_per_cycle']:.1f} requests/cycle")
+
+
+async def serve(program):
+    emu = await PlcEmulator().start()
+    print(f"[PLC] Emulator listening on {emu.ip}:{emu.port}")
+    if program == "handshake":
+        await handshake_program(emu)
+    else:
+        festo_program(emu)
+        await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    # python PlcEmulator.py                    -> polling vs event benchmark
+    # python PlcEmulator.py handshake|festo    -> standalone emulator for the scripts
+    try:
+        if len(sys.argv) > 1:
+            asyncio.run(serve(sys.argv[1]))
+        else:
+            print_benchmark(asyncio.run(benchmark()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,364 @@
+# PlcIO.py
+import re
+import asyncio
+import threading
+
+# Device types whose addresses are written in hexadecimal (X0E, Y1A, ...)
+HEX_DEVICES = ("X", "Y", "B", "W", "SB", "SW", "DX", "DY")
+# Word (16-bit) device types; everything else is a bit device
+WORD_DEVICES = ("D", "W", "R", "ZR", "SD", "SW")
+
+# Widest range handled as one batch frame; wider sets use random access
+MAX_BIT_SPAN = 256
+MAX_WORD_SPAN = 64
+
+_DEVICE_RE = re.compile(r"^(SM|SD|SB|SW|DX|DY|ZR|[XYMLFVBDWRZ])([0-9A-F]+)$")
+
+
+def parse_device(device):
+    """"M100" -> ("M", 100), "Y1A" -> ("Y", 26)."""
+    m = _DEVICE_RE.match(device.upper())
+    if not m:
+        raise ValueError(f"Bad PLC device: {device}")
+    prefix, number = m.groups()
+    return prefix, int(number, 16 if prefix in HEX_DEVICES else 10)
+
+
+def format_device(prefix, number):
+    if prefix in HEX_DEVICES:
+        # Leading 0 when the number starts with a letter: X0E, not XE
+        digits = f"{number:X}"
+        return f"{prefix}{'0' if digits[0] > '9' else ''}{digits}"
+    return f"{prefix}{number}"
+
+
+def contiguous_runs(devices, max_span):
+    """Group device names into (prefix, first, last) spans for batch access."""
+    by_prefix = {}
+    for device in devices:
+        prefix, number = parse_device(device)
+        by_prefix.setdefault(prefix, []).append(number)
+    runs = []
+    for prefix, numbers in by_prefix.items():
+        numbers.sort()
+        first = last = numbers[0]
+        for n in numbers[1:]:
+            if n - first >= max_span:
+                runs.append((prefix, first, last))
+                first = n
+            last = n
+        runs.append((prefix, first, last))
+    return runs
+
+
+class PlcIO:
+    """Process image of a declared set of handshake bits and words.
+
+    scan() refreshes every declared device in one frame, and flush() sends
+    all staged writes of the scan in one frame: a batchwrite when they form
+    one contiguous range, otherwise one random write.
+
+    With skip_unchanged the last written value of every output is kept, and
+    staging a value the PLC already has sends nothing. Call forget() after a
+    reconnect, when the PLC state is no longer known.
+    """
+
+    def __init__(self, mc, bits=(), words=(), skip_unchanged=False):
+        self.mc = mc
+        self.lock = threading.RLock()
+        self.skip_unchanged = skip_unchanged
+        self.bits = {}
+        self.words = {}
+        self.pending_bits = {}
+        self.pending_words = {}
+        self.written_bits = {}
+        self.written_words = {}
+        self.round_trips = 0
+        # Per-cycle counters: single-device writes requested vs frames sent
+        self.write_requests = 0
+        self.write_frames = 0
+        self.declare(bits, words)
+
+    def declare(self, bits=(), words=()):
+        with self.lock:
+            for device in bits:
+                self.bits.setdefault(format_device(*parse_device(device)), 0)
+            for device in words:
+                self.words.setdefault(format_device(*parse_device(device)), 0)
+            self.bit_runs = contiguous_runs(self.bits, MAX_BIT_SPAN)
+            self.word_runs = contiguous_runs(self.words, MAX_WORD_SPAN)
+
+    # =========================================================
+    # READS
+    # =========================================================
+
+    def scan(self):
+        """Refresh the image in one frame. Returns the number of frames sent.
+
+        A single contiguous range is read with batchread; anything else is
+        read with one randomread, bit devices as 16-bit blocks.
+        """
+        with self.lock:
+            plan = self._scan_plan()
+            if plan is None:
+                return 0
+            method, kwargs, apply = plan
+            apply(getattr(self.mc, method)(**kwargs))
+            self.round_trips += 1
+            return 1
+
+    def _scan_plan(self):
+        """(client method, kwargs, apply(result)) for one scan frame, or None."""
+        if len(self.bit_runs) + len(self.word_runs) == 1:
+            return self._scan_batch()
+        if self.bit_runs or self.word_runs:
+            return self._scan_random()
+        return None
+
+    def _scan_batch(self):
+        if self.bit_runs:
+            prefix, first, last = self.bit_runs[0]
+            method, image = "batchread_bitunits", self.bits
+        else:
+            prefix, first, last = self.word_runs[0]
+            method, image = "batchread_wordunits", self.words
+
+        def apply(values):
+            for offset, value in enumerate(values):
+                device = format_device(prefix, first + offset)
+                if device in image:
+                    image[device] = int(value)
+
+        return method, {"headdevice": format_device(prefix, first), "readsize": last - first + 1}, apply
+
+    def _scan_random(self):
+        blocks = sorted({(prefix, number - number % 16) for prefix, number in map(parse_device, self.bits)})
+        block_devices = [format_device(prefix, base) for prefix, base in blocks]
+        word_devices = list(self.words)
+
+        def apply(result):
+            values, _ = result
+            for device, value in zip(word_devices, values):
+                self.words[device] = int(value)
+            block_values = dict(zip(blocks, values[len(word_devices):]))
+            for device in self.bits:
+                prefix, number = parse_device(device)
+                base = number - number % 16
+                self.bits[device] = (int(block_values[(prefix, base)]) & 0xFFFF) >> (number - base) & 1
+
+        return "randomread", {"word_devices": word_devices + block_devices, "dword_devices": []}, apply
+
+    def read_bit(self, device):
+        """Read one bit now, outside the declared image, in one frame."""
+        with self.lock:
+            value = self.mc.batchread_bitunits(headdevice=device, readsize=1)[0]
+            self.round_trips += 1
+            return int(value)
+
+    def read_bits(self, devices):
+        """Read several bits now, outside the declared image, in one frame."""
+        method, kwargs, decode = self._read_plan(devices)
+        with self.lock:
+            values = decode(getattr(self.mc, method)(**kwargs))
+            self.round_trips += 1
+            return values
+
+    def _read_plan(self, devices):
+        """One batchread if the bits fit one range, else one randomread of 16-bit blocks."""
+        devices = [format_device(*parse_device(d)) for d in devices]
+        runs = contiguous_runs(devices, MAX_BIT_SPAN)
+        if len(runs) == 1:
+            prefix, first, last = runs[0]
+
+            def decode(values):
+                return [int(values[parse_device(d)[1] - first]) for d in devices]
+
+            return "batchread_bitunits", {"headdevice": format_device(prefix, first), "readsize": last - first + 1}, decode
+
+        blocks = sorted({(prefix, number - number % 16) for prefix, number in map(parse_device, devices)})
+
+        def decode(result):
+            block_values = dict(zip(blocks, result[0]))
+            values = []
+            for prefix, number in map(parse_device, devices):
+                base = number - number % 16
+                values.append((int(block_values[(prefix, base)]) & 0xFFFF) >> (number - base) & 1)
+            return values
+
+        return "randomread", {"word_devices": [format_device(p, b) for p, b in blocks], "dword_devices": []}, decode
+
+    def bit(self, device):
+        return self.bits[format_device(*parse_device(device))]
+
+    def word(self, device):
+        return self.words[format_device(*parse_device(device))]
+
+    # =========================================================
+    # WRITES
+    # =========================================================
+
+    def set_bit(self, device, value):
+        """Stage a bit write; sent by the next flush()."""
+        device = format_device(*parse_device(device))
+        with self.lock:
+            self._stage(device, 1 if value else 0, self.pending_bits, self.written_bits, self.bits)
+
+    def set_word(self, device, value):
+        device = format_device(*parse_device(device))
+        with self.lock:
+            self._stage(device, int(value), self.pending_words, self.written_words, self.words)
+
+    def _stage(self, device, value, pending, written, image):
+        self.write_requests += 1
+        if self.skip_unchanged and written.get(device) == value:
+            pending.pop(device, None)
+        else:
+            pending[device] = value
+        if device in image:
+            image[device] = value
+
+    def forget(self):
+        """Drop staged writes and the written-output image, e.g. after a
+        reconnect, so the next writes are all sent."""
+        with self.lock:
+            self.pending_bits.clear()
+            self.pending_words.clear()
+            self.written_bits.clear()
+            self.written_words.clear()
+
+    def flush(self):
+        """Send all staged writes. Returns the number of frames sent."""
+        with self.lock:
+            frames = self._flush_plan()
+            for method, kwargs, commit in frames:
+                try:
+                    getattr(self.mc, method)(**kwargs)
+                except Exception:
+                    commit(False)
+                    raise
+                commit(True)
+            self.round_trips += len(frames)
+            self.write_frames += len(frames)
+            return len(frames)
+
+    def _flush_plan(self):
+        """Take the staged writes as (client method, kwargs, commit(ok)) frames.
+
+        The staged values are moved out of pending at once, so writes staged
+        while a frame is in flight go into the next flush. commit(False)
+        puts back the values that were not staged again in the meantime.
+        """
+        frames = []
+        if self.pending_bits:
+            frames.append(self._take(self.pending_bits, self.written_bits, MAX_BIT_SPAN,
+                                     "batchwrite_bitunits", "randomwrite_bitunits"))
+        if self.pending_words:
+            frames.append(self._take(self.pending_words, self.written_words, MAX_WORD_SPAN,
+                                     "batchwrite_wordunits", "randomwrite"))
+        return frames
+
+    def _take(self, pending, written, max_span, batchwrite, randomwrite):
+        values = dict(pending)
+        pending.clear()
+        runs = contiguous_runs(values, max_span)
+        prefix, first, last = runs[0]
+        if len(runs) == 1 and last - first + 1 == len(values):
+            method = batchwrite
+            kwargs = {"headdevice": format_device(prefix, first),
+                      "values": [values[format_device(prefix, n)] for n in range(first, last + 1)]}
+        elif randomwrite == "randomwrite_bitunits":
+            method = randomwrite
+            kwargs = {"bit_devices": list(values), "values": list(values.values())}
+        else:
+            method = randomwrite
+            kwargs = {"word_devices": list(values), "word_values": list(values.values()),
+                      "dword_devices": [], "dword_values": []}
+
+        def commit(ok):
+            if ok:
+                written.update(values)
+            else:
+                for device, value in values.items():
+                    pending.setdefault(device, value)
+
+        return method, kwargs, commit
+
+    def replay(self, devices):
+        """Stage the last written value of devices again, even if unchanged.
+
+        Used after a reconnect to restore handshake outputs the PLC may have
+        lost; writes that failed during the outage are still pending anyway.
+        """
+        with self.lock:
+            for device in devices:
+                device = format_device(*parse_device(device))
+                if device in self.written_bits:
+                    self.pending_bits.setdefault(device, self.written_bits[device])
+                elif device in self.written_words:
+                    self.pending_words.setdefault(device, self.written_words[device])
+
+    def write_bits(self, **bits):
+        """Stage several bits and flush them as one frame, e.g. write_bits(M101=0, M102=1)."""
+        for device, value in bits.items():
+            self.set_bit(device, value)
+        return self.flush()
+
+    def cycle_stats(self, reset=True):
+        """Write requests vs frames sent since the last call."""
+        with self.lock:
+            stats = {"requests": self.write_requests, "frames": self.write_frames,
+                     "saved": self.write_requests - self.write_frames}
+            if reset:
+                self.write_requests = 0
+                self.write_frames = 0
+            return stats
+
+
+class AsyncPlcIO(PlcIO):
+    """PlcIO over an AsyncType3E client.
+
+    scan(), flush(), read_bit(), read_bits() and write_bits() are
+    coroutines. Frames of concurrent coroutines are pipelined by the client
+    on its one socket instead of being serialised by the lock.
+    """
+
+    async def scan(self):
+        plan = self._scan_plan()
+        if plan is None:
+            return 0
+        method, kwargs, apply = plan
+        apply(await getattr(self.mc, method)(**kwargs))
+        self.round_trips += 1
+        return 1
+
+    async def flush(self):
+        frames = self._flush_plan()
+        if not frames:
+            return 0
+        # Bit and word frames go out back to back
+        results = await asyncio.gather(*(getattr(self.mc, method)(**kwargs) for method, kwargs, _ in frames),
+                                       return_exceptions=True)
+        for (_, _, commit), result in zip(frames, results):
+            commit(not isinstance(result, BaseException))
+        self.round_trips += len(frames)
+        self.write_frames += len(frames)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return len(frames)
+
+    async def read_bit(self, device):
+        value = (await self.mc.batchread_bitunits(headdevice=device, readsize=1))[0]
+        self.round_trips += 1
+        return int(value)
+
+    async def read_bits(self, devices):
+        method, kwargs, decode = self._read_plan(devices)
+        values = decode(await getattr(self.mc, method)(**kwargs))
+        self.round_trips += 1
+        return values
+
+    async def write_bits(self, **bits):
+        for device, value in bits.items():
+            self.set_bit(device, value)
+        return await self.flush()
@@ -0,0 +1,158 @@
+# PlcLink.py
+import time
+import random
+import asyncio
+
+# Reconnect backoff: BASE_DELAY * 2^attempt, capped, with +/- JITTER
+BASE_DELAY = 0.5
+MAX_DELAY = 30.0
+JITTER = 0.2
+# A keepalive read is sent when the link has been idle this long
+KEEPALIVE_INTERVAL = 1.0
+# SM400 is always ON in a running Q/L CPU
+KEEPALIVE_DEVICE = "SM400"
+# How often the supervisor checks the link
+CHECK_INTERVAL = 0.1
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(p / 100.0 * (len(sorted_values) - 1))))]
+
+
+class PlcLink:
+    """Supervises one AsyncType3E connection.
+
+    run() reconnects with exponential backoff, sends a keepalive read when
+    the link is idle and, after every reconnect, replays the last written
+    values of the replay devices (e.g. busy/complete handshake bits) along
+    with any write that failed during the outage, so a dropped link does
+    not lose a cycle. The client's own reconnect is turned off: requests
+    made while the link is down fail at once with ConnectionError.
+    """
+
+    def __init__(self, mc, io=None, replay=(), keepalive_interval=KEEPALIVE_INTERVAL,
+                 keepalive_device=KEEPALIVE_DEVICE, base_delay=BASE_DELAY, max_delay=MAX_DELAY, jitter=JITTER):
+        self.mc = mc
+        self.io = io
+        self.replay_devices = list(replay)
+        self.keepalive_interval = keepalive_interval
+        self.keepalive_device = keepalive_device
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.running = True
+        self.keepalives = 0
+        self.reconnects = 0
+        self.last_drop = None
+        mc.reconnect = False
+
+    # =========================================================
+    # CONNECTION
+    # =========================================================
+
+    def backoff_delay(self, attempt):
+        delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return delay * (1.0 + self.jitter * random.uniform(-1.0, 1.0))
+
+    async def connect(self):
+        """Connect, retrying with exponential backoff until it succeeds."""
+        attempt = 0
+        while self.running:
+            try:
+                await self.mc.connect()
+                break
+            except Exception as e:
+                delay = self.backoff_delay(attempt)
+                print(f"[PLC] Connection Error: {e}. Retrying in {delay:.1f} s...")
+                await asyncio.sleep(delay)
+                attempt += 1
+        else:
+            return
+
+        if self.mc.connections > 1:
+            self.reconnects += 1
+            outage = time.monotonic() - self.last_drop if self.last_drop else 0.0
+            print(f"[PLC] Reconnected after {outage:.1f} s ({attempt + 1} attempts).")
+            await self._replay()
+
+    async def _replay(self):
+        if self.io is None:
+            return
+        self.io.replay(self.replay_devices)
+        try:
+            frames = await self.io.flush()
+            if frames:
+                print(f"[PLC] Replayed handshake state in {frames} frame(s).")
+        except Exception as e:
+            print(f"[PLC] Replay failed: {e}")
+
+    async def wait_connected(self):
+        while not self.mc.connected:
+            await asyncio.sleep(CHECK_INTERVAL)
+
+    async def flush(self):
+        """io.flush() that waits out a link outage instead of failing.
+
+        Staged values that could not be sent stay pending and go out with the
+        replay after the reconnect.
+        """
+        while True:
+            try:
+                return await self.io.flush()
+            except (OSError, ConnectionError):
+                await asyncio.sleep(CHECK_INTERVAL)
+                await self.wait_connected()
+
+    # =========================================================
+    # SUPERVISOR
+    # =========================================================
+
+    def stop(self):
+        self.running = False
+
+    async def run(self):
+        while self.running:
+            if not self.mc.connected:
+                if self.mc.connections:
+                    self.last_drop = time.monotonic()
+                    print(f"[PLC] Link down ({self.mc.drops} drops so far). Reconnecting...")
+                await self.connect()
+                continue
+
+            idle = time.monotonic() - self.mc.last_answer
+            if idle >= self.keepalive_interval:
+                try:
+                    await self.mc.batchread_bitunits(headdevice=self.keepalive_device, readsize=1)
+                    self.keepalives += 1
+                except Exception as e:
+                    # A timeout has already dropped the link; the next check reconnects
+                    print(f"[PLC] Keepalive failed: {e!r}")
+                idle = 0.0
+            await asyncio.sleep(min(CHECK_INTERVAL, self.keepalive_interval - idle))
+
+    # =========================================================
+    # HEALTH
+    # =========================================================
+
+    def metrics(self):
+        latencies = sorted(self.mc.latencies)
+        return {
+            "connected": self.mc.connected,
+            "requests": self.mc.requests,
+            "drops": self.mc.drops,
+            "reconnects": self.reconnects,
+            "keepalives": self.keepalives,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "max_ms": (latencies[-1] if latencies else 0.0) * 1000,
+        }
+
+    def print_metrics(self):
+        m = self.metrics()
+        print(f"[PLC] link {'up' if m['connected'] else 'down'} requests={m['requests']} "
+              f"drops={m['drops']} reconnects={m['reconnects']} keepalives={m['keepalives']} "
+              f"latency p50={m['p50_ms']:.1f} p95={m['p95_ms']:.1f} p99={m['p99_ms']:.1f} "
+              f"max={m['max_ms']:.1f} ms")
@@ -0,0 +1,244 @@
+# PlcScanner.py
+import time
+import asyncio
+import threading
+from collections import namedtuple
+
+from PlcIO import WORD_DEVICES, format_device, parse_device
+
+RISING = 1
+FALLING = 2
+BOTH = RISING | FALLING
+
+# One change of a scanned device. For words, rising means 0 -> non-zero
+# and falling non-zero -> 0; other value changes raise no event.
+Edge = namedtuple("Edge", "device old new rising time")
+
+
+class Subscription:
+    def __init__(self, devices, edge, callback):
+        self.devices = devices
+        self.edge = edge
+        self.callback = callback
+
+    def matches(self, event):
+        if event.device not in self.devices:
+            return False
+        return bool(self.edge & (RISING if event.rising else FALLING))
+
+
+class EdgeSubscriptions:
+    """Subscriber list and last scanned values shared by both scanners."""
+
+    def _init_subscriptions(self, io):
+        self.io = io
+        self.subscriptions = []
+        self.previous = {}
+        self.changed = threading.Condition()
+        self.scans = 0
+        self.error = None
+
+    def subscribe(self, devices, callback=None, edge=RISING, queue=None, loop=None):
+        """Call callback(event), or put the event on queue, for each edge.
+
+        devices is one device name or a list. For an asyncio.Queue fed from
+        the scanner thread pass its event loop as loop; a queue.Queue, or an
+        asyncio.Queue used with AsyncPlcScanner, needs no loop.
+        """
+        if isinstance(devices, str):
+            devices = [devices]
+        devices = {format_device(*parse_device(d)) for d in devices}
+        if callback is None:
+            if queue is None:
+                raise ValueError("subscribe needs a callback or a queue")
+            if loop is not None:
+                callback = lambda event: loop.call_soon_threadsafe(queue.put_nowait, event)
+            else:
+                callback = queue.put_nowait
+        words = [d for d in devices if parse_device(d)[0] in WORD_DEVICES]
+        self.io.declare(bits=[d for d in devices if d not in words], words=words)
+        subscription = Subscription(devices, edge, callback)
+        with self.changed:
+            self.subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.changed:
+            self.subscriptions.remove(subscription)
+
+    def value(self, device):
+        """Last scanned value of a device."""
+        device = format_device(*parse_device(device))
+        with self.changed:
+            return self.previous.get(device, 0)
+
+    def _publish(self, current):
+        """Store a scan's values and call the subscribers of every edge."""
+        now = time.monotonic()
+        events = []
+        with self.changed:
+            for device, new in current.items():
+                old = self.previous.get(device, 0)
+                if bool(old) != bool(new):
+                    events.append(Edge(device, old, new, not old and bool(new), now))
+            self.previous = current
+            self.scans += 1
+            subscriptions = list(self.subscriptions)
+            self.changed.notify_all()
+
+        for event in events:
+            for subscription in subscriptions:
+                if subscription.matches(event):
+                    subscription.callback(event)
+        return events
+
+
+class PlcScanner(EdgeSubscriptions, threading.Thread):
+    """Samples the devices of a PlcIO image at a fixed rate and raises edges.
+
+    Each scan is one read frame for every subscribed device, followed by a
+    flush, so writes staged on the image from any thread go out within one
+    period. Subscribers get Edge events through a callback (run on the
+    scanner thread, keep it short) or a queue. The first scan compares
+    against all-zero, so devices already ON are reported as rising edges.
+    """
+
+    def __init__(self, io, period=0.05, name="plc-scanner"):
+        threading.Thread.__init__(self, name=name, daemon=True)
+        self._init_subscriptions(io)
+        self.period = period
+        self.running = True
+
+    def wait_for(self, device, value, timeout=None):
+        """Block until a scan shows device == value. Returns False on timeout.
+
+        Returns at once if the last scan already showed it, so this also
+        serves as a level trigger or a wait-for-reset debounce.
+        """
+        device = format_device(*parse_device(device))
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.changed:
+            while self.previous.get(device) != value:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.changed.wait(remaining)
+            return True
+
+    # =========================================================
+    # SCAN LOOP
+    # =========================================================
+
+    def stop(self):
+        self.running = False
+
+    def scan_once(self):
+        """One scan: read, flush staged writes, dispatch edges."""
+        io = self.io
+        with io.lock:
+            io.scan()
+            io.flush()
+            current = dict(io.bits)
+            current.update(io.words)
+        return self._publish(current)
+
+    def run(self):
+        next_scan = time.monotonic()
+        while self.running:
+            try:
+                self.scan_once()
+                if self.error is not None:
+                    print("[PLC] Scanner recovered.")
+                self.error = None
+            except Exception as e:
+                # Report once per outage, keep scanning at the same rate
+                if self.error is None:
+                    print(f"[PLC] Scan error: {e}")
+                self.error = e
+                with self.changed:
+                    self.changed.notify_all()
+
+            # Fixed-rate scanning: sleep to the next tick instead of a flat delay
+            next_scan += self.period
+            delay = next_scan - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_scan = time.monotonic()
+
+
+class AsyncPlcScanner(EdgeSubscriptions):
+    """PlcScanner for an AsyncPlcIO image, run as a task on the event loop.
+
+    Callbacks run on the loop; wait_for() is a coroutine.
+    """
+
+    def __init__(self, io, period=0.05):
+        self._init_subscriptions(io)
+        self.period = period
+        self.running = True
+        self.scanned = asyncio.Event()
+
+    def stop(self):
+        self.running = False
+
+    async def scan_once(self):
+        await self.io.scan()
+        await self.io.flush()
+        current = dict(self.io.bits)
+        current.update(self.io.words)
+        events = self._publish(current)
+        # Wake every wait_for(), then arm a fresh event for the next scan
+        self.scanned.set()
+        self.scanned = asyncio.Event()
+        return events
+
+    async def wait_for(self, device, value, timeout=None):
+        """Wait until a scan shows device == value. Returns False on timeout."""
+        device = format_device(*parse_device(device))
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while self.previous.get(device) != value:
+            remaining = None if deadline is None else deadline - loop.time()
+            if remaining is not None and remaining <= 0:
+                return False
+            try:
+                await asyncio.wait_for(self.scanned.wait(), remaining)
+            except asyncio.TimeoutError:
+                return False
+        return True
+
+    async def wait_scans(self, count=1):
+        """Wait until count more scans have completed.
+
+        A scan already running when this is called may have read before a
+        write the caller just flushed; count=2 guarantees a fresh read.
+        """
+        target = self.scans + count
+        while self.scans < target:
+            await self.scanned.wait()
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        next_scan = loop.time()
+        while self.running:
+            try:
+                await self.scan_once()
+                if self.error is not None:
+                    print("[PLC] Scanner recovered.")
+                self.error = None
+            except Exception as e:
+                # Report once per outage; the client reconnects on the next scan
+                if self.error is None:
+                    print(f"[PLC] Scan error: {e!r}")
+                self.error = e
+                self.scanned.set()
+                self.scanned = asyncio.Event()
+
+            # Fixed-rate scanning: sleep to the next tick instead of a flat delay
+            next_scan += self.period
+            delay = next_scan - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                next_scan = loop.time()
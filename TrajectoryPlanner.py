@@ -0,0 +1,286 @@
+# TrajectoryPlanner.py
+import math
+
+import DobotDllType as dType
+from MotionModel import COMMAND_LATENCY
+from MotionEstimator import MotionEstimator
+from WaypointProgram import (Program, MODE_DEFAULT, MODE_NONE, MODE_CP, TOOL_HOLD, OUTPUT_NONE, TOOL_OUTPUTS,
+                             CP_ACCELERATION, KIND_NONE, KIND_APPROACH, KIND_ACTION, KIND_RETREAT, KIND_TRANSFER)
+
+# Two poses closer than this are the same point (mm, degrees for R)
+POSITION_TOLERANCE = 0.05
+ROTATION_TOLERANCE = 0.05
+
+# Continuous-path blending: cruise speed of CP segments (mm/s), how far a
+# blended corner may cut inside the taught point (mm), and the slowest
+# junction speed sent to the controller (mm/s)
+CP_VELOCITY = 100.0
+JUNCTION_DEVIATION = 0.5
+MIN_JUNCTION_VELOCITY = 5.0
+
+# Mode per segment annotation. Approach, action and retreat stay on a
+# straight line near the part; a transfer runs in free space.
+KIND_MODES = {
+    KIND_APPROACH: dType.PTPMode.PTPMOVLXYZMode,
+    KIND_ACTION: dType.PTPMode.PTPMOVLXYZMode,
+    KIND_RETREAT: dType.PTPMode.PTPMOVLXYZMode,
+    KIND_TRANSFER: dType.PTPMode.PTPMOVJXYZMode,
+}
+
+
+def same_pose(a, b, position_tolerance=POSITION_TOLERANCE, rotation_tolerance=ROTATION_TOLERANCE):
+    return math.dist(a[:3], b[:3]) <= position_tolerance and abs(a[3] - b[3]) <= rotation_tolerance
+
+
+def junction_velocity(a, b, c, acceleration, deviation=JUNCTION_DEVIATION, cruise=CP_VELOCITY):
+    """Speed through corner b of the path a -> b -> c.
+
+    The corner is rounded by an arc that stays within deviation of b; the
+    speed is the one that keeps the centripetal acceleration on that arc at
+    acceleration: full cruise on a straight line, zero on a reversal.
+    """
+    d1 = math.dist(a[:3], b[:3])
+    d2 = math.dist(b[:3], c[:3])
+    if d1 == 0 or d2 == 0:
+        return 0.0
+    dot = sum((b[k] - a[k]) * (c[k] - b[k]) for k in range(3)) / (d1 * d2)
+    # Half the angle between the reversed incoming and the outgoing direction
+    sin_half = math.sqrt(max(0.0, (1.0 + dot) / 2.0))
+    if sin_half >= 1.0:
+        return cruise
+    return min(cruise, math.sqrt(acceleration * deviation * sin_half / (1.0 - sin_half)))
+
+
+class TrajectoryPlanner:
+    """Pre-planning pass over a Program before it is queued.
+
+    - A point at the same pose as the one before it becomes a pure I/O
+      point (MODE_NONE): only its tool change and dwell are queued. Its
+      dwell is added to the previous point when it has no tool change.
+    - A tool change to the state the tool is already in is dropped.
+    - Each move gets a PTP mode from the annotation of its target point:
+      MOVL for approach/action/retreat, MOVJ for a transfer, and JUMP for a
+      transfer with no retreat before it and no approach after it, which
+      would otherwise move sideways at work height. Unannotated moves keep
+      the mode passed to commands().
+    - With parallel_outputs, tool changes ride on a move (SetPTPPOCmd)
+      instead of being queued after it: a tool change at a move point
+      fires at output_ratio % of that move, an I/O-only point right after
+      a move without dwell is folded into that move, and one with no dwell
+      of its own is sent at the start of the next move.
+    - With blend, runs of two or more moves with no tool change, no dwell,
+      no approach/action annotation and no R change become continuous-path
+      segments (MODE_CP) at cp_velocity that do not stop at their points.
+      Each point's junction speed is its corner speed (junction_velocity),
+      lowered where the path cannot brake in time for the corners ahead.
+      Points with I/O stay PTP moves.
+
+    Use it as plan=planner, plan_settings=planner.settings() of
+    load_program(), or call it on a Program. estimate() predicts the queue
+    time of a program with MotionEstimator.
+    """
+
+    def __init__(self, default_mode=dType.PTPMode.PTPMOVLXYZMode, kind_modes=None, jump_transfers=True,
+                 position_tolerance=POSITION_TOLERANCE, rotation_tolerance=ROTATION_TOLERANCE,
+                 parallel_outputs=False, output_ratio=100, blend=False, cp_velocity=CP_VELOCITY,
+                 cp_acceleration=CP_ACCELERATION, junction_deviation=JUNCTION_DEVIATION):
+        self.default_mode = default_mode
+        self.kind_modes = dict(KIND_MODES if kind_modes is None else kind_modes)
+        self.jump_transfers = jump_transfers
+        self.position_tolerance = position_tolerance
+        self.rotation_tolerance = rotation_tolerance
+        self.parallel_outputs = parallel_outputs
+        self.output_ratio = output_ratio
+        self.blend = blend
+        self.cp_velocity = cp_velocity
+        self.cp_acceleration = cp_acceleration
+        self.junction_deviation = junction_deviation
+
+    def settings(self):
+        return {"default_mode": self.default_mode, "kind_modes": sorted(self.kind_modes.items()),
+                "jump_transfers": self.jump_transfers,
+                "tolerance": [self.position_tolerance, self.rotation_tolerance],
+                "parallel_outputs": [self.parallel_outputs, self.output_ratio],
+                "blend": [self.blend, self.cp_velocity, self.cp_acceleration, self.junction_deviation]}
+
+    def __call__(self, program, start_pose=None):
+        return self.plan(program, start_pose)
+
+    # =========================================================
+    # PLANNING
+    # =========================================================
+
+    def segment_mode(self, program, i):
+        kind = program.kind[i]
+        if kind == KIND_NONE or kind not in self.kind_modes:
+            return MODE_DEFAULT
+        if kind == KIND_TRANSFER and self.jump_transfers:
+            before = program.kind[i - 1] if i > 0 else KIND_NONE
+            after = program.kind[i + 1] if i + 1 < len(program) else KIND_NONE
+            if before not in (KIND_RETREAT, KIND_TRANSFER) and after not in (KIND_APPROACH, KIND_TRANSFER):
+                return dType.PTPMode.PTPJUMPXYZMode
+        return self.kind_modes[kind]
+
+    def plan(self, program, start_pose=None):
+        """Return a planned copy of program.
+
+        start_pose is where the arm is when the program starts (e.g. the
+        last point of the previous cycle); a first point at that pose is
+        not moved to.
+        """
+        planned = Program(program.effector)
+        pose = tuple(start_pose[:4]) if start_pose is not None else None
+        tool = None
+        for i in range(len(program)):
+            point = (program.x[i], program.y[i], program.z[i], program.r[i])
+            moves = pose is None or not same_pose(pose, point, self.position_tolerance, self.rotation_tolerance)
+            point_tool = program.tool[i]
+            if point_tool != TOOL_HOLD and point_tool == tool:
+                point_tool = TOOL_HOLD
+            if point_tool != TOOL_HOLD:
+                tool = point_tool
+            dwell = program.dwell_ms[i]
+
+            if not moves and point_tool == TOOL_HOLD and len(planned):
+                # Nothing but a dwell: fold it into the previous point
+                planned.dwell_ms[-1] += dwell
+                continue
+            if not moves and point_tool == TOOL_HOLD and dwell <= 0:
+                continue
+            planned.append(*point, program.velocity[i], program.acceleration[i], dwell, point_tool,
+                           program.kind[i], self.segment_mode(program, i) if moves else MODE_NONE)
+            if moves:
+                pose = point
+        if self.parallel_outputs:
+            planned = self.fold_outputs(planned)
+        if self.blend:
+            self.blend_path(planned, start_pose)
+        return planned
+
+    def fold_outputs(self, program):
+        """Attach tool changes to moves as parallel outputs.
+
+        Programs for an effector without a TOOL_OUTPUTS entry are returned
+        unchanged and keep their separate end effector commands.
+        """
+        if program.effector not in TOOL_OUTPUTS:
+            return program
+        folded = Program(program.effector)
+        carry = TOOL_HOLD
+        for i in range(len(program)):
+            point = program[i]
+            moves = point.mode != MODE_NONE
+            if carry != TOOL_HOLD:
+                # Tool change of the I/O-only point before, at the start of this move
+                point.tool, point.output_ratio = carry, 0
+                carry = TOOL_HOLD
+            elif moves and point.tool != TOOL_HOLD and point.output_ratio == OUTPUT_NONE:
+                point.output_ratio = self.output_ratio
+            elif not moves and point.tool != TOOL_HOLD:
+                last = len(folded) - 1
+                if (last >= 0 and folded.mode[last] != MODE_NONE and folded.tool[last] == TOOL_HOLD
+                        and folded.dwell_ms[last] <= 0):
+                    folded.tool[last] = point.tool
+                    folded.output_ratio[last] = self.output_ratio
+                    folded.dwell_ms[last] = point.dwell_ms
+                    continue
+                if (point.dwell_ms <= 0 and i + 1 < len(program) and program.mode[i + 1] != MODE_NONE
+                        and program.tool[i + 1] == TOOL_HOLD):
+                    carry = point.tool
+                    continue
+            folded.append(point.x, point.y, point.z, point.r, point.velocity, point.acceleration, point.dwell_ms,
+                          point.tool, point.kind, point.mode, point.output_ratio, point.junction)
+        return folded
+
+    def blend_path(self, program, start_pose=None):
+        """Turn runs of plain moves into CP segments, in place."""
+        pose = tuple(start_pose[:4]) if start_pose is not None else None
+        run = []
+        for i in range(len(program)):
+            point = (program.x[i], program.y[i], program.z[i], program.r[i])
+            if program.mode[i] == MODE_NONE:
+                if program.tool[i] != TOOL_HOLD or program.dwell_ms[i] > 0:
+                    self.blend_run(program, run)
+                    run = []
+                continue
+            if (pose is not None and program.tool[i] == TOOL_HOLD and program.dwell_ms[i] <= 0
+                    and program.kind[i] not in (KIND_APPROACH, KIND_ACTION)
+                    and abs(point[3] - pose[3]) <= self.rotation_tolerance):
+                if not run:
+                    run.append((None, pose))
+                run.append((i, point))
+            else:
+                self.blend_run(program, run)
+                run = []
+            pose = point
+        self.blend_run(program, run)
+        return program
+
+    def blend_run(self, program, run):
+        # run is [(None, start pose), (index, point), ...]
+        n = len(run) - 1
+        if n < 2:
+            return
+        acc = self.cp_acceleration
+        points = [p for _, p in run]
+        lengths = [0.0] + [math.dist(points[k - 1][:3], points[k][:3]) for k in range(1, n + 1)]
+        speed = [0.0] * (n + 1)
+        for k in range(1, n):
+            speed[k] = junction_velocity(points[k - 1], points[k], points[k + 1], acc,
+                                         self.junction_deviation, self.cp_velocity)
+        # Brake in time for the corners ahead, then accelerate no faster than possible
+        for k in range(n - 1, 0, -1):
+            speed[k] = min(speed[k], math.sqrt(speed[k + 1] ** 2 + 2 * acc * lengths[k + 1]))
+        for k in range(1, n + 1):
+            speed[k] = min(speed[k], math.sqrt(speed[k - 1] ** 2 + 2 * acc * lengths[k]))
+        # The run stops at its last point anyway; keep the junction speed
+        # in force there instead of queuing another SetCPParams
+        speed[n] = speed[n - 1]
+        for k in range(1, n + 1):
+            i = run[k][0]
+            program.mode[i] = MODE_CP
+            program.velocity[i] = self.cp_velocity
+            program.junction[i] = max(MIN_JUNCTION_VELOCITY, speed[k])
+
+    # =========================================================
+    # ESTIMATES
+    # =========================================================
+
+    def estimate(self, program, start_pose=None, velocity_ratio=100.0, acceleration_ratio=100.0, tool_ms=0.0,
+                 command_ms=COMMAND_LATENCY * 1000, estimator=None):
+        """Predicted execution time of program in seconds: moves, tool changes, dwells.
+
+        Uses MotionEstimator with the default PTP joint/coordinate/jump
+        parameters scaled by the common velocity and acceleration ratios,
+        plus command_ms of host round trip for every queued command, or
+        the given estimator.
+        """
+        if estimator is None:
+            estimator = MotionEstimator(velocity_ratio=velocity_ratio, acceleration_ratio=acceleration_ratio,
+                                        tool_ms=tool_ms, command_ms=command_ms)
+        return estimator.total_ms(program, start_pose, self.default_mode) / 1000.0
+
+    def report(self, program, start_pose=None, **estimate_kwargs):
+        """Plan program and compare it with the unplanned one."""
+        planned = self.plan(program, start_pose)
+        before = self.estimate(program, start_pose, **estimate_kwargs)
+        after = self.estimate(planned, start_pose, **estimate_kwargs)
+        return {
+            "points": len(program),
+            "moves_before": sum(1 for m in program.mode if m != MODE_NONE),
+            "moves_after": sum(1 for m in planned.mode if m != MODE_NONE),
+            "commands_before": sum(1 for _ in program.commands(self.default_mode)),
+            "commands_after": sum(1 for _ in planned.commands(self.default_mode)),
+            "time_before_s": before,
+            "time_after_s": after,
+            "saving_s": before - after,
+            "planned": planned,
+        }
+
+    def print_report(self, program, label="program", start_pose=None, **estimate_kwargs):
+        r = self.report(program, start_pose, **estimate_kwargs)
+        print(f"[PLAN] {label}: {r['moves_before']} -> {r['moves_after']} moves, "
+              f"{r['commands_before']} -> {r['commands_after']} queued commands, "
+              f"est. {r['time_before_s']:.2f} s -> {r['time_after_s']:.2f} s "
+              f"(saves {r['saving_s']:.2f} s per cycle)")
+        return r["planned"]
@@ -0,0 +1,462 @@
+# WaypointProgram.py
+import os
+import csv
+import struct
+import sys
+import json
+import hashlib
+import threading
+from array import array
+from collections import OrderedDict
+
+import DobotDllType as dType
+from PlaybackParser import iter_playback_rows, item_float
+from WaypointRunner import (ptp_command, ptp_parallel_command, cp_command, cp_params_command, suction_command,
+                            gripper_command, wait_command)
+
+# Tool (suction cup / gripper) state per point
+TOOL_HOLD = -1   # leave the end effector as it is
+TOOL_OFF = 0
+TOOL_ON = 1
+
+# Segment annotations, as written in the waypoint comments and teaching notes
+KIND_NONE = 0
+KIND_APPROACH = 1
+KIND_ACTION = 2
+KIND_RETREAT = 3
+KIND_TRANSFER = 4
+KIND_NAMES = {"": KIND_NONE, "approach": KIND_APPROACH, "action": KIND_ACTION,
+              "retreat": KIND_RETREAT, "transfer": KIND_TRANSFER}
+
+# PTP mode per point: -1 uses the mode passed to commands(), -2 means the
+# point repeats the previous pose and only its tool change and dwell are queued,
+# -3 reaches the point with a blended CP segment at the point's velocity (mm/s)
+# and passes it at the point's junction speed (mm/s)
+MODE_DEFAULT = -1
+MODE_NONE = -2
+MODE_CP = -3
+
+# CP acceleration (mm/s^2) sent with the junction speed in SetCPParams, and
+# the smallest junction change worth a SetCPParams command (mm/s)
+CP_ACCELERATION = 200.0
+JUNCTION_STEP = 2.0
+
+# Tool change per point: -1 queues it as its own command after the move,
+# 0-100 sends it with the move (SetPTPPOCmd), fired once that percentage of
+# the move is done
+OUTPUT_NONE = -1
+
+EFFECTOR_SUCTION = 0
+EFFECTOR_GRIPPER = 1
+
+# End effector I/O behind SetEndEffectorSuctionCup(enableCtrl=1, on):
+# (EIO address, level) per tool state with the air pump box on SW1 (pump
+# power) and GP1 (valve). Check the addresses against the I/O multiplexing
+# table of the arm if the kit is wired differently.
+PUMP_POWER_EIO = 16
+PUMP_VALVE_EIO = 11
+# Keyed by effector. An effector without an entry (the gripper, whose I/O
+# has not been checked) always gets its own SetEndEffector* command.
+TOOL_OUTPUTS = {
+    EFFECTOR_SUCTION: {
+        TOOL_ON: ((PUMP_POWER_EIO, 1), (PUMP_VALVE_EIO, 1)),
+        TOOL_OFF: ((PUMP_POWER_EIO, 1), (PUMP_VALVE_EIO, 0)),
+    },
+}
+
+# Column arrays in binary-file order: (name, typecode)
+COLUMNS = (("x", "d"), ("y", "d"), ("z", "d"), ("r", "d"),
+           ("velocity", "d"), ("acceleration", "d"), ("dwell_ms", "d"),
+           ("tool", "b"), ("kind", "b"), ("mode", "b"), ("output_ratio", "b"), ("junction", "d"))
+
+BINARY_MAGIC = b"DWPG"
+BINARY_VERSION = 4
+BINARY_HEADER = struct.Struct("<4sHBxI")  # magic, version, effector, count
+BINARY_SUFFIX = ".wpc"
+
+
+def kind_from_note(note):
+    note = (note or "").strip().lower()
+    for name, kind in KIND_NAMES.items():
+        if name and name in note:
+            return kind
+    return KIND_NONE
+
+
+class Waypoint:
+    __slots__ = ("x", "y", "z", "r", "velocity", "acceleration", "dwell_ms", "tool", "kind", "mode", "output_ratio",
+                 "junction")
+
+    def __init__(self, x, y, z, r, velocity=0.0, acceleration=0.0, dwell_ms=0.0, tool=TOOL_HOLD, kind=KIND_NONE,
+                 mode=MODE_DEFAULT, output_ratio=OUTPUT_NONE, junction=0.0):
+        self.x = x
+        self.y = y
+        self.z = z
+        self.r = r
+        self.velocity = velocity
+        self.acceleration = acceleration
+        self.dwell_ms = dwell_ms
+        self.tool = tool
+        self.kind = kind
+        self.mode = mode
+        self.output_ratio = output_ratio
+        self.junction = junction
+
+    def __repr__(self):
+        return (f"Waypoint(X={self.x}, Y={self.y}, Z={self.z}, R={self.r}, Vel={self.velocity}, "
+                f"Accel={self.acceleration}, Dwell={self.dwell_ms}ms, Tool={self.tool}, Kind={self.kind}, "
+                f"Mode={self.mode}, Output={self.output_ratio}, Junction={self.junction})")
+
+
+class Program:
+    """Waypoint list stored column-wise in compact typed arrays.
+
+    Every loader (CSV, .playback XML, legacy tuples, binary cache) produces
+    the same Program, and commands() turns it into WaypointRunner commands.
+    """
+
+    def __init__(self, effector=EFFECTOR_SUCTION):
+        self.effector = effector
+        for name, typecode in COLUMNS:
+            setattr(self, name, array(typecode))
+
+    def __len__(self):
+        return len(self.x)
+
+    def __getitem__(self, i):
+        return Waypoint(*(getattr(self, name)[i] for name, _ in COLUMNS))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def append(self, x, y, z, r, velocity=0.0, acceleration=0.0, dwell_ms=0.0, tool=TOOL_HOLD, kind=KIND_NONE,
+               mode=MODE_DEFAULT, output_ratio=OUTPUT_NONE, junction=0.0):
+        self.x.append(x)
+        self.y.append(y)
+        self.z.append(z)
+        self.r.append(r)
+        self.velocity.append(velocity)
+        self.acceleration.append(acceleration)
+        self.dwell_ms.append(dwell_ms)
+        self.tool.append(tool)
+        self.kind.append(kind)
+        self.mode.append(mode)
+        self.output_ratio.append(output_ratio)
+        self.junction.append(junction)
+
+    def tool_command(self, on):
+        if self.effector == EFFECTOR_GRIPPER:
+            return gripper_command(on)
+        return suction_command(on)
+
+    def parallel_outputs(self, i, tool_outputs=TOOL_OUTPUTS):
+        """(ratio, address, level) list sending point i's tool change with its
+        move, or None when it is queued as its own command."""
+        tool = self.tool[i]
+        outputs = tool_outputs.get(self.effector)
+        if (outputs is None or tool == TOOL_HOLD or self.mode[i] in (MODE_NONE, MODE_CP)
+                or self.output_ratio[i] == OUTPUT_NONE):
+            return None
+        return [(self.output_ratio[i], address, level) for address, level in outputs[tool]]
+
+    def commands(self, mode=dType.PTPMode.PTPMOVLXYZMode, tool_settle_ms=0, tool_outputs=TOOL_OUTPUTS,
+                 cp_acceleration=CP_ACCELERATION):
+        """Move, then tool change, then dwell (queued as SetWAITCmd) per point.
+
+        mode is used for points without a planned mode. tool_settle_ms
+        queues an extra wait after every tool change. A tool change with an
+        output_ratio is sent with the move as tool_outputs I/O instead, if
+        tool_outputs has an entry for the program's effector. A CP
+        point is preceded by a queued SetCPParams when its junction speed
+        differs from the one in force.
+        """
+        junction = None
+        for i in range(len(self)):
+            point_mode = self.mode[i]
+            tool = self.tool[i]
+            outputs = self.parallel_outputs(i, tool_outputs)
+            if point_mode == MODE_CP:
+                if junction is None or abs(self.junction[i] - junction) > JUNCTION_STEP:
+                    junction = self.junction[i]
+                    yield cp_params_command(cp_acceleration, junction)
+                yield cp_command(self.x[i], self.y[i], self.z[i], self.velocity[i])
+            elif point_mode != MODE_NONE:
+                point_mode = mode if point_mode == MODE_DEFAULT else point_mode
+                if outputs is not None:
+                    yield ptp_parallel_command(self.x[i], self.y[i], self.z[i], self.r[i], outputs, point_mode)
+                else:
+                    yield ptp_command(self.x[i], self.y[i], self.z[i], self.r[i], point_mode)
+            if tool != TOOL_HOLD:
+                if outputs is None:
+                    yield self.tool_command(tool)
+                if tool_settle_ms > 0:
+                    yield wait_command(tool_settle_ms)
+            if self.dwell_ms[i] > 0:
+                yield wait_command(self.dwell_ms[i])
+
+    # =========================================================
+    # LOADERS
+    # =========================================================
+
+    @classmethod
+    def from_tuples(cls, rows, effector=EFFECTOR_SUCTION, dwell_scale=1000.0):
+        """Legacy hard-coded waypoint tuples.
+
+        Accepted layouts:
+          (X, Y, Z, R)
+          (X, Y, Z, R, Suction)
+          (X, Y, Z, R, PauseSeconds, "enable"/"disable")        DobotControl3
+          (X, Y, Z, R, Velocity, Acceleration, Tool)             InterpretPlayback
+          (X, Y, Z, R, Velocity, Acceleration, Tool, Dwell)      COM4practice/Dobot2
+          (X, Y, Z, R, Velocity, Acceleration, Tool, Dwell, Note)
+        Tool is 0 = off, 1 = on, 2 = hold. dwell_scale converts Dwell to ms
+        (1000 for seconds as in COM4practice, 1 for Dobot2's milliseconds).
+        Note is an annotation such as "approach" or "transfer" (see KIND_NAMES).
+        """
+        program = cls(effector)
+        for row in rows:
+            n = len(row)
+            x, y, z, r = (float(v) for v in row[:4])
+            if n == 4:
+                program.append(x, y, z, r)
+            elif n == 5:
+                program.append(x, y, z, r, tool=tool_code(row[4]))
+            elif n == 6:
+                tool = TOOL_ON if row[5] == "enable" else TOOL_OFF
+                program.append(x, y, z, r, dwell_ms=float(row[4]) * 1000, tool=tool)
+            elif n in (7, 8, 9):
+                dwell = float(row[7]) * dwell_scale if n >= 8 else 0.0
+                kind = kind_from_note(row[8]) if n == 9 else KIND_NONE
+                program.append(x, y, z, r, float(row[4]), float(row[5]), dwell, tool_code(row[6]), kind)
+            else:
+                raise ValueError(f"Unsupported waypoint tuple with {n} fields: {row!r}")
+        return program
+
+    @classmethod
+    def from_csv(cls, filename, effector=EFFECTOR_SUCTION):
+        """CSV written by InterpretPlayback.export_to_csv or teaching.py.
+
+        Columns are matched by header name (case-insensitive): X, Y, Z, R and
+        optionally Velocity, Acceleration, Suction/Gripper, Dwell (seconds)
+        and Note.
+        """
+        program = cls(effector)
+        with open(filename, newline="") as f:
+            reader = csv.reader(f)
+            header = [h.strip().lower() for h in next(reader)]
+            col = {name: header.index(name) for name in header}
+            vel_i = col.get("velocity")
+            acc_i = col.get("acceleration")
+            tool_i = col.get("suction/gripper", col.get("suction", col.get("gripper")))
+            dwell_i = col.get("dwell")
+            note_i = col.get("note")
+            for row in reader:
+                if not row:
+                    continue
+                program.append(
+                    float(row[col["x"]]), float(row[col["y"]]), float(row[col["z"]]), float(row[col["r"]]),
+                    float(row[vel_i]) if vel_i is not None else 0.0,
+                    float(row[acc_i]) if acc_i is not None else 0.0,
+                    float(row[dwell_i]) * 1000 if dwell_i is not None else 0.0,
+                    tool_code(row[tool_i]) if tool_i is not None else TOOL_HOLD,
+                    kind_from_note(row[note_i]) if note_i is not None else KIND_NONE)
+        return program
+
+    @classmethod
+    def from_playback(cls, filename, effector=EFFECTOR_GRIPPER):
+        """DobotStudio .playback XML: item_2..item_5 = X, Y, Z, R,
+        item_10 = pause in seconds, item_11 = gripper code (2 = enable).
+        Rows are streamed, so any number of rows is loaded."""
+        program = cls(effector)
+        for row_number, items in iter_playback_rows(filename):
+            try:
+                grip = items.get("item_11")
+                program.append(
+                    item_float(items, "item_2"), item_float(items, "item_3"),
+                    item_float(items, "item_4"), item_float(items, "item_5"),
+                    dwell_ms=item_float(items, "item_10", 0.0) * 1000,
+                    tool=(TOOL_ON if int(grip) == 2 else TOOL_OFF) if grip else TOOL_HOLD,
+                    kind=kind_from_note(items.get("item_1")))
+            except (ValueError, TypeError) as e:
+                print(f"[PROGRAM] Skipping row{row_number}: {e}")
+        return program
+
+    # =========================================================
+    # BINARY FORM
+    # =========================================================
+
+    def to_bytes(self):
+        parts = [BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, self.effector, len(self))]
+        for name, _ in COLUMNS:
+            column = getattr(self, name)
+            if sys.byteorder != "little":
+                column = array(column.typecode, column)
+                column.byteswap()
+            parts.append(column.tobytes())
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, effector, count = BINARY_HEADER.unpack_from(data)
+        if magic != BINARY_MAGIC or version != BINARY_VERSION:
+            raise ValueError("Not a compiled waypoint program")
+        program = cls(effector)
+        offset = BINARY_HEADER.size
+        for name, typecode in COLUMNS:
+            column = getattr(program, name)
+            size = column.itemsize * count
+            column.frombytes(data[offset:offset + size])
+            if sys.byteorder != "little":
+                column.byteswap()
+            offset += size
+        return program
+
+    def save_binary(self, filename):
+        with open(filename, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load_binary(cls, filename):
+        with open(filename, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+def tool_code(value):
+    value = int(float(value))
+    if value == 2:
+        return TOOL_HOLD
+    return TOOL_ON if value else TOOL_OFF
+
+
+# =========================================================
+# COMPILED PROGRAM CACHE
+# =========================================================
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".program_cache")
+CACHE_MAX_ENTRIES = 64      # compiled programs kept on disk
+CACHE_MEMORY_ENTRIES = 16   # compiled programs kept in this process
+
+
+class ProgramCache:
+    """Content-addressed store of parsed and planned programs.
+
+    Entries are keyed by the SHA-256 of the source file bytes plus the
+    loader/planner settings, so an edited file or a changed planner setting
+    is a miss, while renaming or copying a file is still a hit. The least
+    recently used entries are evicted, both from disk (by file mtime,
+    refreshed on every hit) and from the in-process layer.
+    Programs returned from the cache are shared and must not be modified.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_entries=CACHE_MAX_ENTRIES, memory_entries=CACHE_MEMORY_ENTRIES):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, filename, settings=None):
+        digest = hashlib.sha256()
+        with open(filename, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 16), b""):
+                digest.update(chunk)
+        digest.update(json.dumps([BINARY_VERSION, settings], sort_keys=True, default=repr).encode())
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + BINARY_SUFFIX)
+
+    def get(self, key):
+        with self.lock:
+            program = self.memory.get(key)
+            if program is not None:
+                self.memory.move_to_end(key)
+                self.memory_hits += 1
+                return program
+        path = self.path(key)
+        try:
+            program = Program.load_binary(path)
+            os.utime(path)
+        except (OSError, ValueError, struct.error):
+            return None
+        with self.lock:
+            self.disk_hits += 1
+            self._remember(key, program)
+        return program
+
+    def put(self, key, program):
+        with self.lock:
+            self._remember(key, program)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = self.path(key) + ".tmp"
+            program.save_binary(tmp)
+            os.replace(tmp, self.path(key))
+            self._evict_disk()
+        except OSError as e:
+            print(f"[PROGRAM] Could not write cache entry {key[:12]}: {e}")
+
+    def _remember(self, key, program):
+        self.memory[key] = program
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def _evict_disk(self):
+        entries = [e for e in os.scandir(self.directory) if e.name.endswith(BINARY_SUFFIX)]
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        for entry in entries[:len(entries) - self.max_entries]:
+            try:
+                os.remove(entry.path)
+                self.evictions += 1
+            except OSError:
+                pass
+
+    def load(self, filename, build, settings=None):
+        """Return the compiled program for filename, calling build(filename) on a miss."""
+        key = self.key(filename, settings)
+        program = self.get(key)
+        if program is not None:
+            return program
+        with self.lock:
+            self.misses += 1
+        program = build(filename)
+        self.put(key, program)
+        return program
+
+    def stats(self):
+        return {"memory_hits": self.memory_hits, "disk_hits": self.disk_hits,
+                "misses": self.misses, "evictions": self.evictions}
+
+
+default_cache = ProgramCache()
+
+
+def parse_program(filename, **kwargs):
+    if filename.lower().endswith(".csv"):
+        return Program.from_csv(filename, **kwargs)
+    return Program.from_playback(filename, **kwargs)
+
+
+def load_program(filename, cache=default_cache, plan=None, plan_settings=None, **kwargs):
+    """Load a .csv or .playback file as a compiled Program.
+
+    plan is an optional callable applied after parsing (e.g. a trajectory
+    planner); plan_settings must describe it, since it is part of the cache
+    key. Pass cache=None to always re-parse.
+    """
+    def build(name):
+        program = parse_program(name, **kwargs)
+        return plan(program) if plan is not None else program
+
+    if cache is None:
+        return build(filename)
+    settings = {"loader": kwargs, "plan": plan_settings}
+    return cache.load(filename, build, settings)
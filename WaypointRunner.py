@@ -0,0 +1,118 @@
+# WaypointRunner.py
+import time
+from collections import deque
+
+import DobotDllType as dType
+
+# Commands kept in the controller queue at once while streaming
+IN_FLIGHT = 8
+# Commands queued before execution starts
+START_AFTER = 2
+# Poll period while the in-flight window is full
+POLL_MS = 20
+
+# =========================================================
+# COMMAND ISSUERS
+# =========================================================
+# A command is a callable taking the api and returning the queued index
+# of the last entry it put into the controller queue.
+
+def ptp_command(x, y, z, r, mode=dType.PTPMode.PTPMOVLXYZMode):
+    def issue(api):
+        return dType.SetPTPCmd(api, mode, x, y, z, r, isQueued=1)[0]
+    return issue
+
+def ptp_parallel_command(x, y, z, r, outputs, mode=dType.PTPMode.PTPMOVLXYZMode):
+    """PTP move with I/O outputs fired during it; outputs are (ratio, address, level)."""
+    def issue(api):
+        return dType.SetPTPPOCmd(api, mode, x, y, z, r, outputs, isQueued=1)[0]
+    return issue
+
+def cp_command(x, y, z, velocity):
+    """Continuous-path segment, blended with the CP segments around it; R is kept."""
+    def issue(api):
+        return dType.SetCPCmd(api, dType.ContinuousPathMode.CPAbsoluteMode, x, y, z, velocity, isQueued=1)[0]
+    return issue
+
+def cp_params_command(acceleration, junction_velocity):
+    """Queued CP parameters; the junction speed applies to the CP segments after it."""
+    def issue(api):
+        return dType.SetCPParams(api, acceleration, junction_velocity, acceleration, isQueued=1)[0]
+    return issue
+
+def suction_command(on):
+    def issue(api):
+        return dType.SetEndEffectorSuctionCup(api, 1, int(on), isQueued=1)[0]
+    return issue
+
+def gripper_command(on, enable=1):
+    def issue(api):
+        return dType.SetEndEffectorGripper(api, enable, int(on), isQueued=1)[0]
+    return issue
+
+def wait_command(ms):
+    """Dwell executed by the controller, in line with the queued motion."""
+    def issue(api):
+        return dType.SetWAITCmd(api, int(ms), isQueued=1)[0]
+    return issue
+
+def waypoint_commands(waypoints, mode=dType.PTPMode.PTPMOVLXYZMode):
+    """Plain (X, Y, Z, R, ...) tuples → PTP commands, extra fields ignored."""
+    for wp in waypoints:
+        yield ptp_command(wp[0], wp[1], wp[2], wp[3], mode)
+
+# =========================================================
+# STREAMING FEEDER
+# =========================================================
+
+def stream_commands(api, commands, in_flight=IN_FLIGHT, start_after=START_AFTER, poll_ms=POLL_MS, expected_ms=None,
+                    wait=True):
+    """Feed commands into the queue, keeping at most in_flight pending.
+
+    Execution starts once start_after commands are queued, so motion begins
+    before the whole path is enqueued. Only the pending window is held in
+    memory, so commands can be a generator over a path of any length.
+    expected_ms is the predicted run time from the start of execution
+    (see MotionEstimator); the final wait polls fast only near its end.
+    With wait=False it returns once everything is queued, leaving the
+    queue running; wait for the index with WaitQueuedCmd/AwaitQueuedCmd and
+    call SetQueuedCmdStopExec. Returns the queued index of the last command.
+    """
+    start_after = max(1, min(start_after, in_flight))
+    pending = deque()
+    started = None
+    lastIndex = 0
+
+    for issue in commands:
+        while len(pending) >= in_flight:
+            if started is None:
+                dType.SetQueuedCmdStartExec(api)
+                started = time.monotonic()
+            currentIndex = dType.GetQueuedCmdCurrentIndex(api)[0]
+            while pending and pending[0] <= currentIndex:
+                pending.popleft()
+            if len(pending) >= in_flight:
+                dType.dSleep(poll_ms)
+
+        lastIndex = issue(api)
+        pending.append(lastIndex)
+
+        if started is None and len(pending) >= start_after:
+            dType.SetQueuedCmdStartExec(api)
+            started = time.monotonic()
+
+    if started is None:
+        dType.SetQueuedCmdStartExec(api)
+        started = time.monotonic()
+    if not wait:
+        return lastIndex
+    if pending:
+        expectedMs = None
+        if expected_ms is not None:
+            expectedMs = max(expected_ms - (time.monotonic() - started) * 1000, 0)
+        dType.WaitQueuedCmd(api, lastIndex, expectedMs)
+    dType.SetQueuedCmdStopExec(api)
+    return lastIndex
+
+def stream_waypoints(api, waypoints, mode=dType.PTPMode.PTPMOVLXYZMode, **kwargs):
+    return stream_commands(api, waypoint_commands(waypoints, mode), **kwargs)
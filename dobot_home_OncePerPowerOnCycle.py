@@ -17,8 +17,7 @@ if state == dType.DobotConnect.DobotConnect_NoError:
     dType.SetQueuedCmdStartExec(api)
 
     # Wait until homing is done
-    while lastIndex > dType.GetQueuedCmdCurrentIndex(api)[0]:
-        dType.dSleep(100)
+    dType.WaitQueuedCmd(api, lastIndex)
 
     dType.SetQueuedCmdStopExec(api)
 
@@ -1,7 +1,12 @@
 # main.py
-import time
-import pymcprotocol
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 
+from AsyncMC import AsyncType3E
+from DobotPool import DobotConnectionPool
+from PlcIO import AsyncPlcIO
+from PlcLink import PlcLink
+from PlcScanner import AsyncPlcScanner
 from DobotControl_COM3 import run_dobot_com3
 from DobotControl_COM4 import run_dobot_com4
 from DobotControl_COM5 import run_dobot_com5
@@ -9,44 +14,115 @@ from DobotControl_COM5 import run_dobot_com5
 # PLC settings
 PLC_IP = "192.168.10.100"
 PLC_PORT = 5051
+PLC_TIMEOUT = 2.0
+
+# Scan period for the start words, kept fixed regardless of motion time
+POLL_INTERVAL = 0.05
+# Delay before a failed job is retried while its start word is still set
+RETRY_DELAY = 1.0
 
 # Per-robot signals
 R1_START = "D100"; R1_END = "D101"   # COM3
 R2_START = "D110"; R2_END = "D111"   # COM4
 R3_START = "D120"; R3_END = "D121"   # COM5
 
-def read_word(plc, device):
-    data = plc.batchread_wordunits(headdevice=device, readsize=1)
-    return data[0] if isinstance(data, (list, tuple)) and data else data
-
-def handle_robot(plc, start_dev, end_dev, runner, label):
-    start_val = read_word(plc, start_dev)
-    if start_val == 1:
-        print(f"[{label}] Start detected at {start_dev}. Running motion.")
-        runner()
-        plc.batchwrite_wordunits(headdevice=end_dev, values=[1])
-        plc.batchwrite_wordunits(headdevice=start_dev, values=[0])
-        print(f"[{label}] End set at {end_dev}; {start_dev} reset to 0.")
-
-def mes_cycle_event_loop():
-    plc = pymcprotocol.Type3E()
-    plc.connect(PLC_IP, PLC_PORT)
+class ArmWorker:
+    """One arm: blocking Dobot calls run on its own thread.
+
+    The PLC side of the handshake is a coroutine (arm_loop), so a slow PLC
+    reply never stalls motion and a long motion never stalls the scan.
+    """
+
+    def __init__(self, pool, label, start_dev, end_dev, runner):
+        self.pool = pool
+        self.label = label
+        self.start_dev = start_dev
+        self.end_dev = end_dev
+        self.runner = runner
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"arm-{label}")
+
+    def run_job(self):
+        try:
+            # Reuses the open session; reconnects only if the health check fails
+            api = self.pool.acquire(self.label)
+            self.runner(api)
+            return True
+        except Exception as e:
+            print(f"[{self.label}] Motion failed: {e}")
+            self.pool.invalidate(self.label)
+            return False
+
+    def stop(self):
+        self.executor.shutdown(wait=True)
+
+async def arm_loop(link, scanner, worker):
+    """Start word set -> motion -> end word set, start word reset.
+
+    The start word is a level trigger as in the scan loop it replaced; edge
+    events only wake the loop. After each reset the word is read again, so
+    a PLC that sets it back to 1 before the next scan still starts a job.
+    """
+    loop = asyncio.get_running_loop()
+    starts = asyncio.Queue()
+    scanner.subscribe(worker.start_dev, queue=starts)
+    while True:
+        await starts.get()
+        while scanner.value(worker.start_dev) == 1:
+            # Edges seen so far are covered by this level check
+            while not starts.empty():
+                starts.get_nowait()
+            print(f"[{worker.label}] Start detected at {worker.start_dev}. Running motion.")
+            if await loop.run_in_executor(worker.executor, worker.run_job):
+                link.io.set_word(worker.end_dev, 1)
+                link.io.set_word(worker.start_dev, 0)
+                # Waits out a dropped link; the words go out after the reconnect
+                await link.flush()
+                print(f"[{worker.label}] End set at {worker.end_dev}; {worker.start_dev} reset to 0.")
+                # Re-read the start word from a scan that began after the reset
+                await scanner.wait_scans(2)
+            else:
+                # Leave the start word set so the PLC can see the arm did not finish,
+                # and retry while it stays set
+                await asyncio.sleep(RETRY_DELAY)
+
+async def mes_cycle_event_loop():
+    plc = AsyncType3E(PLC_IP, PLC_PORT, timeout=PLC_TIMEOUT)
+    io = AsyncPlcIO(plc)
+    # Exponential-backoff reconnect, keepalive reads and latency metrics
+    link = PlcLink(plc, io)
+    await link.connect()
     print(f"PLC connected to {PLC_IP}:{PLC_PORT}")
+    pool = DobotConnectionPool()
+    scanner = AsyncPlcScanner(io, period=POLL_INTERVAL)
+
+    workers = [
+        ArmWorker(pool, "COM3", R1_START, R1_END, run_dobot_com3),
+        ArmWorker(pool, "COM4", R2_START, R2_END, run_dobot_com4),
+        ArmWorker(pool, "COM5", R3_START, R3_END, run_dobot_com5),
+    ]
+    # One handshake coroutine per arm next to the scanner; all PLC frames
+    # share the one pipelined connection
+    tasks = [asyncio.create_task(arm_loop(link, scanner, worker)) for worker in workers]
+    tasks.append(asyncio.create_task(scanner.run()))
+    tasks.append(asyncio.create_task(link.run()))
 
     try:
-        while True:
-            # Check each robot’s start signal
-            handle_robot(plc, R1_START, R1_END, run_dobot_com3, "COM3")
-            handle_robot(plc, R2_START, R2_END, run_dobot_com4, "COM4")
-            handle_robot(plc, R3_START, R3_END, run_dobot_com5, "COM5")
-
-            # Polling interval: 50 ms
-            time.sleep(0.05)
-    except KeyboardInterrupt:
-        print("Stopping loop by user request.")
+        await asyncio.gather(*tasks)
     finally:
-        plc.close()
+        scanner.stop()
+        link.stop()
+        for task in tasks:
+            task.cancel()
+        for worker in workers:
+            worker.stop()
+        pool.print_metrics()
+        link.print_metrics()
+        pool.close_all()
+        await plc.close()
         print("PLC connection closed.")
 
 if __name__ == "__main__":
-    mes_cycle_event_loop()
+    try:
+        asyncio.run(mes_cycle_event_loop())
+    except KeyboardInterrupt:
+        print("Stopping loop by user request.")
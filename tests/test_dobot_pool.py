@@ -0,0 +1,37 @@
+import unittest
+from unittest import mock
+
+import DobotDllType as dType
+from DobotPool import DobotConnectionPool
+from DobotSim import SimulatedDll
+
+
+class FailingClearDll(SimulatedDll):
+    """Connects, then rejects the first SetQueuedCmdClear."""
+
+    def __init__(self):
+        SimulatedDll.__init__(self, latency=0)
+        self.failClear = True
+
+    def SetQueuedCmdClear(self, masterId, slaveId):
+        if self.failClear:
+            self.failClear = False
+            return dType.DobotCommunicate.DobotCommunicate_InvalidParams
+        return SimulatedDll.SetQueuedCmdClear(self, masterId, slaveId)
+
+
+class ConnectionPoolTest(unittest.TestCase):
+    def test_failed_setup_releases_the_port(self):
+        dll = FailingClearDll()
+        with mock.patch.object(dType, "loadLibrary", return_value=dll):
+            pool = DobotConnectionPool()
+        with self.assertRaises(dType.DobotCommunicateError):
+            pool.acquire("COM3")
+        self.assertEqual(dll.arms, {})
+        # The port is free again, so the next cycle connects
+        api = pool.acquire("COM3")
+        self.assertEqual(dll.arm(api.masterId).portName, "COM3")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import math
+import random
+import unittest
+
+import Kinematics
+from Kinematics import (JOINT_LIMITS, forward_kinematics, inverse_kinematics, inverse_kinematics_columns,
+                        within_limits)
+
+
+def random_joints(rng, limits=JOINT_LIMITS):
+    return tuple(rng.uniform(low, high) for low, high in limits)
+
+
+def near_extension(rng, margin=0.5):
+    """Joints with the arm almost straight: the two elbow branches nearly meet."""
+    while True:
+        j1 = rng.uniform(*JOINT_LIMITS[0])
+        j2 = rng.uniform(*JOINT_LIMITS[1])
+        # Straight arm: forearm angle from horizontal = 90 - rear arm angle from vertical
+        j3 = 90.0 - j2 + rng.uniform(-margin, margin)
+        j4 = rng.uniform(*JOINT_LIMITS[3])
+        joints = (j1, j2, j3, j4)
+        if within_limits(joints):
+            return joints
+
+
+class RoundTripTest(unittest.TestCase):
+    def assertJointsClose(self, expected, actual, tolerance=1e-6):
+        self.assertIsNotNone(actual)
+        for a, b in zip(expected, actual):
+            self.assertAlmostEqual(a, b, delta=tolerance, msg=f"{expected} -> {actual}")
+
+    def test_round_trip_with_seed(self):
+        rng = random.Random(20000)
+        samples = [random_joints(rng) for _ in range(20000)] + [near_extension(rng) for _ in range(2000)]
+        for joints in samples:
+            self.assertJointsClose(joints, inverse_kinematics(*forward_kinematics(*joints), seed=joints))
+
+    def test_round_trip_picks_branch_inside_limits(self):
+        rng = random.Random(7)
+        for _ in range(20000):
+            joints = random_joints(rng)
+            result = inverse_kinematics(*forward_kinematics(*joints))
+            self.assertTrue(within_limits(result), f"{joints} -> {result}")
+            self.assertJointsClose(forward_kinematics(*joints), forward_kinematics(*result), 1e-6)
+
+    def test_full_extension(self):
+        for j2 in (0.0, 30.0, 60.0, 89.0):
+            joints = (10.0, j2, 90.0 - j2, 5.0)
+            self.assertJointsClose(joints, inverse_kinematics(*forward_kinematics(*joints)), 1e-4)
+
+    def test_columns_match_single_point(self):
+        rng = random.Random(3)
+        samples = [random_joints(rng) for _ in range(500)] + [near_extension(rng) for _ in range(500)]
+        points = [forward_kinematics(*j) for j in samples]
+        columns, unreachable = inverse_kinematics_columns(*zip(*points))
+        self.assertEqual(unreachable, [])
+        seed = None
+        for i, point in enumerate(points):
+            expected = inverse_kinematics(*point, seed=seed)
+            self.assertJointsClose(expected, [column[i] for column in columns], 1e-9)
+            seed = expected
+
+    def test_out_of_reach(self):
+        reach = Kinematics.REAR_ARM + Kinematics.FORE_ARM + Kinematics.TOOL_OFFSET
+        self.assertIsNone(inverse_kinematics(reach + 1.0, 0.0, 0.0, 0.0))
+        columns, unreachable = inverse_kinematics_columns([reach + 1.0], [0.0], [0.0], [0.0])
+        self.assertEqual(unreachable, [0])
+        self.assertTrue(math.isnan(columns[1][0]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import threading
+import time
+import unittest
+
+import DobotDllType as dType
+from DobotSim import SimulatedDll
+
+
+def connect(**kwargs):
+    api = dType.DobotSession(SimulatedDll(latency=0, **kwargs))
+    dType.ConnectDobot(api, "COM3", 115200)
+    return api
+
+
+class RetryPolicyTest(unittest.TestCase):
+    def test_buffer_full_is_bounded_by_default(self):
+        self.assertIsNotNone(dType.RetryPolicy().bufferFullTimeoutMs)
+
+    def test_buffer_full_raises_after_timeout(self):
+        # Queue never runs, so the second command sees BufferFull until the limit
+        api = connect(capacity=1)
+        api.setRetryPolicy(dType.RetryPolicy(bufferFullTimeoutMs=100))
+        dType.SetWAITCmd(api, 1000, isQueued=1)
+        started = time.monotonic()
+        with self.assertRaises(dType.DobotCommunicateError) as raised:
+            dType.SetWAITCmd(api, 1000, isQueued=1)
+        self.assertEqual(raised.exception.result, dType.DobotCommunicate.DobotCommunicate_BufferFull)
+        self.assertLess(time.monotonic() - started, 1.0)
+
+    def test_limits_count_from_start_of_call(self):
+        api = connect()
+        api.setRetryPolicy(dType.RetryPolicy(bufferFullTimeoutMs=50))
+        retry = dType.RetryState(api, "SetPTPCmd")
+        time.sleep(0.06)
+        with self.assertRaises(dType.DobotCommunicateError):
+            retry.backoff(dType.DobotCommunicate.DobotCommunicate_BufferFull)
+
+    def test_home_wait_raises_when_arm_disconnects(self):
+        api = connect()
+        api.setRetryPolicy(dType.RetryPolicy(deadlineMs=200))
+        dType.SetQueuedCmdStartExec(api)
+        threading.Timer(0.2, api.dll.DisconnectDobot, (api.masterId,)).start()
+        started = time.monotonic()
+        with self.assertRaises(dType.DobotCommunicateError):
+            dType.SetHOMECmdEx(api, 0, isQueued=1)
+        self.assertLess(time.monotonic() - started, 2.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import asyncio
+import time
+import unittest
+
+import DobotDllType as dType
+from DobotSim import SimulatedDll
+
+
+def connect(latency=0.0, speed=1.0):
+    api = dType.DobotSession(SimulatedDll(speed=speed, latency=latency))
+    dType.ConnectDobot(api, "COM3", 115200)
+    return api
+
+
+class AwaitQueuedCmdTest(unittest.TestCase):
+    def test_event_loop_keeps_running_while_waiting(self):
+        # Every DLL call blocks for 100 ms, so a poll on the loop thread
+        # would stall the ticker below for at least that long
+        api = connect(latency=0.1)
+        index = dType.SetWAITCmd(api, 600, isQueued=1)[0]
+        dType.SetQueuedCmdStartExec(api)
+
+        async def run():
+            gaps = []
+
+            async def ticker():
+                last = time.monotonic()
+                while True:
+                    await asyncio.sleep(0.01)
+                    now = time.monotonic()
+                    gaps.append(now - last)
+                    last = now
+
+            task = asyncio.create_task(ticker())
+            result = await dType.AwaitQueuedCmd(api, index)
+            task.cancel()
+            return result, gaps
+
+        result, gaps = asyncio.run(run())
+        self.assertGreaterEqual(result[0], index)
+        self.assertGreater(len(gaps), 20)
+        self.assertLess(max(gaps), 0.08)
+
+    def test_timeout(self):
+        api = connect()
+        index = dType.SetWAITCmd(api, 5000, isQueued=1)[0]
+        dType.SetQueuedCmdStartExec(api)
+        with self.assertRaises(TimeoutError):
+            asyncio.run(dType.AwaitQueuedCmd(api, index, timeoutMs=50))
+
+
+if __name__ == "__main__":
+    unittest.main()